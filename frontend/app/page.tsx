@@ -38,12 +38,15 @@ export default function Page() {
                 const data = await eaService.listEAs();
                 setEas(data);
                 
-                // Atualizar resumo do sistema
+                // Atualizar resumo do sistema (médias só dos EAs com aderência calculada)
+                const withAdherence = data.filter((ea) => ea.metrics.adherenceRate != null);
+                const average = (values) =>
+                    values.length ? values.reduce((sum, value) => sum + value, 0) / values.length : 0;
                 setSystemSummary({
                     totalEAs: data.length,
-                    avgAdherence: Math.round(data.reduce((sum, ea) => sum + ea.metrics.adherenceRate, 0) / data.length),
+                    avgAdherence: Math.round(average(withAdherence.map((ea) => ea.metrics.adherenceRate))),
                     totalOperations: data.reduce((sum, ea) => sum + (ea.metrics.operations || 0), 0),
-                    avgSlippage: (data.reduce((sum, ea) => sum + (ea.metrics.slippage || 0), 0) / data.length).toFixed(2)
+                    avgSlippage: average(withAdherence.map((ea) => ea.metrics.slippage || 0)).toFixed(2)
                 });
                 
                 setLoading(false);
@@ -248,8 +251,12 @@ export default function Page() {
         }
     };
 
+    // Format adherence/slippage, which are null until adherence is calculated
+    const formatPercent = (value) => (value == null ? '—' : `${value}%`);
+
     // Get status color based on adherence percentage
     const getStatusColor = (adherence) => {
+        if (adherence == null) return '#6C757D';
         if (adherence >= 90) return '#28A745';
         if (adherence >= 80) return '#FFC107';
         return '#DC3545';
@@ -257,6 +264,7 @@ export default function Page() {
 
     // Get status glow class based on adherence percentage
     const getStatusGlowClass = (adherence) => {
+        if (adherence == null) return 'neon-glow';
         if (adherence >= 90) return 'neon-glow-green';
         if (adherence >= 80) return 'neon-glow-yellow';
         return 'neon-glow-red';
@@ -266,6 +274,8 @@ export default function Page() {
     const renderMiniTrend = (trendData) => {
         if (!trendData || trendData.length === 0) return null;
         
+        // Points arrive as { value, timestamp } from the API
+        trendData = trendData.map((point) => (typeof point === 'object' ? point.value : point));
         const max = Math.max(...trendData);
         const min = Math.min(...trendData);
         const range = max - min;
@@ -585,7 +595,7 @@ export default function Page() {
                     {eas.map((ea) => (
                         <div
                             key={ea.id}
-                            className={`card-gradient rounded-lg p-6 h-[200px] cursor-pointer transition-all duration-300 hover:translate-y-[-5px] relative overflow-hidden ${getStatusGlowClass(ea.metrics?.adherenceRate || 0)}`}
+                            className={`card-gradient rounded-lg p-6 h-[200px] cursor-pointer transition-all duration-300 hover:translate-y-[-5px] relative overflow-hidden ${getStatusGlowClass(ea.metrics?.adherenceRate)}`}
                             onClick={() => setSelectedEA(ea)}
                             data-oid="pi7_we5"
                         >
@@ -595,10 +605,10 @@ export default function Page() {
                                 </h3>
                                 <div
                                     className="w-[50px] h-[50px] rounded-full flex items-center justify-center text-white font-bold text-lg shadow-lg"
-                                    style={{ backgroundColor: getStatusColor(ea.metrics?.adherenceRate || 0) }}
+                                    style={{ backgroundColor: getStatusColor(ea.metrics?.adherenceRate) }}
                                     data-oid="03qdrfx"
                                 >
-                                    {ea.metrics?.adherenceRate || 0}%
+                                    {formatPercent(ea.metrics?.adherenceRate)}
                                 </div>
                             </div>
 
@@ -616,7 +626,7 @@ export default function Page() {
                                         Slippage
                                     </div>
                                     <div className="text-white font-medium" data-oid="tgv37uq">
-                                        {ea.metrics?.slippage || 0}%
+                                        {formatPercent(ea.metrics?.slippage)}
                                     </div>
                                 </div>
                             </div>
@@ -1122,11 +1132,11 @@ export default function Page() {
                                 <div
                                     className="ml-4 w-[40px] h-[40px] rounded-full flex items-center justify-center text-white text-sm font-bold"
                                     style={{
-                                        backgroundColor: getStatusColor(selectedEA.metrics?.adherenceRate || 0),
+                                        backgroundColor: getStatusColor(selectedEA.metrics?.adherenceRate),
                                     }}
                                     data-oid="u6vmcvr"
                                 >
-                                    {selectedEA.metrics?.adherenceRate || 0}%
+                                    {formatPercent(selectedEA.metrics?.adherenceRate)}
                                 </div>
                             </div>
                             <button
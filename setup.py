@@ -7,7 +7,12 @@ setup(
     packages=find_packages(),
     install_requires=[
         "MetaTrader5",
+        "numpy",
         "pandas",
+        "pyarrow",
         "pyzmq",
     ],
+    extras_require={
+        "msgpack": ["msgpack>=1.0.0"],
+    },
 )
\ No newline at end of file
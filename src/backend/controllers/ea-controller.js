@@ -6,7 +6,7 @@ class EAController {
   // Listar todos os EAs
   async listEAs(req, res) {
     try {
-      const eas = await eaService.listEAs();
+      const eas = await eaService.listEAs(req.query.extractId || null);
       return res.status(200).json(eas);
     } catch (error) {
       logger.error(`Erro ao listar EAs: ${error.message}`);
@@ -2,6 +2,7 @@
 const fs = require('fs').promises;
 const path = require('path');
 const logger = require('../utils/logger');
+const zmqClient = require('../zmq-client').getInstance();
 
 class AdherenceService {
   constructor() {
@@ -31,26 +32,31 @@ class AdherenceService {
       
       logger.info(`Calculando aderência para EA ${eaId}`);
       
-      // Aqui implementaríamos a lógica real de leitura de arquivos e cálculo
-      // Versão simplificada para demonstração
+      // Pareamento real x backtest é feito pelo servidor MT5 (ação "adherence")
+      const response = await zmqClient.calculateAdherence(eaId, extractionId, backtestId);
       
-      // Simular o resultado do cálculo
+      if (!response.success) {
+        throw new Error(`Falha ao calcular aderência: ${response.error || 'Erro desconhecido'}`);
+      }
+      
+      const adherence = response.result;
       const result = {
         eaId,
         extractionId,
         backtestId,
-        timestamp: new Date().toISOString(),
-        totalRealOperations: 120,
-        totalBacktestOperations: 125,
-        matchedOperations: 115,
-        adherenceRate: 92.0,
-        approved: true,
-        slippageAvg: 0.15,
-        unmatchedBacktest: 10,
-        unmatchedReal: 5
+        timestamp: adherence.timestamp,
+        totalRealOperations: adherence.total_real,
+        totalBacktestOperations: adherence.total_backtest,
+        matchedOperations: adherence.matched,
+        adherenceRate: adherence.match_rate,
+        approved: adherence.approved,
+        slippageAvg: adherence.slippage_avg,
+        timeDeltaAvgMs: adherence.time_delta_avg_ms,
+        unmatchedBacktest: adherence.unmatched_backtest.length,
+        unmatchedReal: adherence.unmatched_real.length
       };
       
-      // No MVP, salvar apenas o JSON com o resultado
+      // Salva o resumo do resultado
       const resultId = `adherence_${eaId}_${Date.now()}`;
       const resultPath = path.join(this.processedDir, `${resultId}.json`);
       
@@ -65,31 +71,27 @@ class AdherenceService {
   }
   
   /**
-   * Lista resultados de aderência 
+   * Lista os resultados de aderência salvos por calculateAdherence, do mais
+   * recente para o mais antigo
    */
   async listAdherenceResults(eaId = null) {
     try {
       await this.ensureDirectories();
       
-      // Simular resultados para MVP
-      return [
-        {
-          eaId: "ea1",
-          timestamp: new Date().toISOString(),
-          adherenceRate: 92.0,
-          totalRealOperations: 120,
-          slippageAvg: 0.15,
-          approved: true
-        },
-        {
-          eaId: "ea2",
-          timestamp: new Date(Date.now() - 86400000).toISOString(),
-          adherenceRate: 87.5,
-          totalRealOperations: 200,
-          slippageAvg: 0.23,
-          approved: false
+      const files = (await fs.readdir(this.processedDir)).filter(file => file.endsWith('.json'));
+      const results = [];
+      for (const file of files) {
+        try {
+          const result = JSON.parse(await fs.readFile(path.join(this.processedDir, file), 'utf8'));
+          if (!eaId || String(result.eaId) === String(eaId)) {
+            results.push(result);
+          }
+        } catch (error) {
+          logger.warn(`Resultado de aderência ilegível ${file}: ${error.message}`);
         }
-      ].filter(item => !eaId || item.eaId === eaId);
+      }
+      
+      return results.sort((a, b) => String(b.timestamp).localeCompare(String(a.timestamp)));
     } catch (error) {
       logger.error(`Erro ao listar resultados: ${error.message}`);
       return [];
@@ -2,16 +2,19 @@
 const fs = require('fs').promises;
 const path = require('path');
 const logger = require('../utils/logger');
+const zmqClient = require('../zmq-client').getInstance();
 
 class BacktestingService {
   constructor() {
     this.dataDir = path.resolve('./src/data');
     this.backtestsDir = path.join(this.dataDir, 'raw/backtests');
+    this.uploadsDir = path.join(this.backtestsDir, 'uploads');
   }
 
   async ensureDirectories() {
     try {
       await fs.mkdir(this.backtestsDir, { recursive: true });
+      await fs.mkdir(this.uploadsDir, { recursive: true });
     } catch (error) {
       logger.error(`Erro ao criar diretório: ${error.message}`);
     }
@@ -24,17 +27,26 @@ class BacktestingService {
     try {
       await this.ensureDirectories();
       
-      // No MVP, simulamos processamento bem-sucedido
       const backtestId = `backtest_${eaId}_${Date.now()}`;
       
-      logger.info(`Importação simulada: ${backtestId}`);
+      // Grava o relatório enviado e delega o parsing ao servidor MT5
+      const uploadPath = path.join(this.uploadsDir, `${backtestId}${path.extname(fileName)}`);
+      await fs.writeFile(uploadPath, fileBuffer);
+      
+      const response = await zmqClient.importBacktest(uploadPath, eaId, backtestId);
+      
+      if (!response.success) {
+        throw new Error(`Falha ao importar backtest: ${response.error || 'Erro desconhecido'}`);
+      }
+      
+      logger.info(`Backtest importado: ${backtestId}`);
       
       return {
         id: backtestId,
         eaId,
         fileName,
-        timestamp: new Date().toISOString(),
-        operations: 150
+        timestamp: response.metadata.timestamp,
+        operations: response.metadata.total_operations
       };
     } catch (error) {
       logger.error(`Erro ao importar backtest: ${error.message}`);
@@ -2,6 +2,8 @@
 const fs = require('fs').promises;
 const path = require('path');
 const logger = require('../utils/logger');
+const zmqClient = require('../zmq-client').getInstance();
+const adherenceService = require('./adherence-service');
 
 class EAService {
   constructor() {
@@ -18,65 +20,60 @@ class EAService {
   }
 
   /**
-   * Lista todos os EAs
+   * Lista os EAs com as métricas de desempenho calculadas pelo servidor MT5
+   * (ação "ea_metrics", em cache por extração); sem extractId usa a
+   * extração concluída mais recente. Aderência e slippage vêm do último
+   * resultado de aderência do EA (null se nunca calculada)
    */
-  async listEAs() {
+  async listEAs(extractId = null) {
     await this.ensureDirectories();
     
-    // Dados mockados para MVP
-    return [
-      {
-        id: "ea1",
-        name: "EA Momentum Trader",
-        metrics: {
-          adherenceRate: 95,
-          operations: 1250,
-          slippage: 0.12,
-          lastUpdate: new Date().toISOString(),
-          trend: [
-            { value: 93, timestamp: new Date(Date.now() - 5*86400000).toISOString() },
-            { value: 94, timestamp: new Date(Date.now() - 4*86400000).toISOString() },
-            { value: 92, timestamp: new Date(Date.now() - 3*86400000).toISOString() },
-            { value: 96, timestamp: new Date(Date.now() - 2*86400000).toISOString() },
-            { value: 95, timestamp: new Date(Date.now() - 86400000).toISOString() }
-          ]
-        }
-      },
-      {
-        id: "ea2",
-        name: "EA Scalper Pro",
-        metrics: {
-          adherenceRate: 87,
-          operations: 4320,
-          slippage: 0.23,
-          lastUpdate: new Date().toISOString(),
-          trend: [
-            { value: 85, timestamp: new Date(Date.now() - 5*86400000).toISOString() },
-            { value: 89, timestamp: new Date(Date.now() - 4*86400000).toISOString() },
-            { value: 86, timestamp: new Date(Date.now() - 3*86400000).toISOString() },
-            { value: 88, timestamp: new Date(Date.now() - 2*86400000).toISOString() },
-            { value: 87, timestamp: new Date(Date.now() - 86400000).toISOString() }
-          ]
-        }
-      },
-      {
-        id: "ea3",
-        name: "EA Breakout Master",
+    const response = await zmqClient.getEAMetrics(extractId);
+    if (!response.success) {
+      throw new Error(`Falha ao obter métricas dos EAs: ${response.error || 'Erro desconhecido'}`);
+    }
+    
+    // Resultados de aderência por EA, do mais recente para o mais antigo
+    const adherenceByEA = {};
+    for (const result of await adherenceService.listAdherenceResults()) {
+      (adherenceByEA[result.eaId] = adherenceByEA[result.eaId] || []).push(result);
+    }
+    
+    return Object.entries(response.eas).map(([eaId, metrics]) => {
+      const adherence = adherenceByEA[eaId] || [];
+      const latest = adherence[0];
+      
+      return {
+        id: eaId,
+        name: eaId === 'unknown' ? 'Não classificado' : `EA ${eaId}`,
+        extractId: response.extract_id,
         metrics: {
-          adherenceRate: 76,
-          operations: 870,
-          slippage: 0.31,
-          lastUpdate: new Date().toISOString(),
-          trend: [
-            { value: 78, timestamp: new Date(Date.now() - 5*86400000).toISOString() },
-            { value: 75, timestamp: new Date(Date.now() - 4*86400000).toISOString() },
-            { value: 74, timestamp: new Date(Date.now() - 3*86400000).toISOString() },
-            { value: 73, timestamp: new Date(Date.now() - 2*86400000).toISOString() },
-            { value: 76, timestamp: new Date(Date.now() - 86400000).toISOString() }
-          ]
+          adherenceRate: latest ? latest.adherenceRate : null,
+          slippage: latest ? latest.slippageAvg : null,
+          operations: metrics.trades,
+          netProfit: metrics.net_profit,
+          profitFactor: metrics.profit_factor,
+          winRate: metrics.win_rate,
+          expectancy: metrics.expectancy,
+          maxDrawdown: metrics.max_drawdown,
+          sharpe: metrics.sharpe,
+          sortino: metrics.sortino,
+          openPositions: metrics.open_positions,
+          lastTrade: metrics.last_trade,
+          lastUpdate: response.computed_at,
+          // Aderência dos últimos cálculos, em ordem cronológica
+          trend: adherence.slice(0, 5).reverse().map(result => ({
+            value: result.adherenceRate,
+            timestamp: result.timestamp
+          })),
+          // Curva de capital (resultado acumulado por fechamento)
+          equityCurve: metrics.equity_curve.map(point => ({
+            value: point.equity,
+            timestamp: point.time
+          }))
         }
-      }
-    ];
+      };
+    });
   }
 
   /**
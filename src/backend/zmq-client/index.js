@@ -40,9 +40,14 @@ class MT5ZMQClient {
   async _processResponse(message) {
     try {
       // Processa a resposta recebida
-      const [responseBuffer] = message;
+      const [responseBuffer, payloadBuffer] = message;
       const responseData = JSON.parse(responseBuffer.toString());
       
+      // Respostas em blocos (fetch_extraction) trazem as colunas no segundo frame
+      if (payloadBuffer) {
+        responseData.payload = JSON.parse(payloadBuffer.toString());
+      }
+      
       // Se há ID de requisição, resolve a promessa correspondente
       if (responseData.requestId && this.pendingRequests.has(responseData.requestId)) {
         const { resolve, reject, timer } = this.pendingRequests.get(responseData.requestId);
@@ -142,6 +147,24 @@ class MT5ZMQClient {
     });
   }
   
+  async extractIncremental(login = null, server = null, extractId = null, startDate = null) {
+    return this.sendRequest('extract', {
+      mode: 'incremental',
+      login,
+      server,
+      start_date: startDate,
+      extract_id: extractId
+    });
+  }
+  
+  async extractBatch(accounts, batchId = null, priority = 'nightly') {
+    return this.sendRequest('extract_batch', {
+      accounts,
+      batch_id: batchId,
+      priority
+    });
+  }
+  
   async getExtractionStatus(extractId) {
     return this.sendRequest('extract_status', {
       extract_id: extractId
@@ -154,6 +177,122 @@ class MT5ZMQClient {
     });
   }
   
+  async queryDeals({ login = null, server = null, symbols = null, eaId = null, magic = null,
+                     positionId = null, extractId = null, startDate = null, endDate = null,
+                     limit = 100, cursor = null, count = false } = {}) {
+    // Página seguinte: repassar o next_cursor da resposta anterior
+    return this.sendRequest('query_deals', {
+      login,
+      server,
+      symbols,
+      ea_id: eaId,
+      magic,
+      position_id: positionId,
+      extract_id: extractId,
+      start_date: startDate,
+      end_date: endDate,
+      limit,
+      cursor,
+      count
+    });
+  }
+
+  async *fetchExtraction(extractId, { columns = null, startDate = null, endDate = null,
+                                      symbols = null, chunkSize = 50000 } = {}) {
+    // Um crédito por requisição: cada bloco é a resposta do pedido anterior
+    let chunk = await this.sendRequest('fetch_extraction', {
+      extract_id: extractId,
+      columns,
+      start_date: startDate,
+      end_date: endDate,
+      symbols,
+      chunk_size: chunkSize,
+      credit: 1
+    });
+    
+    while (true) {
+      if (!chunk.success) {
+        throw new Error(chunk.error || 'Falha na transferência da extração');
+      }
+      
+      yield chunk.payload;
+      if (chunk.last) break;
+      
+      chunk = await this.sendRequest('fetch_credit', {
+        transfer_id: chunk.transfer_id,
+        credit: 1
+      });
+    }
+  }
+  
+  async pauseExtraction(extractId) {
+    return this.sendRequest('pause_extract', {
+      extract_id: extractId
+    });
+  }
+  
+  async resumeExtraction(extractId) {
+    return this.sendRequest('resume_extract', {
+      extract_id: extractId
+    });
+  }
+  
+  async importBacktest(filePath, eaId = null, backtestId = null) {
+    return this.sendRequest('import_backtest', {
+      file_path: filePath,
+      ea_id: eaId,
+      backtest_id: backtestId
+    });
+  }
+  
+  async calculateAdherence(eaId, extractionId, backtestId, options = {}) {
+    return this.sendRequest('adherence', {
+      ea_id: eaId,
+      extract_id: extractionId,
+      backtest_id: backtestId,
+      ...options
+    });
+  }
+  
+  async getEAMetrics(extractId = null, eaId = null, refresh = false) {
+    // Sem extractId o servidor usa a extração concluída mais recente
+    return this.sendRequest('ea_metrics', {
+      extract_id: extractId,
+      ea_id: eaId,
+      refresh
+    });
+  }
+  
+  subscribeExtraction(extractId, onEvent) {
+    // Eventos publicados pelo servidor na porta seguinte à de requisições
+    const endpoint = config.zmq.eventsEndpoint ||
+      this.endpoint.replace(/:(\d+)$/, (_, port) => `:${Number(port) + 1}`);
+    const subscriber = new zmq.Subscriber();
+    const topic = `extract:${extractId}`;
+    
+    subscriber.connect(endpoint);
+    subscriber.subscribe(topic);
+    
+    (async () => {
+      try {
+        for await (const [, payload] of subscriber) {
+          const event = JSON.parse(payload.toString());
+          // O filtro do SUB é por prefixo: descarta IDs que só começam igual
+          if (event.extract_id !== extractId) continue;
+          
+          onEvent(event);
+          if (['completed', 'error', 'cancelled'].includes(event.event)) break;
+        }
+      } catch (error) {
+        logger.error(`Erro na assinatura de eventos da extração ${extractId}: ${error.message}`);
+      } finally {
+        subscriber.close();
+      }
+    })();
+    
+    return () => subscriber.close();
+  }
+  
   async listAccounts() {
     return this.sendRequest('list_accounts');
   }
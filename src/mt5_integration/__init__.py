@@ -3,6 +3,9 @@
 # Usando importações absolutas
 from mt5adherence.mt5_integration.mt5_connector import MT5Connector
 from mt5adherence.mt5_integration.extractor import MT5Extractor
+from mt5adherence.mt5_integration.deals import DealBatch, DEAL_DTYPE
+from mt5adherence.mt5_integration.storage import get_storage, ParquetStorage, CsvStorage
+from mt5adherence.mt5_integration.classifier import EAClassifier
 from mt5adherence.mt5_integration.zmq_server import MT5ZMQServer
 from mt5adherence.mt5_integration.utils import create_directory_structure, setup_logging
 
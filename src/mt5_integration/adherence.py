@@ -0,0 +1,184 @@
+# mt5_integration/adherence.py
+
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from utils import stat_value
+
+# Configurar logger
+logger = logging.getLogger("MT5Adherence")
+
+# Constantes da API do MT5
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_ENTRY_IN = 0
+
+
+class AdherenceEngine:
+    """
+    Compara negócios reais (MT5Extractor) com negócios de backtest.
+
+    O pareamento é feito por símbolo, direção e proximidade no tempo sobre
+    dados ordenados, em O(n log n). Cada negócio de backtest é pareado com
+    no máximo um negócio real e o número de pares é o máximo possível dentro
+    da tolerância: cestas de ordens no mesmo milissegundo e sequências com
+    latência constante são pareadas por inteiro, na ordem de execução.
+    """
+
+    def __init__(self, time_tolerance=timedelta(seconds=60), entries_only=True,
+                 approval_rate=90.0):
+        """
+        Args:
+            time_tolerance (timedelta): Distância máxima entre os horários
+            entries_only (bool): Compara apenas negócios de entrada (DEAL_ENTRY_IN)
+            approval_rate (float): Taxa mínima (%) para aprovar a aderência
+        """
+        self.time_tolerance = time_tolerance
+        self.entries_only = entries_only
+        self.approval_rate = approval_rate
+
+    def compare(self, real, backtest, include_matches=False):
+        """
+        Pareia negócios reais e de backtest e calcula a aderência.
+
+        Args:
+            real (DealBatch): Negócios reais
+            backtest (DealBatch): Negócios do backtest
+            include_matches (bool): Inclui a lista de pares no resultado
+
+        Returns:
+            dict: Taxa de pareamento, não pareados de cada lado e desvios
+        """
+        real_df = self._trades(real)
+        backtest_df = self._trades(backtest)
+
+        matches = self._match(real_df, backtest_df)
+
+        matched_real = real_df["ticket"].isin(matches["real_ticket"])
+        matched_backtest = backtest_df["ticket"].isin(matches["backtest_ticket"])
+
+        # Deslizamento positivo = preço real pior que o do backtest
+        direction = np.where(matches["type"] == DEAL_TYPE_BUY, 1.0, -1.0)
+        matches["price_delta"] = matches["real_price"] - matches["backtest_price"]
+        matches["slippage"] = matches["price_delta"] * direction
+        matches["time_delta_ms"] = matches["real_time_msc"] - matches["backtest_time_msc"]
+
+        total_backtest = len(backtest_df)
+        match_rate = round(len(matches) / total_backtest * 100, 2) if total_backtest else 0.0
+
+        result = {
+            "total_real": len(real_df),
+            "total_backtest": total_backtest,
+            "matched": len(matches),
+            "match_rate": match_rate,
+            "approved": match_rate >= self.approval_rate,
+            "unmatched_real": real_df.loc[~matched_real, "ticket"].tolist(),
+            "unmatched_backtest": backtest_df.loc[~matched_backtest, "ticket"].tolist(),
+            "slippage_avg": stat_value(matches["slippage"].mean()),
+            "slippage_max": stat_value(matches["slippage"].max()),
+            "time_delta_avg_ms": stat_value(matches["time_delta_ms"].abs().mean()),
+            "time_delta_max_ms": stat_value(matches["time_delta_ms"].abs().max()),
+            "volume_delta_total": stat_value((matches["real_volume"] - matches["backtest_volume"]).sum()),
+            "time_tolerance_s": self.time_tolerance.total_seconds(),
+            "timestamp": datetime.now().isoformat()
+        }
+
+        if include_matches:
+            result["matches"] = matches[[
+                "real_ticket", "backtest_ticket", "symbol", "type",
+                "real_time_msc", "backtest_time_msc", "time_delta_ms",
+                "real_price", "backtest_price", "price_delta", "slippage"
+            ]].to_dict("records")
+
+        logger.info(f"Aderência calculada: {len(matches)}/{total_backtest} pareados ({match_rate}%)")
+        return result
+
+    def _trades(self, batch):
+        """Seleciona negócios de compra/venda (apenas entradas, se configurado)"""
+        mask = np.isin(batch["type"], [DEAL_TYPE_BUY, DEAL_TYPE_SELL])
+        if self.entries_only:
+            mask &= batch["entry"] == DEAL_ENTRY_IN
+
+        return pd.DataFrame({
+            "ticket": batch["ticket"][mask],
+            "symbol": batch["symbol"][mask].astype(object),
+            "type": batch["type"][mask],
+            "time_msc": batch["time_msc"][mask],
+            "price": batch["price"][mask],
+            "volume": batch["volume"][mask],
+        })
+
+    def _match(self, real_df, backtest_df):
+        """Pareamento um-para-um máximo por (símbolo, direção)"""
+        tolerance = int(self.time_tolerance.total_seconds() * 1000)
+        columns = ["real_ticket", "backtest_ticket", "symbol", "type",
+                   "real_time_msc", "backtest_time_msc", "real_price",
+                   "backtest_price", "real_volume", "backtest_volume"]
+
+        keys = ["symbol", "type", "time_msc", "ticket"]
+        real_df = real_df.sort_values(keys, kind="stable").reset_index(drop=True)
+        backtest_df = backtest_df.sort_values(keys, kind="stable").reset_index(drop=True)
+
+        real_groups = real_df.groupby(["symbol", "type"], sort=False).indices
+        real_times = real_df["time_msc"].to_numpy()
+        backtest_times = backtest_df["time_msc"].to_numpy()
+        real_rows, backtest_rows = [], []
+
+        for key, rows in backtest_df.groupby(["symbol", "type"], sort=False).indices.items():
+            candidates = real_groups.get(key)
+            if candidates is None:
+                continue
+            i, j = _pair(real_times[candidates], backtest_times[rows], tolerance)
+            real_rows.append(candidates[i])
+            backtest_rows.append(rows[j])
+
+        if not real_rows:
+            return pd.DataFrame({name: pd.Series(dtype=np.float64) for name in columns})
+
+        real = real_df.iloc[np.concatenate(real_rows)].reset_index(drop=True)
+        backtest = backtest_df.iloc[np.concatenate(backtest_rows)].reset_index(drop=True)
+        return pd.DataFrame({
+            "real_ticket": real["ticket"],
+            "backtest_ticket": backtest["ticket"],
+            "symbol": real["symbol"],
+            "type": real["type"],
+            "real_time_msc": real["time_msc"],
+            "backtest_time_msc": backtest["time_msc"],
+            "real_price": real["price"],
+            "backtest_price": backtest["price"],
+            "real_volume": real["volume"],
+            "backtest_volume": backtest["volume"]
+        })
+
+
+def _pair(real_times, backtest_times, tolerance):
+    """
+    Pareamento máximo entre dois horários ordenados com |real - backtest|
+    dentro da tolerância: o negócio mais antigo de um lado que não alcança o
+    mais antigo do outro não alcança nenhum posterior e é descartado; do
+    contrário os dois formam um par. Guloso em O(n), ótimo em número de pares.
+
+    Returns:
+        tuple: Índices pareados em real_times e em backtest_times
+    """
+    real_times = real_times.tolist()
+    backtest_times = backtest_times.tolist()
+    real_index, backtest_index = [], []
+    i = j = 0
+
+    while i < len(real_times) and j < len(backtest_times):
+        delta = real_times[i] - backtest_times[j]
+        if delta < -tolerance:
+            i += 1
+        elif delta > tolerance:
+            j += 1
+        else:
+            real_index.append(i)
+            backtest_index.append(j)
+            i += 1
+            j += 1
+
+    return np.array(real_index, dtype=np.int64), np.array(backtest_index, dtype=np.int64)
@@ -0,0 +1,372 @@
+# mt5_integration/backtest_import.py
+
+import csv
+import json
+import logging
+import xml.etree.ElementTree as ET
+from collections import deque
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from deals import DealBatch, DEAL_DTYPE
+from storage import get_storage
+
+# Configurar logger
+logger = logging.getLogger("BacktestImport")
+
+# Títulos da seção de negócios no relatório do Strategy Tester (en/pt)
+SECTION_TITLES = ("deals", "negócios", "ofertas", "transações")
+
+# Cabeçalhos aceitos para cada campo do DEAL_DTYPE (en/pt)
+COLUMN_ALIASES = {
+    "time": ("time", "horário", "hora", "data/hora"),
+    "ticket": ("deal", "negócio", "oferta", "ticket"),
+    "symbol": ("symbol", "símbolo", "ativo"),
+    "type": ("type", "tipo"),
+    "entry": ("direction", "direção", "entry"),
+    "volume": ("volume",),
+    "price": ("price", "preço"),
+    "order": ("order", "ordem"),
+    "commission": ("commission", "comissão"),
+    "swap": ("swap",),
+    "profit": ("profit", "lucro"),
+    "comment": ("comment", "comentário"),
+    "magic": ("magic",),
+    "position_id": ("position", "posição", "position_id"),
+}
+
+DEAL_TYPES = {
+    "buy": 0, "sell": 1, "balance": 2, "credit": 3, "charge": 4,
+    "correction": 5, "bonus": 6, "commission": 7,
+    "compra": 0, "venda": 1, "saldo": 2, "crédito": 3,
+}
+
+DEAL_ENTRIES = {
+    "in": 0, "out": 1, "in/out": 2, "out by": 3,
+    "entrada": 0, "saída": 1, "entrada/saída": 2,
+}
+
+READ_CHUNK = 1 << 20
+
+
+class BacktestImporter:
+    """
+    Importa relatórios do Strategy Tester do MT5 (HTML, XML ou CSV de
+    negócios) para o mesmo esquema colunar da extração.
+
+    Os arquivos são lidos em fluxo: apenas a linha corrente e um lote de até
+    batch_size negócios ficam em memória antes de ir para o storage.
+    """
+
+    def __init__(self, data_dir="./data", storage_format="parquet", batch_size=50000):
+        self.data_dir = Path(data_dir)
+        self.backtests_dir = self.data_dir / "raw" / "backtests"
+        self.storage = get_storage(self.backtests_dir, storage_format)
+        self.batch_size = batch_size
+
+    def import_file(self, file_path, backtest_id=None, ea_id=None, file_format=None):
+        """
+        Importa um relatório para data/raw/backtests.
+
+        Args:
+            file_path (str): Caminho do relatório
+            backtest_id (str, optional): ID do backtest (gerado se omitido)
+            ea_id (str, optional): EA ao qual o backtest pertence
+            file_format (str, optional): html, xml ou csv (detectado se omitido)
+
+        Returns:
+            dict: Resultado da importação com metadados
+        """
+        file_path = Path(file_path)
+        file_format = file_format or detect_format(file_path)
+        backtest_id = backtest_id or f"backtest_{ea_id or 'ea'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+        logger.info(f"Importando backtest {backtest_id} de {file_path} ({file_format})")
+
+        writer = self.storage.open_writer(backtest_id)
+        total = 0
+        first_time = last_time = None
+
+        try:
+            for batch in self.iter_batches(file_path, file_format):
+                writer.write(batch)
+                total += len(batch)
+
+                times = batch["time_msc"]
+                first_time = int(times.min()) if first_time is None else min(first_time, int(times.min()))
+                last_time = int(times.max()) if last_time is None else max(last_time, int(times.max()))
+
+            writer.commit()
+        except Exception as e:
+            writer.abort()
+            logger.exception(f"Erro ao importar backtest: {str(e)}")
+            return {
+                "success": False,
+                "error": str(e),
+                "metadata": None
+            }
+
+        metadata = {
+            "backtest_id": backtest_id,
+            "ea_id": ea_id,
+            "source_file": file_path.name,
+            "source_format": file_format,
+            "total_operations": total,
+            "first_time_msc": first_time,
+            "last_time_msc": last_time,
+            "storage_format": self.storage.format_name,
+            "operations_file": self.storage.path(backtest_id).name,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        with open(self.backtests_dir / f"{backtest_id}_metadata.json", 'w') as f:
+            json.dump(metadata, f, indent=2)
+
+        logger.info(f"Backtest {backtest_id} importado: {total} negócios")
+        return {
+            "success": True,
+            "metadata": metadata
+        }
+
+    def iter_batches(self, file_path, file_format=None):
+        """Percorre o relatório produzindo DealBatch de até batch_size negócios"""
+        file_format = file_format or detect_format(file_path)
+
+        if file_format == "csv":
+            rows = _iter_csv_rows(file_path)
+        elif file_format == "xml":
+            rows = _iter_xml_rows(file_path)
+        elif file_format == "html":
+            rows = _iter_html_rows(file_path)
+        else:
+            raise ValueError(f"Formato de relatório desconhecido: {file_format}")
+
+        # Relatórios têm várias seções; o CSV de negócios começa no cabeçalho
+        columns = _DealColumns(require_section=file_format != "csv")
+
+        for row in rows:
+            columns.add_row(row)
+            if len(columns) >= self.batch_size:
+                yield columns.flush()
+
+        if len(columns):
+            yield columns.flush()
+
+
+def detect_format(file_path):
+    """Detecta o formato do relatório pela extensão ou, em último caso, pelo conteúdo"""
+    suffix = Path(file_path).suffix.lower()
+    if suffix in (".htm", ".html"):
+        return "html"
+    if suffix == ".xml":
+        return "xml"
+    if suffix in (".csv", ".txt"):
+        return "csv"
+
+    with open(file_path, 'r', encoding=_detect_encoding(file_path), errors="replace") as f:
+        head = f.read(4096).lower()
+    if "<workbook" in head or "<?xml" in head:
+        return "xml"
+    if "<html" in head or "<table" in head:
+        return "html"
+    return "csv"
+
+
+def _detect_encoding(file_path):
+    """Relatórios do MT5 costumam ser UTF-16 com BOM"""
+    with open(file_path, 'rb') as f:
+        bom = f.read(4)
+    if bom.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return "utf-16"
+    if bom.startswith(b"\xef\xbb\xbf"):
+        return "utf-8-sig"
+    return "utf-8"
+
+
+def _iter_csv_rows(file_path):
+    with open(file_path, 'r', encoding=_detect_encoding(file_path), errors="replace", newline='') as f:
+        sample = f.read(8192)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        yield from csv.reader(f, dialect)
+
+
+def _iter_xml_rows(file_path):
+    """Linhas de uma planilha SpreadsheetML, liberando cada elemento após o uso"""
+    context = ET.iterparse(str(file_path), events=("start", "end"))
+    table = None
+
+    for event, elem in context:
+        if event == "start":
+            if elem.tag.endswith("Table"):
+                table = elem
+            continue
+        if not elem.tag.endswith("Row"):
+            continue
+
+        row = []
+        for cell in elem:
+            if not cell.tag.endswith("Cell"):
+                continue
+            # ss:Index pula células vazias
+            index = next((v for k, v in cell.attrib.items() if k.endswith("Index")), None)
+            if index is not None:
+                row.extend([""] * (int(index) - 1 - len(row)))
+            data = next((child for child in cell if child.tag.endswith("Data")), None)
+            row.append((data.text or "").strip() if data is not None else "")
+
+        yield row
+
+        # Remove a linha já lida da árvore para manter a memória constante
+        elem.clear()
+        if table is not None and len(table) and table[-1] is elem:
+            del table[-1]
+
+
+def _iter_html_rows(file_path):
+    """Linhas de tabela de um relatório HTML, lido em blocos"""
+    parser = _HTMLRowParser()
+
+    with open(file_path, 'r', encoding=_detect_encoding(file_path), errors="replace") as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                break
+            parser.feed(chunk)
+            while parser.rows:
+                yield parser.rows.popleft()
+
+    parser.close()
+    while parser.rows:
+        yield parser.rows.popleft()
+
+
+class _HTMLRowParser(HTMLParser):
+    """Converte <tr>/<td> em listas de textos à medida que o HTML é recebido"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = deque()
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "tr":
+            self._close_row()
+            self._row = []
+        elif tag in ("td", "th") and self._row is not None:
+            self._close_cell()
+            self._cell = []
+
+    def handle_endtag(self, tag):
+        if tag in ("td", "th"):
+            self._close_cell()
+        elif tag in ("tr", "table"):
+            self._close_row()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+
+    def _close_cell(self):
+        if self._cell is not None and self._row is not None:
+            self._row.append("".join(self._cell).strip())
+        self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._row is not None:
+            self.rows.append(self._row)
+        self._row = None
+
+
+class _DealColumns:
+    """
+    Acumula colunas de texto da seção de negócios e as converte em lote
+    para DEAL_DTYPE, de forma vetorizada.
+    """
+
+    def __init__(self, require_section):
+        self.in_section = not require_section
+        self.index = None
+        self.values = {}
+
+    def __len__(self):
+        return len(self.values.get("ticket", ()))
+
+    def add_row(self, row):
+        cells = [c for c in row if c]
+        if not cells:
+            return
+
+        # Título de seção: entra na seção de negócios ou encerra a leitura dela
+        if len(cells) == 1:
+            if cells[0].lower() in SECTION_TITLES:
+                self.in_section = True
+                self.index = None
+            elif self.index is not None:
+                self.in_section = False
+                self.index = None
+            return
+
+        if not self.in_section:
+            return
+
+        if self.index is None:
+            self._read_header(row)
+            return
+
+        # Linhas sem ticket numérico (totais, rodapés) são ignoradas
+        ticket_pos = self.index["ticket"]
+        if ticket_pos >= len(row) or not row[ticket_pos].strip().isdigit():
+            return
+
+        for field, pos in self.index.items():
+            self.values[field].append(row[pos] if pos < len(row) else "")
+
+    def _read_header(self, row):
+        header = [cell.strip().lower() for cell in row]
+        index = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for pos, name in enumerate(header):
+                if name in aliases:
+                    index[field] = pos
+                    break
+
+        if "ticket" in index and "time" in index:
+            self.index = index
+            self.values = {field: [] for field in index}
+
+    def flush(self):
+        """Converte as colunas acumuladas em DealBatch e esvazia o acumulador"""
+        count = len(self)
+        records = np.zeros(count, dtype=DEAL_DTYPE)
+
+        for field, raw in self.values.items():
+            column = pd.Series(raw, dtype=object).str.strip()
+
+            if field == "time":
+                # "2024.01.02 10:15:30[.123]" -> formato ISO
+                parsed = pd.to_datetime(column.str.replace(".", "-", n=2), errors="coerce")
+                time_msc = parsed.to_numpy(dtype="datetime64[ms]").astype(np.int64)
+                records["time_msc"] = np.where(parsed.isna().to_numpy(), 0, time_msc)
+                records["time"] = records["time_msc"] // 1000
+            elif field == "type":
+                records["type"] = column.str.lower().map(DEAL_TYPES).fillna(-1).to_numpy()
+            elif field == "entry":
+                records["entry"] = column.str.lower().map(DEAL_ENTRIES).fillna(0).to_numpy()
+            elif DEAL_DTYPE[field].kind == "U":
+                records[field] = column.fillna("").to_numpy()
+            else:
+                cleaned = column.str.replace(r"\s", "", regex=True)
+                records[field] = pd.to_numeric(cleaned, errors="coerce").fillna(0).to_numpy()
+
+        self.values = {field: [] for field in self.values}
+        return DealBatch(records)
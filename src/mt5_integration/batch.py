@@ -0,0 +1,173 @@
+# mt5_integration/batch.py
+
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from terminal_pool import TerminalPool
+
+# Configurar logger
+logger = logging.getLogger("MT5Batch")
+
+
+class BatchExtractor:
+    """
+    Extração incremental de várias contas em paralelo.
+
+    As contas são distribuídas entre os processos de terminal do
+    TerminalPool: cada conta com terminal próprio vai para ele e as demais
+    são repartidas entre os terminais com menos contas, que trocam de login
+    entre uma conta e outra. Cada terminal processa sua fila em sequência e
+    os terminais trabalham ao mesmo tempo. O resultado de cada conta é
+    incorporado ao conjunto de dados da conta (data/raw/accounts), como em
+    MT5Extractor.extract_incremental.
+    """
+
+    def __init__(self, pool, data_dir="./data"):
+        """
+        Args:
+            pool (TerminalPool): Terminais disponíveis
+            data_dir (str): Diretório de dados (resumos em processed/batches)
+        """
+        if not len(pool):
+            raise ValueError("Nenhum terminal disponível para extração em lote")
+        self.pool = pool
+        self.batches_dir = Path(data_dir) / "processed" / "batches"
+        self.batches_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_terminals(cls, terminals, data_dir="./data", storage_format="parquet"):
+        return cls(TerminalPool(terminals, data_dir, storage_format), data_dir)
+
+    def shard(self, accounts):
+        """
+        Distribui as contas entre os terminais.
+
+        Returns:
+            dict: login do terminal -> lista de contas
+        """
+        shards = {login: [] for login in self.pool.workers}
+
+        # Contas com terminal próprio primeiro, para equilibrar o restante
+        others = []
+        for account in accounts:
+            if self.pool.has(account["login"]):
+                shards[int(account["login"])].append(account)
+            else:
+                others.append(account)
+
+        for account in others:
+            target = min(shards, key=lambda login: len(shards[login]))
+            shards[target].append(account)
+
+        return {login: shard for login, shard in shards.items() if shard}
+
+    def run(self, accounts, batch_id=None, callback=None):
+        """
+        Extrai as contas e consolida o resultado.
+
+        Args:
+            accounts (list): Contas {login, server, password (opcional),
+                start_date (datetime, usada se a conta não tem watermark),
+                end_date (datetime, opcional)}
+            batch_id (str, optional): ID do lote
+            callback (callable, optional): (login, progress, total, processed,
+                message) -> bool; False interrompe a conta em andamento
+
+        Returns:
+            dict: Resumo com contas concluídas, falhas e vazão agregada
+        """
+        batch_id = batch_id or f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        shards = self.shard(accounts)
+        logger.info(f"Lote {batch_id}: {len(accounts)} contas em {len(shards)} terminais")
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(shards) or 1,
+                                thread_name_prefix="mt5-batch") as executor:
+            futures = [executor.submit(self._run_shard, batch_id, terminal, shard, callback)
+                       for terminal, shard in shards.items()]
+            results = [r for future in futures for r in future.result()]
+        elapsed = time.monotonic() - started
+
+        failures = [r for r in results if not r["success"]]
+        new_operations = sum(r["new_operations"] for r in results)
+        fetched = sum(r["operations"] for r in results)
+
+        summary = {
+            "batch_id": batch_id,
+            "accounts": len(accounts),
+            "succeeded": len(results) - len(failures),
+            "failed": len(failures),
+            "failures": [{k: r[k] for k in ("login", "server", "error")} for r in failures],
+            "operations": fetched,
+            "new_operations": new_operations,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_ops_s": round(fetched / elapsed, 1) if elapsed else None,
+            "terminals": len(shards),
+            "results": results,
+            "timestamp": datetime.now().isoformat()
+        }
+
+        with open(self.batches_dir / f"{batch_id}.json", 'w') as f:
+            json.dump(summary, f, indent=2)
+
+        logger.info(f"Lote {batch_id} concluído: {summary['succeeded']}/{len(accounts)} contas, "
+                    f"{fetched} operações em {elapsed:.1f}s")
+        return summary
+
+    def close(self):
+        self.pool.stop()
+
+    def _run_shard(self, batch_id, terminal, shard, callback):
+        """Processa em sequência as contas atribuídas a um terminal"""
+        worker = self.pool.workers[terminal]
+        results = []
+
+        for account in shard:
+            login = int(account["login"])
+            server = account.get("server")
+            started = time.monotonic()
+
+            def progress(progress, total, processed, message):
+                return callback(login, progress, total, processed, message) if callback else True
+
+            try:
+                result = self.pool.extract(
+                    login,
+                    worker=worker,
+                    callback=progress,
+                    mode="incremental",
+                    server=server,
+                    password=account.get("password"),
+                    start_date=account.get("start_date"),
+                    end_date=account.get("end_date"),
+                    extract_id=f"{batch_id}_{server}_{login}"
+                )
+            except Exception as e:
+                result = {"success": False, "error": str(e), "metadata": None}
+
+            metadata = result.get("metadata") or {}
+            results.append({
+                "login": login,
+                "server": server,
+                "terminal": terminal,
+                "success": result["success"],
+                "cancelled": bool(result.get("cancelled")),
+                "error": result.get("error"),
+                "extract_id": metadata.get("extract_id"),
+                "operations": metadata.get("total_operations", 0),
+                "new_operations": metadata.get("new_operations", 0),
+                "elapsed_s": round(time.monotonic() - started, 3)
+            })
+
+            if result.get("cancelled"):
+                logger.info(f"Lote {batch_id} interrompido na conta {login}")
+                break
+
+            if not result["success"]:
+                logger.error(f"Lote {batch_id}: conta {login} falhou: {result.get('error')}")
+
+        return results
@@ -0,0 +1,121 @@
+# mt5_integration/classifier.py
+
+import re
+import threading
+
+import numpy as np
+
+# Padrão legado: comentário no formato EA_[NOME]_[ID] (terceiro trecho separado por "_")
+DEFAULT_COMMENT_PATTERNS = [r"^(?=.*EA_)[^_]*_[^_]*_([^_]*)"]
+
+
+class EAClassifier:
+    """
+    Classificador vetorizado de negócios por EA.
+
+    Primeiro consulta o campo magic em uma tabela de busca pré-compilada
+    (chaves ordenadas + searchsorted); os negócios sem correspondência caem
+    para os padrões de comentário, avaliados uma única vez por comentário
+    distinto.
+
+    Uma instância é compartilhada pelos estágios de classificação de
+    extrações simultâneas; códigos de EAs novos são atribuídos sob trava.
+    """
+
+    def __init__(self, magic_map=None, comment_patterns=None, default="unknown"):
+        """
+        Args:
+            magic_map (dict, optional): magic -> ID do EA
+            comment_patterns (list, optional): Expressões regulares cujo
+                primeiro grupo é o ID do EA (padrão: formato EA_[NOME]_[ID])
+            default (str): ID atribuído a negócios não classificados
+        """
+        self.default = default
+        self.labels = [default]
+        self._label_codes = {default: 0}
+        self._lock = threading.Lock()
+
+        # Tabela de busca do magic (chaves podem vir como texto de um JSON)
+        magic_map = {int(magic): str(ea_id) for magic, ea_id in (magic_map or {}).items()}
+        keys = sorted(magic_map)
+        self._magic_keys = np.array(keys, dtype=np.int64)
+        self._magic_codes = np.array([self._code(magic_map[k]) for k in keys], dtype=np.int32)
+
+        patterns = DEFAULT_COMMENT_PATTERNS if comment_patterns is None else comment_patterns
+        self.comment_patterns = [re.compile(p) for p in patterns]
+
+    @classmethod
+    def from_config(cls, config):
+        """Cria classificador a partir de um dicionário de configuração"""
+        return cls(
+            magic_map=config.get("magic_map"),
+            comment_patterns=config.get("comment_patterns"),
+            default=config.get("default", "unknown")
+        )
+
+    def classify(self, batch):
+        """
+        Classifica cada negócio do lote.
+
+        Args:
+            batch (DealBatch): Negócios a classificar
+
+        Returns:
+            np.ndarray: Código do EA de cada negócio (índice em self.labels)
+        """
+        codes = np.zeros(len(batch), dtype=np.int32)
+        if not len(batch):
+            return codes
+
+        # 1) Tabela de magic numbers
+        unmatched = np.ones(len(batch), dtype=bool)
+        if len(self._magic_keys):
+            magic = batch["magic"]
+            pos = np.searchsorted(self._magic_keys, magic)
+            pos[pos == len(self._magic_keys)] = 0
+            found = self._magic_keys[pos] == magic
+            codes[found] = self._magic_codes[pos[found]]
+            unmatched = ~found
+
+        # 2) Padrões de comentário, aplicados a cada comentário distinto
+        if self.comment_patterns and unmatched.any():
+            comments, inverse = np.unique(batch["comment"][unmatched], return_inverse=True)
+            comment_codes = np.array([self._match_comment(c) for c in comments.tolist()],
+                                     dtype=np.int32)
+            codes[unmatched] = comment_codes[inverse.ravel()]
+
+        return codes
+
+    def group(self, batch):
+        """
+        Agrupa os negócios do lote por EA.
+
+        Returns:
+            dict: ID do EA -> array de índices dos negócios no lote
+        """
+        codes = self.classify(batch)
+        order = np.argsort(codes, kind="stable")
+        present, starts = np.unique(codes[order], return_index=True)
+        groups = np.split(order, starts[1:])
+        return {self.labels[code]: indices for code, indices in zip(present.tolist(), groups)}
+
+    def _match_comment(self, comment):
+        for pattern in self.comment_patterns:
+            match = pattern.search(comment)
+            if match:
+                return self._code(match.group(1) if match.groups() else match.group(0))
+        return 0
+
+    def _code(self, label):
+        code = self._label_codes.get(label)
+        if code is not None:
+            return code
+
+        with self._lock:
+            code = self._label_codes.get(label)
+            if code is None:
+                # labels recebe o rótulo antes de o código ficar visível
+                code = len(self.labels)
+                self.labels.append(label)
+                self._label_codes[label] = code
+        return code
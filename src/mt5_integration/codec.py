@@ -0,0 +1,147 @@
+# mt5_integration/codec.py
+
+import base64
+import json
+from collections.abc import Mapping
+from datetime import date, datetime, timezone
+
+import numpy as np
+
+try:
+    import msgpack
+except ImportError:  # MessagePack é opcional: sem ele só JSON é oferecido
+    msgpack = None
+
+from deals import DealBatch
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+# Tipo de extensão MessagePack para arrays NumPy não estruturados
+EXT_NDARRAY = 1
+
+
+def available_codecs():
+    """Codecs suportados por esta instalação"""
+    return [JSON, MSGPACK] if msgpack is not None else [JSON]
+
+
+def detect_codec(body):
+    """
+    Identifica o codec de um corpo recebido.
+
+    Requisições JSON são sempre objetos (começam com "{", possivelmente após
+    espaços); um mapa MessagePack começa com 0x80-0x8f, 0xde ou 0xdf.
+    """
+    head = body.lstrip()[:1]
+    if head == b"{" or msgpack is None:
+        return JSON
+    if head and (0x80 <= head[0] <= 0x8f or head[0] in (0xde, 0xdf)):
+        return MSGPACK
+    return JSON
+
+
+def decode(body):
+    """
+    Decodifica uma requisição.
+
+    Returns:
+        tuple: (mensagem, codec em que ela chegou)
+    """
+    codec = detect_codec(body)
+    if codec == MSGPACK:
+        return msgpack.unpackb(body, ext_hook=_ext_hook, timestamp=3), MSGPACK
+    return json.loads(body), JSON
+
+
+def negotiate(message, request_codec):
+    """
+    Codec da resposta: o campo "codec" da mensagem, se suportado, ou o
+    mesmo codec da requisição.
+    """
+    requested = message.get("codec") if isinstance(message, dict) else None
+    return requested if requested in available_codecs() else request_codec
+
+
+def to_datetime(value):
+    """
+    Converte uma data recebida em requisição para datetime sem fuso (UTC).
+
+    Aceita string ISO 8601 (JSON) ou datetime (timestamp nativo do
+    MessagePack, que chega com fuso); datas com fuso são convertidas para
+    UTC. Vazio ou None resulta em None.
+    """
+    if value is None or value == "":
+        return None
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode(obj, codec=JSON):
+    """Serializa obj no codec indicado"""
+    if codec == MSGPACK and msgpack is not None:
+        return msgpack.packb(obj, default=_msgpack_default, datetime=True)
+    return json.dumps(obj, default=_json_default).encode("utf-8")
+
+
+def _json_default(obj):
+    """Tipos que o json da biblioteca padrão não serializa"""
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, DealBatch):
+        return obj.to_records()
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.names:
+            return [dict(zip(obj.dtype.names, row)) for row in obj.tolist()]
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(obj)).decode("ascii")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj):
+    """Tipos sem representação direta em MessagePack"""
+    if isinstance(obj, datetime):
+        # Datetimes ingênuos seguem a convenção de deals.to_msc (UTC)
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, DealBatch):
+        obj = obj.records
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.names:
+            # Arrays estruturados viram um mapa de colunas
+            return {name: np.ascontiguousarray(obj[name]) for name in obj.dtype.names}
+        if obj.dtype.kind in "biuf":
+            array = np.ascontiguousarray(obj)
+            header = msgpack.packb([array.dtype.str, list(array.shape)])
+            return msgpack.ExtType(EXT_NDARRAY, header + array.tobytes())
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not MessagePack serializable")
+
+
+def _ext_hook(code, data):
+    if code == EXT_NDARRAY:
+        unpacker = msgpack.Unpacker()
+        unpacker.feed(data)
+        dtype, shape = next(unpacker)
+        offset = unpacker.tell()
+        return np.frombuffer(data, dtype=np.dtype(dtype), offset=offset).reshape(shape)
+    return msgpack.ExtType(code, data)
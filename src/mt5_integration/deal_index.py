@@ -0,0 +1,225 @@
+# mt5_integration/deal_index.py
+
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+from deals import DEAL_FIELDS, to_msc
+
+# Configurar logger
+logger = logging.getLogger("MT5DealIndex")
+
+# Colunas da tabela: campos do negócio ("order" é palavra reservada do SQL)
+# seguidos da conta, do EA classificado e da extração de origem
+_DEAL_COLUMNS = [f'"{name}"' if name == "order" else name for name in DEAL_FIELDS]
+_COLUMNS = ["server", "login"] + _DEAL_COLUMNS + ["ea_id", "extract_id"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deals (
+    server TEXT NOT NULL,
+    login INTEGER NOT NULL,
+    ticket INTEGER NOT NULL,
+    "order" INTEGER,
+    time INTEGER,
+    time_msc INTEGER NOT NULL,
+    type INTEGER,
+    entry INTEGER,
+    magic INTEGER,
+    position_id INTEGER,
+    reason INTEGER,
+    volume REAL,
+    price REAL,
+    commission REAL,
+    swap REAL,
+    profit REAL,
+    fee REAL,
+    symbol TEXT,
+    comment TEXT,
+    external_id TEXT,
+    ea_id TEXT,
+    extract_id TEXT NOT NULL,
+    UNIQUE (server, login, ticket)
+);
+CREATE INDEX IF NOT EXISTS deals_time ON deals (time_msc);
+CREATE INDEX IF NOT EXISTS deals_symbol ON deals (symbol, time_msc);
+CREATE INDEX IF NOT EXISTS deals_ea ON deals (ea_id, symbol, time_msc);
+CREATE INDEX IF NOT EXISTS deals_magic ON deals (magic, time_msc);
+CREATE INDEX IF NOT EXISTS deals_account ON deals (server, login, time_msc);
+CREATE INDEX IF NOT EXISTS deals_extract ON deals (extract_id);
+CREATE TABLE IF NOT EXISTS extractions (
+    extract_id TEXT PRIMARY KEY,
+    server TEXT NOT NULL,
+    login INTEGER NOT NULL,
+    deals INTEGER NOT NULL,
+    indexed_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Filtros de igualdade aceitos por query (nome do parâmetro -> coluna)
+_EQUALITY_FILTERS = {
+    "login": "login",
+    "server": "server",
+    "ea_id": "ea_id",
+    "magic": "magic",
+    "position_id": "position_id",
+    "extract_id": "extract_id"
+}
+
+
+class DealIndex:
+    """
+    Índice SQLite dos negócios de todas as extrações.
+
+    Cada negócio aparece uma vez por conta (servidor, login e ticket), com o
+    EA atribuído pelo classificador e a extração em que foi visto primeiro.
+    Os índices por tempo, símbolo, EA, magic e conta respondem consultas
+    filtradas sem abrir os arquivos de operações; a paginação é por cursor
+    (time_msc, id), de modo que cada página custa o mesmo que a primeira.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Arquivo do banco SQLite
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        """Conexão da thread atual (WAL: leituras não bloqueiam a gravação)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Fecha a conexão da thread atual"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def is_indexed(self, extract_id):
+        row = self._connection().execute(
+            "SELECT 1 FROM extractions WHERE extract_id = ?", (extract_id,)).fetchone()
+        return row is not None
+
+    def index_extraction(self, extract_id, batches, classifier, login=None, server=None):
+        """
+        Indexa os negócios de uma extração em uma única transação.
+
+        Negócios já indexados para a mesma conta (mesmo ticket) são mantidos,
+        então reindexar uma extração ou extrações sobrepostas não duplica.
+
+        Args:
+            extract_id (str): ID da extração
+            batches (iterable): Lotes (DealBatch) da extração
+            classifier (EAClassifier): Atribui o EA de cada negócio
+            login (int, optional): Conta da extração
+            server (str, optional): Servidor da conta
+
+        Returns:
+            int: Negócios novos no índice
+        """
+        login = int(login or 0)
+        server = server or ""
+        placeholders = ", ".join("?" * len(_COLUMNS))
+        insert = f"INSERT OR IGNORE INTO deals ({', '.join(_COLUMNS)}) VALUES ({placeholders})"
+
+        conn = self._connection()
+        total = added = 0
+        with conn:
+            for batch in batches:
+                if not len(batch):
+                    continue
+                labels = classifier.labels
+                ea_ids = [labels[code] for code in classifier.classify(batch).tolist()]
+                rows = [(server, login) + deal + (ea_id, extract_id)
+                        for deal, ea_id in zip(batch.records.tolist(), ea_ids)]
+                before = conn.total_changes
+                conn.executemany(insert, rows)
+                added += conn.total_changes - before
+                total += len(rows)
+
+            conn.execute(
+                "INSERT OR REPLACE INTO extractions (extract_id, server, login, deals) VALUES (?, ?, ?, ?)",
+                (extract_id, server, login, total))
+
+        logger.info(f"Extração {extract_id} indexada: {added} novos negócios de {total}")
+        return added
+
+    def query(self, symbols=None, start=None, end=None, limit=100, cursor=None,
+              count=False, **filters):
+        """
+        Consulta negócios indexados, em ordem de tempo.
+
+        Args:
+            symbols (str | list, optional): Símbolo ou símbolos
+            start (datetime | int, optional): Início (inclusivo; int em ms)
+            end (datetime | int, optional): Fim (inclusivo; int em ms)
+            limit (int): Tamanho da página (máximo 10000)
+            cursor (str, optional): next_cursor da página anterior
+            count (bool): Inclui o total de negócios que atendem aos filtros
+            **filters: login, server, ea_id, magic, position_id, extract_id
+
+        Returns:
+            dict: deals (lista de dicionários), next_cursor (None na última
+                página) e, se pedido, total
+        """
+        unknown = set(filters) - set(_EQUALITY_FILTERS)
+        if unknown:
+            raise ValueError(f"Filtros desconhecidos: {', '.join(sorted(unknown))}")
+
+        where, params = [], []
+        for name, value in filters.items():
+            if value is not None:
+                where.append(f"{_EQUALITY_FILTERS[name]} = ?")
+                params.append(value)
+
+        if symbols:
+            symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+            where.append(f"symbol IN ({', '.join('?' * len(symbols))})")
+            params.extend(symbols)
+
+        if start is not None:
+            where.append("time_msc >= ?")
+            params.append(to_msc(start))
+        if end is not None:
+            where.append("time_msc <= ?")
+            params.append(to_msc(end))
+
+        conn = self._connection()
+        result = {}
+        if count:
+            sql = "SELECT COUNT(*) FROM deals" + (f" WHERE {' AND '.join(where)}" if where else "")
+            result["total"] = conn.execute(sql, params).fetchone()[0]
+
+        # Cursor: último (time_msc, id) entregue
+        if cursor:
+            last_time, last_id = (int(part) for part in str(cursor).split(":"))
+            where.append("(time_msc > ? OR (time_msc = ? AND rowid > ?))")
+            params.extend([last_time, last_time, last_id])
+
+        limit = max(1, min(int(limit), 10000))
+        sql = (f"SELECT rowid AS id, * FROM deals"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + " ORDER BY time_msc, rowid LIMIT ?")
+        rows = conn.execute(sql, params + [limit + 1]).fetchall()
+
+        more = len(rows) > limit
+        deals = [dict(row) for row in rows[:limit]]
+        last = deals[-1] if deals else None
+        result.update({
+            "deals": [{k: v for k, v in deal.items() if k != "id"} for deal in deals],
+            "next_cursor": f"{last['time_msc']}:{last['id']}" if more else None
+        })
+        return result
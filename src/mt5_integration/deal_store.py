@@ -0,0 +1,364 @@
+# mt5_integration/deal_store.py
+
+import json
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from deals import DealBatch, DEAL_DTYPE, to_msc
+from utils import file_lock
+
+# Configurar logger
+logger = logging.getLogger("MT5DealStore")
+
+# Arquivos de um segmento do conjunto (todos .npy de largura fixa)
+_ARRAYS = ("deals", "times", "tickets", "ticket_rows", "positions", "position_rows")
+
+
+class AccountDealStore:
+    """
+    Conjunto de dados canônico de uma conta: cada ticket aparece uma vez.
+
+    Os negócios ficam em segmentos imutáveis de arrays NumPy de largura fixa
+    (.npy) abertos com memory map, de modo que vários processos compartilham
+    as mesmas páginas e nada é interpretado ou carregado por inteiro na
+    leitura. Cada segmento (seg_NNNNNN) traz os próprios índices:
+
+    - deals: registros DEAL_DTYPE ordenados por (time_msc, ticket)
+    - times: coluna time_msc contígua (índice de tempo)
+    - tickets / ticket_rows: tickets ordenados e a linha de cada um
+    - positions / position_rows: position_id ordenados (e por tempo dentro
+      da posição) e as linhas correspondentes
+
+    Cada merge grava apenas os negócios inéditos em um novo segmento e
+    publica a lista de segmentos em MANIFEST (substituição atômica); leitores
+    continuam nos segmentos que abriram até chamar refresh(). Quando há mais
+    de max_segments, os segmentos incrementais são compactados em um só, e
+    o conjunto inteiro é regravado apenas quando eles passam de
+    compaction_ratio do segmento base. Segmentos substituídos são apagados;
+    os que ainda estiverem abertos (Windows não apaga arquivos mapeados)
+    ficam em "obsolete" e são removidos em um merge seguinte.
+
+    Os processos do TerminalPool podem incorporar negócios da mesma conta:
+    a sequência refresh → gravação do segmento → publicação do MANIFEST
+    ocorre sob uma trava de arquivo (MANIFEST.lock), além da trava entre
+    threads.
+    """
+
+    MANIFEST_FILE = "MANIFEST"
+
+    def __init__(self, base_dir, max_segments=16, compaction_ratio=0.25):
+        """
+        Args:
+            base_dir (str): Diretório da conta (data/raw/accounts/{server}_{login})
+            max_segments (int): Segmentos acumulados antes da compactação
+            compaction_ratio (float): Fração do segmento base a partir da
+                qual a compactação regrava o conjunto inteiro
+        """
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.max_segments = max_segments
+        self.compaction_ratio = compaction_ratio
+        self.generation = None
+        self._manifest = None
+        self._segments = None
+        self.lock_path = self.base_dir / f"{self.MANIFEST_FILE}.lock"
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Reabre o conjunto se outro processo publicou um MANIFEST mais novo"""
+        manifest = self._read_manifest()
+        if self._segments is None or manifest["generation"] != self.generation:
+            self._segments = [self._open(name) for name in manifest["segments"]]
+            self._manifest = manifest
+            self.generation = manifest["generation"]
+        return self
+
+    def _view(self):
+        if self._segments is None:
+            self.refresh()
+        return self._segments
+
+    @property
+    def segments(self):
+        """Segmentos abertos (dicionários de arrays em memory map)"""
+        return self._view()
+
+    @property
+    def tickets(self):
+        """Índice ordenado dos tickets presentes no conjunto (cópia)"""
+        return np.sort(np.concatenate(
+            [np.empty(0, dtype=np.int64)] + [segment["tickets"] for segment in self._view()]))
+
+    def __len__(self):
+        return sum(len(segment["deals"]) for segment in self._view())
+
+    def __contains__(self, ticket):
+        return bool(_known(self._view(), np.array([ticket], dtype=np.int64))[0])
+
+    def get(self, ticket):
+        """Negócio de um ticket (dicionário) ou None"""
+        batch = self.lookup([ticket])
+        return batch.to_records()[0] if len(batch) else None
+
+    def lookup(self, tickets):
+        """
+        Negócios de vários tickets por busca binária nos índices.
+
+        Returns:
+            DealBatch: Negócios encontrados, na ordem dos tickets informados
+        """
+        tickets = np.asarray(tickets, dtype=np.int64)
+        found = np.zeros(len(tickets), dtype=bool)
+        records = np.zeros(len(tickets), dtype=DEAL_DTYPE)
+
+        for segment in self._view():
+            pos, hit = _search(segment["tickets"], tickets)
+            records[hit] = segment["deals"][segment["ticket_rows"][pos[hit]]]
+            found |= hit
+
+        return DealBatch(records[found])
+
+    def by_position(self, position_id):
+        """Negócios de uma posição, em ordem de tempo"""
+        parts = []
+        for segment in self._view():
+            lo = np.searchsorted(segment["positions"], position_id, side="left")
+            hi = np.searchsorted(segment["positions"], position_id, side="right")
+            parts.append(segment["deals"][segment["position_rows"][lo:hi]])
+        return _chronological(parts)
+
+    def slice(self, start=None, end=None):
+        """
+        Trecho de tempo (inclusivo). Sem cópia (DealBatch sobre o memory map)
+        quando o trecho está em um único segmento.
+        """
+        start_msc, end_msc = to_msc(start), to_msc(end)
+        parts = [segment["deals"][slice(*_bounds(segment["times"], start_msc, end_msc))]
+                 for segment in self._view()]
+        parts = [part for part in parts if len(part)]
+        if len(parts) == 1:
+            return DealBatch(parts[0])
+        return _chronological(parts)
+
+    def iter_batches(self, start=None, end=None, symbols=None, batch_size=100000):
+        """
+        Percorre o conjunto em ordem de tempo, em lotes (cópias em memória),
+        aplicando os filtros. Os lotes são cortados em instantes comuns a
+        todos os segmentos, então cada um tem no máximo batch_size negócios
+        por segmento.
+        """
+        segments = self._view()
+        start_msc, end_msc = to_msc(start), to_msc(end)
+        symbols = list(symbols) if symbols else None
+
+        ranges = [_bounds(segment["times"], start_msc, end_msc) for segment in segments]
+        cuts = np.unique(np.concatenate([np.empty(0, dtype=np.int64)] + [
+            segment["times"][lo:hi:batch_size] for segment, (lo, hi) in zip(segments, ranges)]))
+        cuts = np.r_[cuts, np.iinfo(np.int64).max]
+
+        for cut_lo, cut_hi in zip(cuts[:-1], cuts[1:]):
+            parts = []
+            for segment, (lo, hi) in zip(segments, ranges):
+                times = segment["times"]
+                a = max(lo, int(np.searchsorted(times, cut_lo, side="left")))
+                b = min(hi, int(np.searchsorted(times, cut_hi, side="left")))
+                if a < b:
+                    part = segment["deals"][a:b]
+                    parts.append(part[np.isin(part["symbol"], symbols)] if symbols else part)
+            batch = _chronological(parts)
+            if len(batch):
+                yield batch
+
+    def read(self, start=None, end=None, symbols=None):
+        """Lê o conjunto (ou o trecho filtrado) para um único DealBatch"""
+        return DealBatch.concat(self.iter_batches(start, end, symbols))
+
+    def merge(self, batches):
+        """
+        Incorpora os negócios inéditos dos lotes em um novo segmento.
+
+        Args:
+            batches (iterable): Lotes (DealBatch) a incorporar
+
+        Returns:
+            dict: added, duplicates (colapsados) e newest (time_msc, ticket)
+                do negócio mais recente dos lotes, ou None se vazios
+        """
+        with self._lock, file_lock(self.lock_path):
+            self.refresh()
+            self._discard_unpublished()
+            segments = self._segments
+            seen = np.empty(0, dtype=np.int64)
+            fresh = []
+            added = duplicates = 0
+            newest = None
+
+            for batch in batches:
+                if not len(batch):
+                    continue
+
+                # Primeira ocorrência de cada ticket no lote, fora do conjunto
+                # e dos lotes anteriores deste merge
+                unique, first = np.unique(batch["ticket"], return_index=True)
+                known = _known(segments, unique) | _search(seen, unique)[1]
+                records = batch.records[np.sort(first[~known])]
+                duplicates += len(batch) - len(records)
+
+                last = np.lexsort((batch["ticket"], batch["time_msc"]))[-1]
+                candidate = (int(batch["time_msc"][last]), int(batch["ticket"][last]))
+                if newest is None or candidate > newest:
+                    newest = candidate
+
+                if len(records):
+                    fresh.append(records)
+                    seen = np.union1d(seen, unique[~known])
+                    added += len(records)
+
+            if added:
+                self._append(np.concatenate(fresh))
+
+        logger.info(f"{self.base_dir.name}: {added} negócios incorporados, "
+                    f"{duplicates} duplicados colapsados")
+        return {"added": added, "duplicates": duplicates, "newest": newest}
+
+    def _append(self, deals):
+        """Grava um segmento com os negócios novos e compacta se necessário"""
+        manifest = dict(self._manifest)
+        names = list(manifest["segments"])
+        sizes = list(manifest["sizes"])
+        removed = []
+
+        name = self._write_segment(manifest, _build(deals))
+        names.append(name)
+        sizes.append(len(deals))
+
+        if len(names) > self.max_segments:
+            # Incrementais viram um segmento; se ficarem grandes em relação
+            # ao base, o conjunto inteiro é regravado
+            keep = 1 if sum(sizes[1:]) < self.compaction_ratio * sizes[0] else 0
+            merged = np.concatenate([self._open(old)["deals"] for old in names[keep:]])
+            removed = names[keep:]
+            names = names[:keep] + [self._write_segment(manifest, _build(merged))]
+            sizes = sizes[:keep] + [len(merged)]
+            logger.info(f"{self.base_dir.name}: {len(removed)} segmentos compactados")
+
+        manifest.update({
+            "generation": manifest["generation"] + 1,
+            "segments": names,
+            "sizes": sizes,
+            "obsolete": manifest["obsolete"] + removed
+        })
+        self._publish(manifest)
+
+    def _write_segment(self, manifest, arrays):
+        """Grava os arrays em um novo diretório de segmento (ainda não publicado)"""
+        name = f"seg_{manifest['next_segment']:06d}"
+        manifest["next_segment"] += 1
+
+        # Sob a trava nenhum outro processo grava segmentos: um diretório
+        # existente indica MANIFEST inconsistente e não é sobrescrito
+        segment_dir = self.base_dir / name
+        segment_dir.mkdir()
+        for array in _ARRAYS:
+            np.save(segment_dir / f"{array}.npy", arrays[array])
+        return name
+
+    def _discard_unpublished(self):
+        """Apaga segmentos de um merge interrompido antes da publicação"""
+        for segment_dir in self.base_dir.glob("seg_*"):
+            try:
+                number = int(segment_dir.name[4:])
+            except ValueError:
+                continue
+            if number >= self._manifest["next_segment"]:
+                logger.warning(f"{self.base_dir.name}: segmento não publicado "
+                               f"{segment_dir.name} descartado")
+                shutil.rmtree(segment_dir, ignore_errors=True)
+
+    def _publish(self, manifest):
+        """Publica o MANIFEST e apaga os segmentos que saíram dele"""
+        self._write_manifest(manifest)
+
+        # Solta os memory maps dos segmentos substituídos antes de apagá-los
+        self._segments = [self._open(name) for name in manifest["segments"]]
+        self._manifest = manifest
+        self.generation = manifest["generation"]
+
+        pending = []
+        for name in manifest["obsolete"]:
+            shutil.rmtree(self.base_dir / name, ignore_errors=True)
+            if (self.base_dir / name).exists():
+                pending.append(name)
+        if pending != manifest["obsolete"]:
+            self._manifest = dict(manifest, obsolete=pending)
+            self._write_manifest(self._manifest)
+
+    def _write_manifest(self, manifest):
+        tmp_file = self.base_dir / f"{self.MANIFEST_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, self.base_dir / self.MANIFEST_FILE)
+
+    def _read_manifest(self):
+        try:
+            with open(self.base_dir / self.MANIFEST_FILE, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"generation": 0, "segments": [], "sizes": [], "next_segment": 1, "obsolete": []}
+
+    def _open(self, name):
+        """Abre os arrays do segmento com memory map"""
+        segment_dir = self.base_dir / name
+        return {array: np.load(segment_dir / f"{array}.npy", mmap_mode="r") for array in _ARRAYS}
+
+
+def _build(deals):
+    """Ordena os registros por tempo e monta os índices de ticket e posição"""
+    deals = deals[np.lexsort((deals["ticket"], deals["time_msc"]))]
+    ticket_rows = np.argsort(deals["ticket"], kind="stable")
+    position_rows = np.argsort(deals["position_id"], kind="stable")
+    return {
+        "deals": deals,
+        "times": np.ascontiguousarray(deals["time_msc"]),
+        "tickets": deals["ticket"][ticket_rows],
+        "ticket_rows": ticket_rows,
+        "positions": deals["position_id"][position_rows],
+        "position_rows": position_rows
+    }
+
+
+def _search(sorted_values, values):
+    """Posições de values em sorted_values (searchsorted) e máscara dos encontrados"""
+    pos = np.searchsorted(sorted_values, values)
+    hit = pos < len(sorted_values)
+    hit[hit] = sorted_values[pos[hit]] == values[hit]
+    return pos, hit
+
+
+def _known(segments, tickets):
+    """Máscara dos tickets presentes em algum segmento"""
+    known = np.zeros(len(tickets), dtype=bool)
+    for segment in segments:
+        known |= _search(segment["tickets"], tickets)[1]
+    return known
+
+
+def _bounds(times, start_msc, end_msc):
+    """Linhas [lo, hi) do intervalo de tempo, por busca binária em times"""
+    lo = np.searchsorted(times, start_msc, side="left") if start_msc is not None else 0
+    hi = np.searchsorted(times, end_msc, side="right") if end_msc is not None else len(times)
+    return int(lo), int(hi)
+
+
+def _chronological(parts):
+    """Junta trechos de segmentos em um lote ordenado por (time_msc, ticket)"""
+    parts = [part for part in parts if len(part)]
+    if not parts:
+        return DealBatch()
+    deals = np.concatenate(parts)
+    return DealBatch(deals[np.lexsort((deals["ticket"], deals["time_msc"]))])
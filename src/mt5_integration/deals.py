@@ -0,0 +1,124 @@
+# mt5_integration/deals.py
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+# Layout fixo de um negócio (deal) do MT5, na mesma ordem dos campos de
+# TradeDeal retornados por mt5.history_deals_get
+DEAL_DTYPE = np.dtype([
+    ("ticket", "i8"),
+    ("order", "i8"),
+    ("time", "i8"),
+    ("time_msc", "i8"),
+    ("type", "i4"),
+    ("entry", "i4"),
+    ("magic", "i8"),
+    ("position_id", "i8"),
+    ("reason", "i4"),
+    ("volume", "f8"),
+    ("price", "f8"),
+    ("commission", "f8"),
+    ("swap", "f8"),
+    ("profit", "f8"),
+    ("fee", "f8"),
+    ("symbol", "U32"),
+    ("comment", "U32"),
+    ("external_id", "U32"),
+])
+
+DEAL_FIELDS = DEAL_DTYPE.names
+
+
+def to_msc(value):
+    """
+    Converte datetime para milissegundos desde a época (mesma base de time_msc).
+    Datetimes sem fuso são tratados como UTC, como faz a API do MT5.
+    Inteiros são considerados já em milissegundos.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+def from_msc(value):
+    """Converte milissegundos desde a época para datetime sem fuso (UTC)"""
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+
+class DealBatch:
+    """
+    Lote colunar de negócios do MT5 apoiado em um array estruturado NumPy.
+
+    É preenchido diretamente a partir do resultado da API e percorre o
+    pipeline de extração sem conversões intermediárias; dicionários por
+    linha só são montados na fronteira JSON (to_records).
+    """
+
+    def __init__(self, records=None):
+        self.records = records if records is not None else np.empty(0, dtype=DEAL_DTYPE)
+
+    @classmethod
+    def from_deals(cls, deals):
+        """Cria lote a partir das namedtuples retornadas por history_deals_get"""
+        if not deals:
+            return cls()
+
+        # Caminho rápido: campos na mesma ordem do dtype
+        if getattr(deals[0], "_fields", None) == DEAL_FIELDS:
+            return cls(np.array(list(deals), dtype=DEAL_DTYPE))
+
+        # Versões da API com campos diferentes: preenche coluna a coluna
+        records = np.zeros(len(deals), dtype=DEAL_DTYPE)
+        available = set(deals[0]._fields)
+        for name in DEAL_FIELDS:
+            if name in available:
+                records[name] = [getattr(deal, name) for deal in deals]
+        return cls(records)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Cria lote a partir de um DataFrame (ex.: CSV de extração)"""
+        records = np.zeros(len(df), dtype=DEAL_DTYPE)
+        for name in DEAL_FIELDS:
+            if name in df.columns:
+                column = df[name]
+                if records.dtype[name].kind == "U":
+                    column = column.fillna("").astype(str)
+                records[name] = column.to_numpy()
+        return cls(records)
+
+    @classmethod
+    def from_records(cls, operations):
+        """Cria lote a partir de uma lista de dicionários"""
+        return cls.from_frame(pd.DataFrame(list(operations)))
+
+    @classmethod
+    def concat(cls, batches):
+        """Concatena vários lotes em um só"""
+        arrays = [batch.records for batch in batches if len(batch)]
+        if not arrays:
+            return cls()
+        return cls(np.concatenate(arrays))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        """Nome de campo retorna a coluna; índices ou máscaras retornam um novo lote"""
+        if isinstance(key, str):
+            return self.records[key]
+        return DealBatch(np.atleast_1d(self.records[key]))
+
+    def to_records(self):
+        """Converte para lista de dicionários com tipos nativos (fronteira JSON)"""
+        return [dict(zip(DEAL_FIELDS, row)) for row in self.records.tolist()]
+
+    def to_frame(self):
+        """Converte para DataFrame"""
+        return pd.DataFrame(self.records)
@@ -1,26 +1,44 @@
 # Importações absolutas
 import MetaTrader5 as mt5
+import numpy as np
 import pandas as pd
 import logging
 import os
 import time
 import json
+import shutil
 from datetime import datetime, timedelta
 from pathlib import Path
 
 # Importar do mesmo diretório
 from mt5_connector import MT5Connector
+from deals import DealBatch, from_msc, to_msc
+from storage import get_storage
+from watermarks import WatermarkStore
+from windowing import AdaptiveWindow
+from progress import ProgressEstimator
+from classifier import EAClassifier
+from gate import mt5_gate
+from pipeline import Pipeline
+from deal_index import DealIndex
+from deal_store import AccountDealStore
+from positions import PositionTable
 
 # Configurar logger
 logger = logging.getLogger("MT5Extractor")
 
+
+class ExtractionCancelled(Exception):
+    """O callback de progresso pediu a interrupção (retornou False)"""
+
 class MT5Extractor:
     """
     Classe responsável pela extração de dados históricos do MT5
     com suporte a checkpoints e recuperação de falhas.
     """
     
-    def __init__(self, data_dir="./data"):
+    def __init__(self, data_dir="./data", storage_format="parquet", window_options=None,
+                 classifier=None, pipeline_depth=4):
         self.connector = MT5Connector()
         self.data_dir = Path(data_dir)
         self.raw_dir = self.data_dir / "raw" / "extractions"
@@ -30,24 +48,152 @@ class MT5Extractor:
         self.raw_dir.mkdir(parents=True, exist_ok=True)
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
         
+        # Backend de armazenamento das operações (Parquet por padrão)
+        self.storage_format = storage_format
+        self.storage = get_storage(self.raw_dir, storage_format)
+        
+        # Backtests importados, no mesmo formato das extrações
+        self.backtests_dir = self.data_dir / "raw" / "backtests"
+        self.backtest_storage = get_storage(self.backtests_dir, storage_format)
+        
+        # Conjuntos de dados por conta e watermarks da extração incremental
+        self.accounts_dir = self.data_dir / "raw" / "accounts"
+        self._account_stores = {}
+        self.watermarks = WatermarkStore(self.data_dir / "state" / "watermarks.json")
+        
+        # Parâmetros da janela adaptativa (initial, minimum, maximum, target_batch, max_step)
+        self.window_options = window_options or {}
+        
+        # Regras de classificação por EA (magic e comentário)
+        self.classifier = classifier or EAClassifier()
+        
+        # Janelas em trânsito entre os estágios do pipeline de extração
+        self.pipeline_depth = pipeline_depth
+        
+        # Índice consultável dos negócios de todas as extrações
+        self.deal_index = DealIndex(self.data_dir / "state" / "deals.sqlite")
+        
         logger.info(f"MT5Extractor inicializado (diretório: {self.data_dir})")
     
     def extract_history(self, start_date, end_date=None, checkpoint_size=500, 
-                       callback=None, extract_id=None):
+                       callback=None, extract_id=None, keep_operations=True,
+                       merge_account=True):
         """
         Extrai histórico de operações do MT5 com suporte a checkpoints.
         
+        Implementado sobre iter_history: as operações já são gravadas em
+        disco durante a extração e só são acumuladas em memória quando
+        keep_operations é verdadeiro.
+        
         Args:
             start_date (datetime): Data inicial para extração
             end_date (datetime, optional): Data final (padrão: data atual)
             checkpoint_size (int): Número de operações por checkpoint
             callback (callable): Função para reportar progresso
             extract_id (str): ID da extração (para recuperação)
+            keep_operations (bool): Inclui as operações no resultado
+            merge_account (bool): Incorpora os negócios ao conjunto canônico
+                da conta (sem avançar o watermark)
+            
+        Returns:
+            dict: Resultado da extração com metadados
+        """
+        end_date = end_date or datetime.now()
+        extract_id = extract_id or f"extract_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        
+        # Ao retomar, reconstrói as operações já gravadas nos segmentos
+        batches = []
+        if keep_operations:
+            checkpoint_data = self._load_checkpoint(extract_id)
+            if checkpoint_data:
+                batches.append(checkpoint_data["operations"])
+        
+        state = {}
+        
+        try:
+            for batch in self.iter_history(start_date, end_date, checkpoint_size,
+                                           callback, extract_id, state=state):
+                if keep_operations:
+                    batches.append(batch)
+            
+            # Extração vazia não tem o que incorporar à conta
+            metadata = state["metadata"]
+            if merge_account and metadata.get("login") and metadata["total_operations"]:
+                merge = self._merge_into_account(metadata["login"], metadata["server"],
+                                                 extract_id, advance_watermark=False)
+                metadata.update({
+                    "new_operations": merge["added"],
+                    "duplicates": merge["duplicates"]
+                })
+                self._save_extraction(extract_id, metadata, index=False)
+            
+            return {
+                "success": True,
+                "operations": DealBatch.concat(batches) if keep_operations else None,
+                "metadata": state["metadata"]
+            }
+            
+        except ConnectionError as e:
+            return {
+                "success": False,
+                "error": str(e),
+                "operations": None,
+                "metadata": None
+            }
+        
+        except ExtractionCancelled:
+            # O checkpoint fica no disco: a mesma extract_id retoma daqui
+            return {
+                "success": False,
+                "cancelled": True,
+                "error": "Extração interrompida",
+                "operations": DealBatch.concat(batches) if keep_operations else None,
+                "metadata": {
+                    "extract_id": extract_id,
+                    "partial": True,
+                    "resumable": True,
+                    "start_date": state.get("start_date", start_date).isoformat(),
+                    "resume_date": state.get("current_date", start_date).isoformat(),
+                    "total_operations": state.get("processed_ops", 0),
+                    "timestamp": datetime.now().isoformat()
+                }
+            }
+            
+        except Exception as e:
+            logger.exception(f"Erro durante extração: {str(e)}")
+            
+            return {
+                "success": False,
+                "error": str(e),
+                "operations": DealBatch.concat(batches) if keep_operations else None,
+                "metadata": {
+                    "extract_id": extract_id,
+                    "partial": True,
+                    "start_date": state.get("start_date", start_date).isoformat(),
+                    "error_date": state.get("current_date", start_date).isoformat(),
+                    "total_operations": state.get("processed_ops", 0),
+                    "timestamp": datetime.now().isoformat()
+                }
+            }
+    
+    def extract_incremental(self, login=None, server=None, start_date=None, end_date=None,
+                            callback=None, extract_id=None):
+        """
+        Extrai apenas os negócios posteriores ao watermark da conta e os
+        incorpora ao conjunto de dados da conta, sem duplicar tickets.
+        
+        Args:
+            login (int, optional): Conta (padrão: conta conectada)
+            server (str, optional): Servidor (padrão: servidor conectado)
+            start_date (datetime, optional): Início usado apenas quando a
+                conta ainda não possui watermark
+            end_date (datetime, optional): Data final (padrão: data atual)
+            callback (callable): Função para reportar progresso
+            extract_id (str): ID da extração delta
             
         Returns:
             dict: Resultado da extração com metadados
         """
-        # Valida conexão MT5
         if not self.connector.connected and not self.connector.connect():
             logger.error("Não foi possível conectar ao MT5 para extração")
             return {
@@ -56,88 +202,242 @@ class MT5Extractor:
                 "operations": None,
                 "metadata": None
             }
+        
+        login = login or self.connector.login
+        server = server or self.connector.server
+        if not login:
+            return {
+                "success": False,
+                "error": "Conta não identificada para extração incremental",
+                "operations": None,
+                "metadata": None
+            }
+        
+        # O watermark é inclusivo: negócios no mesmo instante são
+        # descartados depois, na deduplicação por ticket
+        watermark = self.watermarks.get(login, server)
+        if watermark:
+            start_date = datetime.fromisoformat(watermark["last_date"])
+        elif start_date is None:
+            return {
+                "success": False,
+                "error": f"Conta {login} sem watermark: informe a data inicial",
+                "operations": None,
+                "metadata": None
+            }
+        
+        extract_id = extract_id or f"delta_{login}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        logger.info(f"Extração incremental {extract_id} da conta {login} a partir de {start_date}")
+        
+        result = self.extract_history(start_date, end_date, callback=callback,
+                                      extract_id=extract_id, keep_operations=False,
+                                      merge_account=False)
+        if not result["success"]:
+            return result
+        
+        # Nada novo desde o watermark: não há o que incorporar
+        metadata = result["metadata"]
+        if metadata["total_operations"]:
+            merge = self._merge_into_account(login, server, extract_id)
+        else:
+            merge = {"added": 0, "duplicates": 0}
+        
+        metadata.update({
+            "incremental": True,
+            "login": login,
+            "server": server,
+            "new_operations": merge["added"],
+            "duplicates": merge["duplicates"]
+        })
+        self._save_extraction(extract_id, metadata, index=False)
+        
+        return result
+    
+    def account_store(self, login, server):
+        """Conjunto de dados canônico da conta (ver AccountDealStore)"""
+        key = f"{server}_{login}"
+        store = self._account_stores.get(key)
+        if store is None:
+            store = self._account_stores.setdefault(
+                key, AccountDealStore(self.accounts_dir / key))
+        return store
+    
+    def _merge_into_account(self, login, server, extract_id, advance_watermark=True):
+        """
+        Incorpora ao conjunto canônico da conta os negócios da extração que
+        ainda não estão nele e, em extrações incrementais, avança o watermark.
+        """
+        merge = self.account_store(login, server).merge(self.storage.iter_batches(extract_id))
+        
+        newest = merge["newest"]
+        if advance_watermark and newest:
+            current = self.watermarks.get(login, server)
+            if not current or newest > (current["last_time_msc"], current["last_ticket"]):
+                self.watermarks.update(login, server, newest[0], newest[1],
+                                       from_msc(newest[0]).isoformat(),
+                                       extract_id=extract_id)
+        
+        logger.info(f"Conta {login}: {merge['added']} novas operações, "
+                    f"{merge['duplicates']} duplicadas descartadas")
+        return merge
+    
+    def iter_history(self, start_date, end_date=None, checkpoint_size=500,
+                     callback=None, extract_id=None, state=None):
+        """
+        Extrai histórico de operações do MT5 produzindo um lote por janela.
+        
+        Checkpoint, gravação em disco e callback de progresso avançam a cada
+        janela, de modo que a memória fica limitada ao tamanho de uma janela
+        (mais as operações ainda pendentes de checkpoint).
+        
+        A busca no terminal, a conversão e a classificação rodam em estágios
+        de um Pipeline (até pipeline_depth janelas em trânsito), sobrepondo a
+        latência do terminal à CPU e à gravação feitas nesta thread.
+        
+        Args:
+            start_date (datetime): Data inicial para extração
+            end_date (datetime, optional): Data final (padrão: data atual)
+            checkpoint_size (int): Número de operações por checkpoint
+            callback (callable): Função para reportar progresso
+            extract_id (str): ID da extração (para recuperação)
+            state (dict, optional): Recebe o andamento da extração
+                (current_date, processed_ops e, ao final, metadata)
+            
+        Yields:
+            DealBatch: Operações extraídas em cada janela
+            
+        Raises:
+            ConnectionError: Se não for possível conectar ao MT5
+        """
+        # Valida conexão MT5
+        if not self.connector.connected and not self.connector.connect():
+            logger.error("Não foi possível conectar ao MT5 para extração")
+            raise ConnectionError("Falha de conexão com MT5")
             
         # Inicializa parâmetros
         end_date = end_date or datetime.now()
         extract_id = extract_id or f"extract_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        state = state if state is not None else {}
         
-        # Verifica checkpoint existente
-        checkpoint_data = self._load_checkpoint(extract_id)
+        # Verifica checkpoint existente (somente o manifesto)
+        manifest = self._load_checkpoint_manifest(extract_id)
+        writer = self.storage.open_writer(extract_id)
         
         # Se existe checkpoint, continua a partir dele
-        if checkpoint_data:
+        if manifest:
             logger.info(f"Continuando extração {extract_id} a partir do checkpoint")
-            operations = checkpoint_data["operations"]
-            last_date = checkpoint_data["last_date"]
-            start_date = datetime.fromisoformat(last_date)
-            total_ops = checkpoint_data["total_ops"]
-            processed_ops = len(operations)
+            start_date = datetime.fromisoformat(manifest["last_date"])
+            processed_ops = manifest["processed_ops"]
+            
+            # Regrava em disco o que já estava nos segmentos, um por vez
+            for segment in self._iter_checkpoint_segments(extract_id, manifest):
+                writer.write(segment)
         else:
             logger.info(f"Iniciando nova extração {extract_id}")
-            operations = []
-            total_ops = self._estimate_operations_count(start_date, end_date)
             processed_ops = 0
+        
+        # Conta conectada, registrada nos metadados e no índice de negócios
+        account = mt5_gate.call(mt5.account_info)
+        
+        # Estimativa do total (só do trecho restante, ao retomar)
+        estimator = self._estimate_operations_count(start_date, end_date, processed_ops)
+        total_ops = estimator.total
+            
+        state.update({
+            "extract_id": extract_id,
+            "start_date": start_date,
+            "current_date": start_date,
+            "processed_ops": processed_ops
+        })
             
         # Reporta progresso inicial
         if callback:
             callback(0, total_ops, processed_ops, "Iniciando extração")
         
+        # Lotes ainda não gravados em segmento de checkpoint
+        pending = []
+        pending_ops = 0
+        current_date = start_date
+        
+        # Contagem de negócios por EA, calculada no estágio de classificação
+        ea_counts = {}
+        
+        # Pipeline: busca no terminal -> conversão -> classificação, com filas
+        # limitadas; a gravação e o checkpoint ficam nesta thread
+        priority = mt5_gate.get_priority()
+        pipeline = Pipeline(
+            self._fetch_windows(start_date, end_date, resumed=bool(manifest)),
+            stages=[self._convert_window, self._classify_window],
+            depth=self.pipeline_depth,
+            thread_init=lambda: mt5_gate.set_priority(priority),
+            name=f"extract-{extract_id}"
+        )
+        
         try:
-            # Loop de extração principal
-            current_date = start_date
-            batch_size = timedelta(days=7)  # Extrai em lotes de 7 dias
-            
-            while current_date <= end_date:
-                # Define janela de extração
-                batch_end = min(current_date + batch_size, end_date)
-                
-                logger.info(f"Extraindo operações de {current_date} até {batch_end}")
-                
-                # Extrai ordens fechadas no período
-                orders = mt5.history_deals_get(current_date, batch_end)
-                
-                if orders is None:
-                    error = mt5.last_error()
-                    logger.warning(f"Sem ordens no período ou erro: {error}")
-                    current_date = batch_end
-                    continue
-                    
-                # Converte para DataFrame para facilitar manipulação
-                if len(orders) > 0:
-                    orders_df = pd.DataFrame(list(orders), columns=orders[0]._asdict().keys())
-                    orders_list = orders_df.to_dict('records')
-                    operations.extend(orders_list)
-                    
-                    processed_ops += len(orders_list)
+            for batch_end, batch, counts in pipeline:
+                if batch is not None:
+                    writer.write(batch)
+                    pending.append(batch)
+                    pending_ops += len(batch)
                     
-                    # Reporta progresso
-                    if callback:
-                        progress = min(int(processed_ops / total_ops * 100), 99)
-                        callback(progress, total_ops, processed_ops, "Extraindo operações")
+                    processed_ops += len(batch)
+                    state["processed_ops"] = processed_ops
+                    for label, count in counts.items():
+                        ea_counts[label] = ea_counts.get(label, 0) + count
                     
-                    # Salva checkpoint a cada checkpoint_size operações
-                    if len(operations) % checkpoint_size == 0:
-                        self._save_checkpoint(extract_id, operations, batch_end.isoformat(), total_ops)
-                        logger.info(f"Checkpoint salvo: {len(operations)} operações")
+                    # Grava novo segmento ao acumular checkpoint_size operações
+                    if pending_ops >= checkpoint_size:
+                        self._save_checkpoint(extract_id, DealBatch.concat(pending),
+                                              batch_end.isoformat(), total_ops)
+                        logger.info(f"Checkpoint salvo: {processed_ops} operações")
+                        pending = []
+                        pending_ops = 0
                 
-                # Avança para o próximo lote
+                # Avança para o próximo lote antes de reportar e entregar o
+                # atual, para que um checkpoint de interrupção aponte para o
+                # fim da janela
                 current_date = batch_end
+                state["current_date"] = current_date
+                
+                # Refina estimativa e reporta progresso; False no callback
+                # interrompe a extração entre janelas (ver ExtractionCancelled)
+                cancelled = False
+                if callback:
+                    if batch is not None:
+                        total_ops = estimator.update(processed_ops, batch_end)
+                    progress = estimator.progress(processed_ops)
+                    cancelled = callback(progress, total_ops, processed_ops,
+                                         "Extraindo operações") is False
+                elif batch is not None:
+                    total_ops = estimator.update(processed_ops, batch_end)
+                
+                # A janela já conta em processed_ops e no checkpoint: é entregue
+                # mesmo quando a extração para em seguida
+                if batch is not None:
+                    yield batch
+                
+                if cancelled:
+                    logger.info(f"Extração {extract_id} interrompida em {current_date}")
+                    raise ExtractionCancelled(extract_id)
             
             # Finaliza extração
-            result = {
-                "success": True,
-                "operations": operations,
-                "metadata": {
-                    "extract_id": extract_id,
-                    "start_date": start_date.isoformat(),
-                    "end_date": end_date.isoformat(),
-                    "total_operations": len(operations),
-                    "timestamp": datetime.now().isoformat()
-                }
+            metadata = {
+                "extract_id": extract_id,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "total_operations": processed_ops,
+                "ea_counts": ea_counts,
+                "login": account.login if account else self.connector.login,
+                "server": account.server if account else self.connector.server,
+                "storage_format": self.storage.format_name,
+                "operations_file": self.storage.path(extract_id).name,
+                "timestamp": datetime.now().isoformat()
             }
             
-            # Salva resultado final
-            self._save_extraction(extract_id, result)
+            # Publica arquivo de operações e salva metadados
+            writer.commit()
+            self._save_extraction(extract_id, metadata)
+            state["metadata"] = metadata
             
             # Limpa checkpoint (extração completa)
             self._clear_checkpoint(extract_id)
@@ -146,128 +446,282 @@ class MT5Extractor:
             if callback:
                 callback(100, total_ops, processed_ops, "Extração concluída")
                 
-            logger.info(f"Extração {extract_id} concluída: {len(operations)} operações")
-            return result
+            logger.info(f"Extração {extract_id} concluída: {processed_ops} operações")
             
-        except Exception as e:
-            logger.exception(f"Erro durante extração: {str(e)}")
-            
-            # Salva checkpoint do progresso atual para possível recuperação
-            if operations:
-                self._save_checkpoint(extract_id, operations, current_date.isoformat(), total_ops)
-                
-            return {
-                "success": False,
-                "error": str(e),
-                "operations": operations,
-                "metadata": {
-                    "extract_id": extract_id,
-                    "partial": True,
-                    "start_date": start_date.isoformat(),
-                    "error_date": current_date.isoformat(),
-                    "total_operations": len(operations),
-                    "timestamp": datetime.now().isoformat()
-                }
-            }
+        except BaseException:
+            # Erro ou consumidor interrompeu o gerador: salva checkpoint do
+            # progresso atual para possível recuperação
+            writer.abort()
+            if pending:
+                self._save_checkpoint(extract_id, DealBatch.concat(pending),
+                                      current_date.isoformat(), total_ops)
+            raise
+        
+        finally:
+            pipeline.close()
     
-    def _estimate_operations_count(self, start_date, end_date):
-        """Estima quantidade de operações para cálculo de progresso"""
-        try:
-            # Amostra para estimar total
-            sample_start = max(start_date, end_date - timedelta(days=7))
-            orders = mt5.history_deals_get(sample_start, end_date)
+    def _fetch_windows(self, current_date, end_date, resumed=False):
+        """
+        Estágio de busca: único a chamar o terminal. Produz
+        (início, fim, negócios, fronteira) para cada janela, inclusive as vazias.
+        
+        A API inclui as duas pontas do intervalo, então o segundo inicial de
+        cada janela já foi lido pela anterior (ou antes do checkpoint, ao
+        retomar); a fronteira indica esse segundo para o estágio de conversão.
+        """
+        # Loop de extração principal, com janela ajustada à densidade
+        window = AdaptiveWindow(**self.window_options)
+        boundary = to_msc(current_date) // 1000 if resumed else None
+        
+        while current_date < end_date:
+            # Define janela de extração
+            batch_end = window.window_end(current_date, end_date)
             
-            if orders is None or len(orders) == 0:
-                return 1000  # Valor padrão se não conseguir estimar
+            # Sonda a densidade (somente contagem) antes de buscar uma
+            # janela cujo tamanho ainda não foi confirmado
+            if window.needs_probe():
+                probe_count = mt5_gate.call(mt5.history_deals_total, current_date, batch_end)
                 
-            # Calcula média diária e extrapola para período completo
-            days_in_sample = (end_date - sample_start).days or 1
-            days_total = (end_date - start_date).days or 1
-            daily_avg = len(orders) / days_in_sample
+                if window.fit_probe(probe_count, batch_end - current_date):
+                    batch_end = window.window_end(current_date, end_date)
+                elif probe_count == 0:
+                    window.observe(0, batch_end - current_date)
+                    yield current_date, batch_end, None, boundary
+                    current_date = batch_end
+                    boundary = to_msc(current_date) // 1000
+                    continue
             
-            estimated = max(int(daily_avg * days_total), 1)
-            logger.info(f"Operações estimadas: {estimated}")
-            return estimated
+            logger.info(f"Extraindo operações de {current_date} até {batch_end}")
+            
+            # Extrai ordens fechadas no período (last_error lido no mesmo
+            # acesso ao terminal, antes que outra thread o sobrescreva)
+            with mt5_gate:
+                orders = mt5.history_deals_get(current_date, batch_end)
+                error = mt5.last_error() if orders is None else None
+            window.observe(len(orders) if orders is not None else None,
+                           batch_end - current_date)
+            
+            if orders is None:
+                logger.warning(f"Sem ordens no período ou erro: {error}")
             
+            yield current_date, batch_end, orders, boundary
+            current_date = batch_end
+            boundary = to_msc(current_date) // 1000
+    
+    @staticmethod
+    def _convert_window(item):
+        """
+        Estágio de conversão: negócios do terminal -> DealBatch, sem os do
+        segundo de fronteira já entregues pela janela anterior
+        """
+        window_start, batch_end, orders, boundary = item
+        if not orders:
+            return batch_end, None
+        
+        batch = DealBatch.from_deals(orders)
+        if boundary is not None:
+            batch = batch[batch["time"] > boundary]
+        return batch_end, batch if len(batch) else None
+    
+    def _classify_window(self, item):
+        """Estágio de classificação: contagem de negócios por EA do lote"""
+        batch_end, batch = item
+        if batch is None:
+            return batch_end, None, {}
+        
+        codes = np.bincount(self.classifier.classify(batch))
+        labels = self.classifier.labels
+        counts = {labels[code]: int(n) for code, n in enumerate(codes) if n}
+        return batch_end, batch, counts
+    
+    def _estimate_operations_count(self, start_date, end_date, processed=0):
+        """
+        Estima quantidade de operações para cálculo de progresso usando
+        apenas sondagens de contagem (sem baixar negócios)
+        """
+        estimator = ProgressEstimator(start_date, end_date, processed)
+        
+        try:
+            # Sondagens agrupadas em um único acesso ao terminal
+            with mt5_gate:
+                estimated = estimator.probe(mt5.history_deals_total)
+            logger.info(f"Operações estimadas: {estimated}")
         except Exception as e:
             logger.warning(f"Erro ao estimar operações: {str(e)}")
-            return 1000  # Valor padrão em caso de erro
+            
+        return estimator
+    
+    def _checkpoint_path(self, extract_id):
+        """Diretório com manifesto e segmentos de checkpoint da extração"""
+        return self.checkpoint_dir / extract_id
     
     def _save_checkpoint(self, extract_id, operations, last_date, total_ops):
-        """Salva checkpoint para possível recuperação"""
-        checkpoint_file = self.checkpoint_dir / f"{extract_id}.checkpoint.json"
+        """
+        Anexa um segmento com as operações novas e atualiza o manifesto.
+        
+        Segmentos anteriores nunca são reescritos; o manifesto guarda apenas
+        o ponto de retomada e a quantidade de segmentos válidos.
+        """
+        checkpoint_path = self._checkpoint_path(extract_id)
+        checkpoint_path.mkdir(parents=True, exist_ok=True)
         
-        checkpoint_data = {
+        manifest = self._load_checkpoint_manifest(extract_id) or {
             "extract_id": extract_id,
-            "operations": operations,
+            "segments": 0,
+            "processed_ops": 0
+        }
+        
+        # Grava o segmento antes do manifesto: um segmento órfão é ignorado
+        segment_file = checkpoint_path / f"segment_{manifest['segments']:06d}.npy"
+        np.save(segment_file, operations.records)
+        
+        manifest.update({
+            "segments": manifest["segments"] + 1,
+            "processed_ops": manifest["processed_ops"] + len(operations),
             "last_date": last_date,
             "total_ops": total_ops,
             "timestamp": datetime.now().isoformat()
-        }
+        })
         
-        with open(checkpoint_file, 'w') as f:
-            json.dump(checkpoint_data, f)
+        # Substituição atômica do manifesto
+        tmp_file = checkpoint_path / "manifest.json.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_file, checkpoint_path / "manifest.json")
     
-    def _load_checkpoint(self, extract_id):
-        """Carrega checkpoint existente"""
-        checkpoint_file = self.checkpoint_dir / f"{extract_id}.checkpoint.json"
+    def _load_checkpoint_manifest(self, extract_id):
+        """Carrega apenas o manifesto do checkpoint (sem as operações)"""
+        manifest_file = self._checkpoint_path(extract_id) / "manifest.json"
         
-        if not checkpoint_file.exists():
+        if not manifest_file.exists():
             return None
             
         try:
-            with open(checkpoint_file, 'r') as f:
+            with open(manifest_file, 'r') as f:
                 return json.load(f)
+        except Exception as e:
+            logger.warning(f"Erro ao carregar manifesto de checkpoint: {str(e)}")
+            return None
+    
+    def _iter_checkpoint_segments(self, extract_id, manifest):
+        """Percorre os segmentos válidos do checkpoint, um de cada vez"""
+        checkpoint_path = self._checkpoint_path(extract_id)
+        
+        for index in range(manifest["segments"]):
+            yield DealBatch(np.load(checkpoint_path / f"segment_{index:06d}.npy"))
+    
+    def _load_checkpoint(self, extract_id):
+        """Carrega checkpoint existente reconstruindo as operações a partir dos segmentos"""
+        manifest = self._load_checkpoint_manifest(extract_id)
+        
+        if not manifest:
+            return None
+            
+        try:
+            operations = DealBatch.concat(self._iter_checkpoint_segments(extract_id, manifest))
+            return dict(manifest, operations=operations)
         except Exception as e:
             logger.warning(f"Erro ao carregar checkpoint: {str(e)}")
             return None
     
     def _clear_checkpoint(self, extract_id):
-        """Remove arquivo de checkpoint após conclusão"""
-        checkpoint_file = self.checkpoint_dir / f"{extract_id}.checkpoint.json"
+        """Remove manifesto e segmentos de checkpoint após conclusão"""
+        checkpoint_path = self._checkpoint_path(extract_id)
         
-        if checkpoint_file.exists():
-            checkpoint_file.unlink()
+        if checkpoint_path.exists():
+            shutil.rmtree(checkpoint_path, ignore_errors=True)
     
-    def _save_extraction(self, extract_id, result):
-        """Salva resultado da extração em CSV e JSON"""
-        # Salva metadados
+    def _save_extraction(self, extract_id, metadata, index=True):
+        """
+        Salva metadados da extração (as operações já foram gravadas pelo
+        storage) e incorpora seus negócios ao índice consultável
+        """
         meta_file = self.raw_dir / f"{extract_id}_metadata.json"
         with open(meta_file, 'w') as f:
-            json.dump(result["metadata"], f, indent=2)
-        
-        # Salva operações em CSV
-        if result["operations"]:
-            ops_df = pd.DataFrame(result["operations"])
-            csv_file = self.raw_dir / f"{extract_id}_operations.csv"
-            ops_df.to_csv(csv_file, index=False)
+            json.dump(metadata, f, indent=2)
             
         logger.info(f"Extração salva: {meta_file}")
         
-    def categorize_by_ea(self, operations):
+        if index:
+            self.index_extraction(extract_id, metadata.get("login"), metadata.get("server"))
+    
+    def index_extraction(self, extract_id, login=None, server=None):
+        """Indexa os negócios de uma extração concluída (ver DealIndex)"""
+        try:
+            return self.deal_index.index_extraction(
+                extract_id, self.storage.iter_batches(extract_id), self.classifier,
+                login=login, server=server
+            )
+        except Exception as e:
+            # O índice é derivado dos arquivos e pode ser refeito depois
+            logger.error(f"Erro ao indexar extração {extract_id}: {str(e)}")
+            return 0
+    
+    def index_pending_extractions(self):
+        """Indexa extrações concluídas que ainda não estão no índice"""
+        indexed = 0
+        for meta_file in sorted(self.raw_dir.glob("*_metadata.json")):
+            extract_id = meta_file.name[:-len("_metadata.json")]
+            if self.deal_index.is_indexed(extract_id) or not self.storage.exists(extract_id):
+                continue
+            
+            with open(meta_file, 'r') as f:
+                metadata = json.load(f)
+            self.index_extraction(extract_id, metadata.get("login"), metadata.get("server"))
+            indexed += 1
+            
+        return indexed
+    
+    def query_deals(self, **kwargs):
+        """Consulta o índice de negócios (ver DealIndex.query)"""
+        return self.deal_index.query(**kwargs)
+    
+    def load_extraction(self, extract_id, start_date=None, end_date=None, symbols=None):
         """
-        Categoriza operações por EA com base no campo comment
+        Carrega operações de uma extração concluída.
         
+        Args:
+            extract_id (str): ID da extração
+            start_date (datetime, optional): Início do intervalo desejado
+            end_date (datetime, optional): Fim do intervalo desejado
+            symbols (list, optional): Símbolos desejados
+            
         Returns:
-            dict: Operações agrupadas por EA ID
+            DealBatch: Operações filtradas
         """
-        categorized = {}
+        return self.storage.read(extract_id, start_date, end_date, symbols)
+    
+    def load_positions(self, extract_id, start_date=None, end_date=None, symbols=None):
+        """
+        Reconstrói as posições de uma extração concluída (ver PositionTable),
+        percorrendo o arquivo de operações em lotes.
         
-        for op in operations:
-            # Extrai ID do EA do comentário (assumindo formato padrão EA_[NOME]_[ID])
-            ea_id = "unknown"
-            comment = op.get("comment", "")
-            
-            # Tenta extrair ID do EA do comentário
-            if "EA_" in comment:
-                parts = comment.split("_")
-                if len(parts) >= 3:
-                    ea_id = parts[2]
-            
-            # Agrupa por EA ID
-            if ea_id not in categorized:
-                categorized[ea_id] = []
-            
-            categorized[ea_id].append(op)
+        Returns:
+            PositionTable: Uma linha por perna de posição
+        """
+        return PositionTable.from_batches(
+            self.storage.iter_batches(extract_id, start_date, end_date, symbols))
+    
+    def load_backtest(self, backtest_id, start_date=None, end_date=None, symbols=None):
+        """Carrega negócios de um backtest importado (ver backtest_import)"""
+        return self.backtest_storage.read(backtest_id, start_date, end_date, symbols)
+    
+    def export_csv(self, extract_id, csv_path=None):
+        """Exporta uma extração concluída para CSV (consumidores legados)"""
+        return self.storage.export_csv(extract_id, csv_path)
         
-        return categorized
\ No newline at end of file
+    def categorize_by_ea(self, operations):
+        """
+        Categoriza operações por EA (tabela de magic numbers e, em seguida,
+        padrões de comentário, ambos configurados em self.classifier)
+        
+        Args:
+            operations (DealBatch | list): Operações a categorizar
+        
+        Returns:
+            dict: Índices das operações (np.ndarray) agrupados por EA ID
+        """
+        if not isinstance(operations, DealBatch):
+            operations = DealBatch.from_records(operations)
+            
+        return self.classifier.group(operations)
@@ -0,0 +1,90 @@
+# mt5_integration/gate.py
+
+import functools
+import heapq
+import itertools
+import threading
+
+# Prioridades de acesso ao terminal (menor valor é atendido primeiro)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NIGHTLY = 10
+
+
+class MT5Gate:
+    """
+    Portão único de acesso à API MetaTrader5, que é global ao processo e não
+    protege chamadas concorrentes.
+
+    Apenas uma thread por vez fala com o terminal. As demais aguardam em uma
+    fila ordenada por prioridade e, dentro da mesma prioridade, por ordem de
+    chegada, de modo que uma extração longa não monopoliza o terminal entre
+    uma janela e outra. O portão é reentrante para a thread que o detém.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._owner = None
+        self._depth = 0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._local = threading.local()
+
+    def set_priority(self, priority):
+        """Define a prioridade padrão da thread atual"""
+        self._local.priority = priority
+
+    def get_priority(self):
+        """Prioridade padrão da thread atual"""
+        return getattr(self._local, "priority", PRIORITY_INTERACTIVE)
+
+    def acquire(self, priority=None):
+        me = threading.get_ident()
+        if priority is None:
+            priority = self.get_priority()
+
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+                return
+
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._waiting, ticket)
+            while self._owner is not None or self._waiting[0] != ticket:
+                self._cond.wait()
+
+            heapq.heappop(self._waiting)
+            self._owner = me
+            self._depth = 1
+
+    def release(self):
+        with self._cond:
+            if self._owner != threading.get_ident():
+                raise RuntimeError("MT5Gate liberado por thread que não o detém")
+            self._depth -= 1
+            if self._depth == 0:
+                self._owner = None
+                self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def call(self, fn, *args, **kwargs):
+        """Executa uma chamada ao terminal dentro do portão"""
+        with self:
+            return fn(*args, **kwargs)
+
+    def guarded(self, fn):
+        """Decorador: a função inteira roda dentro do portão"""
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with self:
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+# Instância única do processo: todo acesso ao terminal passa por ela
+mt5_gate = MT5Gate()
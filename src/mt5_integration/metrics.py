@@ -0,0 +1,135 @@
+# mt5_integration/metrics.py
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from deals import from_msc
+from positions import group_cumsum
+from utils import stat_value
+
+# Configurar logger
+logger = logging.getLogger("MT5Metrics")
+
+
+class EAMetricsEngine:
+    """
+    Métricas de desempenho por EA calculadas de uma vez para todos os EAs.
+
+    Parte das posições fechadas (PositionTable) e do código de EA de cada
+    uma (EAClassifier.classify, o mesmo critério de categorize_by_ea). O
+    resultado de cada posição é profit + swap + commission + fee; as somas
+    por EA saem de np.bincount e a curva de capital de uma única ordenação
+    por (EA, horário de fechamento) com soma e máximo acumulados por grupo.
+
+    Sharpe e Sortino são calculados por operação, sem anualização, como no
+    relatório do Strategy Tester.
+    """
+
+    def __init__(self, curve_points=100):
+        """
+        Args:
+            curve_points (int): Pontos da curva de capital devolvida por EA
+                (amostrada; o drawdown usa a curva completa)
+        """
+        self.curve_points = curve_points
+
+    def compute(self, positions, codes, labels):
+        """
+        Calcula as métricas de cada EA.
+
+        Args:
+            positions (PositionTable): Posições reconstruídas
+            codes (np.ndarray): Código do EA de cada posição
+            labels (list): ID do EA de cada código
+
+        Returns:
+            dict: ID do EA -> métricas
+        """
+        closed = positions["closed"]
+        open_positions = np.bincount(np.asarray(codes)[~closed], minlength=len(labels))
+        codes = np.asarray(codes)[closed]
+        net = (positions["profit"] + positions["swap"]
+               + positions["commission"] + positions["fee"])[closed]
+        close_time = positions["close_time_msc"][closed]
+        open_time = positions["open_time_msc"][closed]
+        volume = positions["volume"][closed]
+        n_groups = len(labels)
+
+        def total(weights=None):
+            return np.bincount(codes, weights=weights, minlength=n_groups)
+
+        trades = total()
+        wins = total(net > 0)
+        losses = total(net < 0)
+        gross_profit = total(np.where(net > 0, net, 0.0))
+        gross_loss = -total(np.where(net < 0, net, 0.0))
+        net_profit = total(net)
+        sum_squares = total(net * net)
+        downside = total(np.minimum(net, 0.0) ** 2)
+        traded_volume = total(volume)
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = net_profit / trades
+            variance = (sum_squares - trades * mean ** 2) / (trades - 1)
+            std = np.sqrt(np.maximum(variance, 0.0))
+            downside_dev = np.sqrt(downside / trades)
+            sharpe = mean / std
+            sortino = mean / downside_dev
+            profit_factor = gross_profit / gross_loss
+            avg_win = gross_profit / wins
+            avg_loss = -gross_loss / losses
+
+        # Curva de capital: ordena por EA e fechamento, acumula por grupo
+        order = np.lexsort((close_time, codes))
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) \
+            if len(order) else np.empty(0, dtype=np.int64)
+        equity = group_cumsum(net[order], starts)
+        peak = np.maximum(pd.Series(equity).groupby(sorted_codes).cummax().to_numpy(), 0.0)
+        drawdown = peak - equity
+
+        max_drawdown = np.zeros(n_groups)
+        first_open = np.zeros(n_groups, dtype=np.int64)
+        if len(order):
+            max_drawdown[sorted_codes[starts]] = np.maximum.reduceat(drawdown, starts)
+            first_open[sorted_codes[starts]] = np.minimum.reduceat(open_time[order], starts)
+
+        bounds = np.r_[starts, len(order)]
+        results = {}
+        for i, start in enumerate(starts):
+            code = sorted_codes[start]
+            end = bounds[i + 1]
+
+            sample = np.unique(np.linspace(start, end - 1, min(self.curve_points, end - start))
+                               .astype(np.int64))
+            results[labels[code]] = {
+                "trades": int(trades[code]),
+                "wins": int(wins[code]),
+                "losses": int(losses[code]),
+                "win_rate": stat_value(wins[code] / trades[code] * 100),
+                "net_profit": stat_value(net_profit[code]),
+                "gross_profit": stat_value(gross_profit[code]),
+                "gross_loss": stat_value(gross_loss[code]),
+                "profit_factor": stat_value(profit_factor[code]),
+                "expectancy": stat_value(mean[code]),
+                "avg_win": stat_value(avg_win[code]),
+                "avg_loss": stat_value(avg_loss[code]),
+                "max_drawdown": stat_value(max_drawdown[code]),
+                "recovery_factor": stat_value(net_profit[code] / max_drawdown[code])
+                if max_drawdown[code] else None,
+                "sharpe": stat_value(sharpe[code]),
+                "sortino": stat_value(sortino[code]),
+                "volume": stat_value(traded_volume[code]),
+                "open_positions": int(open_positions[code]),
+                "first_trade": from_msc(int(first_open[code])).isoformat(),
+                "last_trade": from_msc(int(close_time[order[end - 1]])).isoformat(),
+                "equity_curve": [
+                    {"time": from_msc(int(t)).isoformat(), "equity": round(float(e), 2)}
+                    for t, e in zip(close_time[order[sample]].tolist(), equity[sample].tolist())
+                ]
+            }
+
+        logger.info(f"Métricas calculadas para {len(results)} EAs ({len(net)} posições fechadas)")
+        return results
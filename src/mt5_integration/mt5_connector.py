@@ -4,6 +4,8 @@ import logging
 import time
 from datetime import datetime, timedelta
 
+from gate import mt5_gate
+
 # Configurar logger
 logging.basicConfig(
     level=logging.INFO,
@@ -19,7 +21,8 @@ logger = logging.getLogger("MT5Connector")
 class MT5Connector:
     """
     Classe responsável pela conexão com o MetaTrader 5 e operações básicas.
-    Implementa padrão Singleton para garantir apenas uma instância ativa.
+    Implementa padrão Singleton por processo, pois a biblioteca MetaTrader5
+    mantém uma única conexão global; para vários terminais, ver TerminalPool.
     """
     _instance = None
     
@@ -43,6 +46,7 @@ class MT5Connector:
         self._initialized = True
         logger.info("MT5Connector instanciado. Aguardando conexão.")
     
+    @mt5_gate.guarded
     def connect(self):
         """Estabelece conexão com o terminal MT5"""
         try:
@@ -91,6 +95,7 @@ class MT5Connector:
             self.connected = False
             return False
     
+    @mt5_gate.guarded
     def disconnect(self):
         """Desconecta do terminal MT5"""
         if not self.connected:
@@ -104,6 +109,7 @@ class MT5Connector:
         except Exception as e:
             logger.exception(f"Erro ao desconectar do MT5: {str(e)}")
     
+    @mt5_gate.guarded
     def check_connection(self):
         """Verifica se a conexão com MT5 está ativa"""
         try:
@@ -125,11 +131,12 @@ class MT5Connector:
             self.connected = False
             return False
     
+    @mt5_gate.guarded
     def get_connection_status(self):
         """Retorna informações detalhadas sobre o estado da conexão"""
         status = {
             "connected": self.connected,
-            "last_heartbeat": self.last_heartbeat,
+            "last_heartbeat": self.last_heartbeat.isoformat() if self.last_heartbeat else None,
             "terminal_info": None,
             "account_info": None,
             "version": None
@@ -137,11 +144,20 @@ class MT5Connector:
         
         if self.connected:
             try:
-                status["terminal_info"] = mt5.terminal_info()._asdict()
-                status["account_info"] = mt5.account_info()._asdict() if mt5.account_info() else None
-                status["version"] = status["terminal_info"].get("build") if status["terminal_info"] else None
-            except:
+                terminal_info = mt5.terminal_info()
+                account_info = mt5.account_info()
+                if not terminal_info:
+                    raise ConnectionError("terminal_info vazio")
+                
+                # Leitura bem-sucedida também vale como heartbeat
+                self.last_heartbeat = datetime.now()
+                status["last_heartbeat"] = self.last_heartbeat.isoformat()
+                status["terminal_info"] = terminal_info._asdict()
+                status["account_info"] = account_info._asdict() if account_info else None
+                status["version"] = status["terminal_info"].get("build")
+            except Exception:
                 # Se ocorrer erro ao obter informações, provavelmente a conexão foi perdida
+                logger.warning("Conexão com MT5 perdida")
                 self.connected = False
                 status["connected"] = False
                 
@@ -169,6 +185,7 @@ class MT5Connector:
         return False 
 # Adicionando ao MT5Connector existente
 
+@mt5_gate.guarded
 def list_available_accounts(self):
     """Lista todas as contas MT5 disponíveis no terminal"""
     try:
@@ -223,6 +240,7 @@ def list_available_accounts(self):
         logger.exception(f"Erro ao listar contas MT5: {str(e)}")
         return []
 
+@mt5_gate.guarded
 def select_account(self, login, password=None, server=None):
     """Seleciona uma conta específica para login"""
     try:
@@ -335,6 +353,7 @@ def load_account_preference(self, path=None):
         return None
 # Atualização do método connect no MT5Connector
 
+@mt5_gate.guarded
 def connect(self):
     """Estabelece conexão com o terminal MT5"""
     try:
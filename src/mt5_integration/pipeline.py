@@ -0,0 +1,135 @@
+# mt5_integration/pipeline.py
+
+import queue
+import threading
+
+# Marcador de fim de fluxo
+_END = object()
+
+
+class _Failure:
+    """Exceção de um estágio, repassada adiante até o consumidor"""
+
+    def __init__(self, error):
+        self.error = error
+
+
+class Pipeline:
+    """
+    Pipeline produtor/consumidor em threads ligadas por filas limitadas.
+
+    A fonte (um iterável, tipicamente um gerador) roda em uma thread própria
+    e cada estágio é uma função aplicada em outra thread; o consumidor itera
+    o pipeline na thread chamadora. As filas limitadas (depth) seguram a
+    fonte quando os estágios seguintes estão atrasados, e uma exceção em
+    qualquer estágio é relançada no consumidor. Os itens não podem ser None.
+    """
+
+    def __init__(self, source, stages=(), depth=4, thread_init=None, name="pipeline"):
+        """
+        Args:
+            source (iterable): Produz os itens (executado em thread própria)
+            stages (list): Funções item -> item, cada uma em sua thread
+            depth (int): Capacidade de cada fila entre estágios
+            thread_init (callable, optional): Executada no início de cada thread
+            name (str): Prefixo do nome das threads
+        """
+        self._stop = threading.Event()
+        self._queues = [queue.Queue(maxsize=max(depth, 1)) for _ in range(len(stages) + 1)]
+        self._thread_init = thread_init
+        self._threads = [threading.Thread(target=self._run_source, args=(source, self._queues[0]),
+                                          name=f"{name}-source", daemon=True)]
+        for i, stage in enumerate(stages):
+            self._threads.append(threading.Thread(
+                target=self._run_stage, args=(stage, self._queues[i], self._queues[i + 1]),
+                name=f"{name}-stage{i + 1}", daemon=True))
+
+        for thread in self._threads:
+            thread.start()
+
+    def __iter__(self):
+        output = self._queues[-1]
+        while True:
+            item = self._get(output)
+            if item is _END or item is None:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+
+    def close(self):
+        """Interrompe os estágios e aguarda o fim das threads"""
+        self._stop.set()
+        for q in self._queues:
+            self._drain(q)
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _run_source(self, source, output):
+        if self._thread_init:
+            self._thread_init()
+
+        iterator = iter(source)
+        try:
+            for item in iterator:
+                if not self._put(output, item):
+                    return
+            self._put(output, _END)
+        except BaseException as e:
+            self._put(output, _Failure(e))
+        finally:
+            # Fecha o gerador da fonte (libera recursos se interrompido)
+            close = getattr(iterator, "close", None)
+            if close:
+                close()
+
+    def _run_stage(self, stage, source, output):
+        if self._thread_init:
+            self._thread_init()
+
+        while True:
+            item = self._get(source)
+            if item is _END or isinstance(item, _Failure) or item is None:
+                if item is not None:
+                    self._put(output, item)
+                return
+            try:
+                result = stage(item)
+            except BaseException as e:
+                self._put(output, _Failure(e))
+                return
+            if not self._put(output, result):
+                return
+
+    def _put(self, q, item):
+        """Enfileira respeitando a interrupção; False se o pipeline parou"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """Retira um item; None se o pipeline foi interrompido"""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return None
+
+    @staticmethod
+    def _drain(q):
+        while True:
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                return
@@ -0,0 +1,252 @@
+# mt5_integration/positions.py
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+# Configurar logger
+logger = logging.getLogger("MT5Positions")
+
+# Constantes da API do MT5
+DEAL_TYPE_BUY = 0
+DEAL_TYPE_SELL = 1
+DEAL_ENTRY_IN = 0
+DEAL_ENTRY_OUT = 1
+DEAL_ENTRY_INOUT = 2
+DEAL_ENTRY_OUT_BY = 3
+
+# Volumes tratados em inteiros (1e-8 lote) para que a soma acumulada de
+# entradas e saídas zere exatamente quando a posição fecha
+VOLUME_SCALE = 10 ** 8
+
+# Uma linha por perna de posição: a reversão (DEAL_ENTRY_INOUT ou saída
+# maior que o volume aberto) encerra uma perna e abre outra, em sentido
+# oposto, com o mesmo position_id
+POSITION_DTYPE = np.dtype([
+    ("position_id", "i8"),
+    ("leg", "i4"),
+    ("symbol", "U32"),
+    ("magic", "i8"),
+    ("comment", "U32"),
+    ("type", "i4"),
+    ("open_ticket", "i8"),
+    ("close_ticket", "i8"),
+    ("open_time_msc", "i8"),
+    ("close_time_msc", "i8"),
+    ("volume", "f8"),
+    ("volume_closed", "f8"),
+    ("open_price", "f8"),
+    ("close_price", "f8"),
+    ("commission", "f8"),
+    ("swap", "f8"),
+    ("profit", "f8"),
+    ("fee", "f8"),
+    ("deals", "i4"),
+    ("closed", "?"),
+    ("truncated", "?"),
+])
+
+# Colunas numéricas dos negócios usadas na reconstrução
+_NUMERIC = ("ticket", "time_msc", "type", "entry", "magic", "position_id",
+            "volume", "price", "commission", "swap", "profit", "fee")
+
+
+class PositionTable:
+    """
+    Tabela de posições (pernas) reconstruídas a partir dos negócios.
+
+    A reconstrução é vetorizada: uma ordenação por (position_id, time_msc,
+    ticket) e uma passada de somas acumuladas por grupo determinam, para
+    cada negócio, quanto volume ele abre e quanto fecha. Entradas parciais,
+    fechamentos parciais e reversões resultam em volumes, preços médios e
+    custos por perna; agregações usam np.bincount, sem laços em Python.
+
+    Posições abertas antes do início dos negócios disponíveis (primeira
+    saída sem entrada correspondente) são marcadas como truncated.
+    """
+
+    def __init__(self, records=None):
+        self.records = records if records is not None else np.empty(0, dtype=POSITION_DTYPE)
+
+    @classmethod
+    def from_deals(cls, deals):
+        """Reconstrói as posições de um DealBatch"""
+        return cls.from_batches([deals])
+
+    @classmethod
+    def from_batches(cls, batches):
+        """
+        Reconstrói as posições de uma sequência de lotes (ex.: iter_batches
+        de uma extração ou do conjunto da conta).
+
+        Apenas as colunas necessárias são guardadas; símbolo e comentário
+        viram códigos inteiros, o que mantém a memória baixa para dezenas
+        de milhões de negócios.
+        """
+        columns = {name: [] for name in _NUMERIC + ("symbol", "comment")}
+        texts = {"symbol": {}, "comment": {}}
+
+        for batch in batches:
+            if not len(batch):
+                continue
+
+            # Só compras e vendas formam posições (saldo, crédito etc. ficam de fora)
+            trades = batch.records[np.isin(batch["type"], [DEAL_TYPE_BUY, DEAL_TYPE_SELL])]
+            for name in _NUMERIC:
+                columns[name].append(trades[name])
+            for name, codes in texts.items():
+                inverse, values = pd.factorize(trades[name])
+                mapping = np.array([codes.setdefault(v, len(codes)) for v in values.tolist()],
+                                   dtype=np.int32)
+                columns[name].append(mapping[inverse])
+
+        if not columns["ticket"]:
+            return cls()
+
+        deals = {name: np.concatenate(parts) for name, parts in columns.items()}
+        names = {name: np.array(list(codes), dtype=POSITION_DTYPE[name])
+                 for name, codes in texts.items()}
+        return cls(_reconstruct(deals, names))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, key):
+        """Nome de campo retorna a coluna; índices ou máscaras retornam uma nova tabela"""
+        if isinstance(key, str):
+            return self.records[key]
+        return PositionTable(np.atleast_1d(self.records[key]))
+
+    def to_records(self):
+        """Converte para lista de dicionários com tipos nativos (fronteira JSON)"""
+        names = POSITION_DTYPE.names
+        return [dict(zip(names, row)) for row in self.records.tolist()]
+
+    def to_frame(self):
+        """Converte para DataFrame"""
+        return pd.DataFrame(self.records)
+
+
+def _reconstruct(deals, names):
+    """Reconstrução vetorizada (ver PositionTable); deals são colunas paralelas"""
+    order = np.lexsort((deals["ticket"], deals["time_msc"], deals["position_id"]))
+    deals = {name: values[order] for name, values in deals.items()}
+    n = len(order)
+
+    pid = deals["position_id"]
+    starts = np.flatnonzero(np.r_[True, pid[1:] != pid[:-1]])
+    first = np.zeros(n, dtype=bool)
+    first[starts] = True
+
+    units = np.rint(deals["volume"] * VOLUME_SCALE).astype(np.int64)
+    signed = np.where(deals["type"] == DEAL_TYPE_BUY, units, -units)
+
+    # Saídas antes de qualquer entrada: a posição foi aberta antes do
+    # intervalo; o volume que elas fecham vira o saldo inicial do grupo
+    entry = deals["entry"]
+    is_entry = (entry == DEAL_ENTRY_IN) | (entry == DEAL_ENTRY_INOUT)
+    is_exit = (entry == DEAL_ENTRY_OUT) | (entry == DEAL_ENTRY_OUT_BY)
+    before_entry = group_cumsum(is_entry.astype(np.int64), starts) == 0
+    seed = -np.add.reduceat(np.where(is_exit & before_entry, signed, 0), starts)
+
+    net_after = group_cumsum(signed, starts) + np.repeat(seed, np.diff(np.r_[starts, n]))
+    net_before = net_after - signed
+    abs_before, abs_after = np.abs(net_before), np.abs(net_after)
+
+    # Reversão: o saldo troca de sinal no negócio
+    reversal = np.sign(net_before) * np.sign(net_after) < 0
+    change = abs_after - abs_before
+    entry_units = np.where(reversal, abs_after, np.maximum(change, 0))
+    exit_units = np.where(reversal, abs_before, np.maximum(-change, 0))
+
+    # Pernas: começa uma no início de cada grupo e depois de um saldo zerado;
+    # a reversão fecha a perna atual e abre a seguinte no mesmo negócio
+    new_leg = first.copy()
+    new_leg[1:] |= net_after[:-1] == 0
+    created = np.cumsum(new_leg.astype(np.int64) + reversal)
+    entry_leg = created - 1
+    exit_leg = entry_leg - reversal
+    n_legs = int(created[-1])
+    rows = np.arange(n)
+
+    # Negócio que abre cada perna e sentido da perna
+    leg_first = np.empty(n_legs, dtype=np.int64)
+    direction = np.empty(n_legs, dtype=np.int64)
+    leg_first[exit_leg[new_leg]] = rows[new_leg]
+    direction[exit_leg[new_leg]] = np.where(net_before[new_leg] != 0,
+                                            np.sign(net_before[new_leg]),
+                                            np.sign(net_after[new_leg]))
+    leg_first[entry_leg[reversal]] = rows[reversal]
+    direction[entry_leg[reversal]] = np.sign(net_after[reversal])
+
+    def total(legs, weights):
+        return np.bincount(legs, weights=weights, minlength=n_legs)
+
+    price = deals["price"]
+    in_units = total(entry_leg, entry_units)
+    out_units = total(exit_leg, exit_units)
+
+    # Volume aberto antes do intervalo conta no volume da perna truncada
+    truncated = np.zeros(n_legs, dtype=bool)
+    truncated[exit_leg[starts]] = seed != 0
+    opened = in_units.copy()
+    opened[exit_leg[starts]] += np.abs(seed)
+
+    # Custos de um negócio de reversão divididos pelo volume de cada perna;
+    # resultado e swap pertencem à perna fechada
+    moved = entry_units + exit_units
+    exit_share = np.where(moved > 0, exit_units / np.maximum(moved, 1), 1.0)
+
+    def split(values):
+        return total(exit_leg, values * exit_share) + total(entry_leg, values * (1 - exit_share))
+
+    # Último negócio de saída de cada perna
+    exits = np.flatnonzero(exit_units > 0)
+    exit_legs = exit_leg[exits]
+    last = np.r_[exit_legs[1:] != exit_legs[:-1], True] if len(exits) else np.empty(0, dtype=bool)
+    close_row = np.full(n_legs, -1, dtype=np.int64)
+    close_row[exit_legs[last]] = exits[last]
+    has_close = close_row >= 0
+
+    # Número da perna dentro da posição
+    leg_pid = pid[leg_first]
+    leg_starts = np.flatnonzero(np.r_[True, leg_pid[1:] != leg_pid[:-1]])
+    leg_number = np.arange(n_legs) - np.repeat(leg_starts, np.diff(np.r_[leg_starts, n_legs]))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        open_price = total(entry_leg, entry_units * price) / in_units
+        close_price = total(exit_leg, exit_units * price) / out_units
+
+    positions = np.zeros(n_legs, dtype=POSITION_DTYPE)
+    positions["position_id"] = leg_pid
+    positions["leg"] = leg_number
+    positions["symbol"] = names["symbol"][deals["symbol"][leg_first]]
+    positions["magic"] = deals["magic"][leg_first]
+    positions["comment"] = names["comment"][deals["comment"][leg_first]]
+    positions["type"] = np.where(direction >= 0, DEAL_TYPE_BUY, DEAL_TYPE_SELL)
+    positions["open_ticket"] = deals["ticket"][leg_first]
+    positions["open_time_msc"] = deals["time_msc"][leg_first]
+    positions["close_ticket"] = np.where(has_close, deals["ticket"][close_row], 0)
+    positions["close_time_msc"] = np.where(has_close, deals["time_msc"][close_row], 0)
+    positions["volume"] = opened / VOLUME_SCALE
+    positions["volume_closed"] = out_units / VOLUME_SCALE
+    positions["open_price"] = open_price
+    positions["close_price"] = close_price
+    positions["commission"] = split(deals["commission"])
+    positions["fee"] = split(deals["fee"])
+    positions["swap"] = total(exit_leg, deals["swap"])
+    positions["profit"] = total(exit_leg, deals["profit"])
+    positions["deals"] = total(exit_leg, None) + total(entry_leg[reversal], None)
+    positions["closed"] = has_close & (out_units >= opened)
+    positions["truncated"] = truncated
+
+    logger.info(f"{n_legs} posições reconstruídas a partir de {n} negócios")
+    return positions
+
+
+def group_cumsum(values, starts):
+    """Soma acumulada reiniciada no início de cada grupo (grupos contíguos)"""
+    cumulative = np.cumsum(values)
+    base = (cumulative - values)[starts]
+    return cumulative - np.repeat(base, np.diff(np.r_[starts, len(values)]))
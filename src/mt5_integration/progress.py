@@ -0,0 +1,99 @@
+# mt5_integration/progress.py
+
+from datetime import timedelta
+
+
+class ProgressEstimator:
+    """
+    Estimativa do total de negócios de uma extração para cálculo de progresso.
+
+    A estimativa inicial vem de sondagens somente de contagem
+    (history_deals_total) em sub-intervalos distribuídos pelo período; à medida
+    que os lotes reais chegam, a densidade observada passa a dominar.
+    """
+
+    def __init__(self, start_date, end_date, processed=0, samples=8,
+                 sample_span=timedelta(days=1), default_total=1000):
+        self.start_date = start_date
+        self.end_date = end_date
+        self.base_processed = processed
+        self.samples = samples
+        self.sample_span = sample_span
+        self.sampled_density = None
+        self.total = processed + default_total
+
+    def probe(self, count_fn):
+        """
+        Sonda a densidade de negócios do período.
+
+        Args:
+            count_fn (callable): Função (date_from, date_to) -> int, como
+                mt5.history_deals_total
+
+        Returns:
+            int: Total estimado de negócios
+        """
+        span = self.end_date - self.start_date
+        if span.total_seconds() <= 0:
+            self.total = self.base_processed
+            return self.total
+
+        # Períodos curtos são contados por inteiro
+        if span <= self.sample_span * self.samples:
+            windows = [(self.start_date, self.end_date)]
+        else:
+            # Uma amostra centralizada em cada fatia do período
+            step = span / self.samples
+            offset = (step - self.sample_span) / 2
+            windows = [(self.start_date + step * i + offset,
+                        self.start_date + step * i + offset + self.sample_span)
+                       for i in range(self.samples)]
+
+        counted = 0
+        seconds = 0
+        for date_from, date_to in windows:
+            count = count_fn(date_from, date_to)
+            if count is None or count < 0:
+                continue
+            counted += count
+            seconds += (date_to - date_from).total_seconds()
+
+        if seconds:
+            self.sampled_density = counted / seconds
+            self.total = max(self.base_processed + int(self.sampled_density * span.total_seconds()), 1)
+
+        return self.total
+
+    def update(self, processed, covered_until):
+        """
+        Refina a estimativa com os negócios efetivamente extraídos.
+
+        Args:
+            processed (int): Total de negócios processados até agora
+            covered_until (datetime): Fim do trecho já extraído
+
+        Returns:
+            int: Total estimado de negócios (nunca menor que o processado)
+        """
+        span = (self.end_date - self.start_date).total_seconds()
+        covered = (covered_until - self.start_date).total_seconds()
+        remaining = max((self.end_date - covered_until).total_seconds(), 0)
+
+        if span <= 0 or covered <= 0:
+            return self.total
+
+        observed_density = (processed - self.base_processed) / covered
+
+        # Pondera amostra e observação pela fração já percorrida
+        if self.sampled_density is None:
+            density = observed_density
+        else:
+            weight = min(covered / span, 1.0)
+            density = (1 - weight) * self.sampled_density + weight * observed_density
+
+        self.total = max(processed + int(remaining * density), processed, 1)
+        return self.total
+
+    def progress(self, processed):
+        """Percentual de progresso (até 99 enquanto a extração não termina)"""
+        return min(int(processed / max(self.total, 1) * 100), 99)
@@ -0,0 +1,63 @@
+# run_batch.py - extração em lote de várias contas (ex.: job noturno)
+
+import argparse
+import json
+import logging
+from datetime import datetime
+from pathlib import Path
+
+# Importar do mesmo diretório
+from batch import BatchExtractor
+from utils import create_directory_structure, setup_logging
+
+
+def run_batch(accounts_file, terminals_file, data_dir="./data", log_level="INFO"):
+    """
+    Extrai as contas listadas em accounts_file usando os terminais de
+    terminals_file, um processo por terminal.
+    
+    Args:
+        accounts_file (str): JSON {"accounts": [{login, server, password,
+            start_date, end_date}]} (datas em ISO 8601)
+        terminals_file (str): JSON {"terminals": [{path, login, password, server}]}
+        data_dir (str): Diretório para armazenamento de dados
+        log_level (str): Nível de logging
+    
+    Returns:
+        dict: Resumo do lote
+    """
+    data_dir = Path(data_dir).resolve()
+    create_directory_structure(data_dir)
+    setup_logging(f"{data_dir}/logs", getattr(logging, log_level.upper(), logging.INFO))
+    
+    with open(accounts_file, 'r') as f:
+        accounts = json.load(f).get("accounts", [])
+    with open(terminals_file, 'r') as f:
+        terminals = json.load(f).get("terminals", [])
+    
+    for account in accounts:
+        for key in ("start_date", "end_date"):
+            if account.get(key):
+                account[key] = datetime.fromisoformat(account[key])
+    
+    batch = BatchExtractor.from_terminals(terminals, str(data_dir))
+    try:
+        return batch.run(accounts)
+    finally:
+        batch.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extração em lote de contas MT5")
+    parser.add_argument("--accounts", type=str, required=True, help="JSON com as contas")
+    parser.add_argument("--terminals", type=str, required=True, help="JSON com os terminais")
+    parser.add_argument("--data", type=str, default="./data", help="Diretório para dados")
+    parser.add_argument("--log-level", type=str, default="INFO", help="Nível de log (DEBUG, INFO, WARNING, ERROR)")
+    
+    args = parser.parse_args()
+    summary = run_batch(args.accounts, args.terminals, args.data, args.log_level)
+    
+    print(f"Contas extraídas: {summary['succeeded']}/{summary['accounts']}")
+    print(f"Operações: {summary['operations']} ({summary['throughput_ops_s']} op/s)")
+    for failure in summary["failures"]:
+        print(f"  Falha na conta {failure['login']} ({failure['server']}): {failure['error']}")
@@ -1,6 +1,7 @@
 # run_server.py atualizado com seleção interativa de conta
 
 import argparse
+import json
 import logging
 import time
 import os
@@ -75,7 +76,8 @@ def select_account_interactive(connector):
     
     return result
 
-def run_server(port=5555, data_dir="./data", log_level="INFO", account_mode="interactive"):
+def run_server(port=5555, data_dir="./data", log_level="INFO", account_mode="interactive",
+               terminals_file=None):
     """
     Inicializa e executa o servidor ZeroMQ para integração MT5.
     
@@ -87,6 +89,9 @@ def run_server(port=5555, data_dir="./data", log_level="INFO", account_mode="int
             - "interactive": Selecionar conta interativamente
             - "auto": Usar preferência salva ou primeira disponível
             - "none": Não selecionar conta (usar a atual)
+        terminals_file (str, optional): JSON com terminais adicionais
+            ({"terminals": [{"path", "login", "password", "server"}]}),
+            cada um atendido por um processo próprio
     """
     # Converter para caminho absoluto
     data_dir = Path(data_dir).resolve()
@@ -124,7 +129,14 @@ def run_server(port=5555, data_dir="./data", log_level="INFO", account_mode="int
     logger.info(f"Diretório de dados: {data_dir}")
     
     # Cria e inicia servidor usando o conector já inicializado
-    server = MT5ZMQServer(port=port, data_dir=str(data_dir), connector=connector)
+    terminals = None
+    if terminals_file:
+        with open(terminals_file, 'r') as f:
+            terminals = json.load(f).get("terminals", [])
+        logger.info(f"{len(terminals)} terminais adicionais configurados")
+    
+    server = MT5ZMQServer(port=port, data_dir=str(data_dir), connector=connector,
+                          terminals=terminals)
     success = server.start()
     
     if not success:
@@ -149,6 +161,8 @@ if __name__ == "__main__":
     parser.add_argument("--log-level", type=str, default="INFO", help="Nível de log (DEBUG, INFO, WARNING, ERROR)")
     parser.add_argument("--account", type=str, choices=["interactive", "auto", "none"], 
                         default="interactive", help="Modo de seleção de conta")
+    parser.add_argument("--terminals", type=str, default=None,
+                        help="JSON com terminais adicionais (um processo por terminal)")
     
     args = parser.parse_args()
-    run_server(args.port, args.data, args.log_level, args.account)
\ No newline at end of file
+    run_server(args.port, args.data, args.log_level, args.account, args.terminals)
\ No newline at end of file
@@ -0,0 +1,130 @@
+# mt5_integration/scheduler.py
+
+import itertools
+import logging
+import queue
+import threading
+
+from gate import mt5_gate, PRIORITY_INTERACTIVE, PRIORITY_NIGHTLY
+
+# Configurar logger
+logger = logging.getLogger("MT5Scheduler")
+
+PRIORITIES = {
+    "interactive": PRIORITY_INTERACTIVE,
+    "nightly": PRIORITY_NIGHTLY,
+}
+
+
+class JobScheduler:
+    """
+    Fila de jobs (extrações) com limite de tamanho, prioridades e número
+    máximo de jobs simultâneos.
+
+    Cada worker assume a prioridade do job no portão do terminal (mt5_gate),
+    então chamadas de um job interativo passam à frente das de um noturno.
+    """
+
+    def __init__(self, max_concurrent=2, max_queue=16):
+        """
+        Args:
+            max_concurrent (int): Jobs executados ao mesmo tempo
+            max_queue (int): Jobs aguardando na fila (excedente é recusado)
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._queued = {}  # job_id -> sequência da entrada válida na fila
+        self._running = set()
+        self._threads = []
+
+    def start(self):
+        """Inicia os workers"""
+        if self._threads:
+            return
+        for i in range(self.max_concurrent):
+            thread = threading.Thread(target=self._worker, name=f"mt5-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Encerra os workers após os jobs em execução"""
+        for _ in self._threads:
+            # Sentinela com prioridade máxima para sair antes dos jobs pendentes
+            self._queue.put((float("-inf"), next(self._seq), None, None, (), {}))
+        self._threads = []
+
+    def submit(self, job_id, fn, *args, priority="interactive", **kwargs):
+        """
+        Enfileira um job.
+
+        Raises:
+            ValueError: Prioridade desconhecida ou job já enfileirado
+            queue.Full: Fila cheia
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Prioridade desconhecida: {priority}")
+
+        with self._lock:
+            if job_id in self._queued or job_id in self._running:
+                raise ValueError(f"Job {job_id} já está na fila")
+            if len(self._queued) >= self.max_queue:
+                raise queue.Full(f"Fila de jobs cheia ({self.max_queue})")
+            seq = next(self._seq)
+            self._queue.put((PRIORITIES[priority], seq, job_id, fn, args, kwargs))
+            self._queued[job_id] = seq
+
+        logger.info(f"Job {job_id} enfileirado ({priority})")
+
+    def cancel(self, job_id):
+        """
+        Retira um job ainda não iniciado da fila.
+
+        Returns:
+            bool: True se o job estava na fila
+        """
+        with self._lock:
+            # A entrada fica na fila e é descartada quando um worker a retirar
+            return self._queued.pop(job_id, None) is not None
+
+    def state(self, job_id):
+        """'queued', 'running' ou None"""
+        with self._lock:
+            if job_id in self._running:
+                return "running"
+            if job_id in self._queued:
+                return "queued"
+            return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "queued": len(self._queued),
+                "running": len(self._running),
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue
+            }
+
+    def _worker(self):
+        while True:
+            priority, seq, job_id, fn, args, kwargs = self._queue.get()
+            if fn is None:
+                return
+
+            with self._lock:
+                if self._queued.get(job_id) != seq:
+                    continue  # cancelado enquanto aguardava
+                del self._queued[job_id]
+                self._running.add(job_id)
+
+            mt5_gate.set_priority(priority)
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                logger.exception(f"Erro no job {job_id}: {str(e)}")
+            finally:
+                mt5_gate.set_priority(PRIORITY_INTERACTIVE)
+                with self._lock:
+                    self._running.discard(job_id)
@@ -0,0 +1,336 @@
+# mt5_integration/storage.py
+
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# pyarrow é opcional: sem ele as extrações continuam sendo gravadas em CSV
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+from deals import DealBatch, DEAL_DTYPE, DEAL_FIELDS, to_msc
+
+# Configurar logger
+logger = logging.getLogger("MT5Storage")
+
+
+class ExtractionStorage:
+    """
+    Backend de armazenamento de extrações.
+
+    Cada conjunto de dados (extração ou backtest) é identificado por um ID e
+    gravado em um único arquivo dentro de base_dir. As subclasses definem o
+    formato; leituras aceitam filtros por intervalo de tempo e símbolo.
+    """
+
+    format_name = None
+    extension = None
+
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+
+    def path(self, dataset_id):
+        """Caminho do arquivo de operações do conjunto de dados"""
+        return self.base_dir / f"{dataset_id}_operations{self.extension}"
+
+    def exists(self, dataset_id):
+        return self.path(dataset_id).exists()
+
+    def open_writer(self, dataset_id):
+        """Abre gravador incremental (write/commit/abort) para o conjunto de dados"""
+        raise NotImplementedError
+
+    def iter_batches(self, dataset_id, start=None, end=None, symbols=None):
+        """Percorre o conjunto de dados em lotes, aplicando os filtros"""
+        raise NotImplementedError
+
+    def read(self, dataset_id, start=None, end=None, symbols=None):
+        """
+        Lê o conjunto de dados para um único DealBatch.
+
+        Args:
+            dataset_id (str): ID da extração ou backtest
+            start (datetime, optional): Início do intervalo (inclusivo)
+            end (datetime, optional): Fim do intervalo (inclusivo)
+            symbols (list, optional): Símbolos desejados
+
+        Returns:
+            DealBatch: Operações filtradas
+        """
+        return DealBatch.concat(self.iter_batches(dataset_id, start, end, symbols))
+
+    def export_csv(self, dataset_id, csv_path=None):
+        """Exporta o conjunto de dados para CSV (consumidores legados)"""
+        csv_path = Path(csv_path) if csv_path else self.base_dir / f"{dataset_id}_operations.csv"
+        if csv_path == self.path(dataset_id):
+            return csv_path
+
+        first = True
+        with open(csv_path, 'w', newline='') as f:
+            for batch in self.iter_batches(dataset_id):
+                batch.to_frame().to_csv(f, index=False, header=first)
+                first = False
+            if first:
+                DealBatch().to_frame().to_csv(f, index=False)
+
+        logger.info(f"Extração {dataset_id} exportada para CSV: {csv_path}")
+        return csv_path
+
+    @staticmethod
+    def _filter(batch, start_msc, end_msc, symbols):
+        """Aplica filtro exato de tempo e símbolo a um lote"""
+        mask = np.ones(len(batch), dtype=bool)
+        if start_msc is not None:
+            mask &= batch["time_msc"] >= start_msc
+        if end_msc is not None:
+            mask &= batch["time_msc"] <= end_msc
+        if symbols:
+            mask &= np.isin(batch["symbol"], list(symbols))
+        return batch if mask.all() else batch[mask]
+
+
+class CsvStorage(ExtractionStorage):
+    """Armazenamento legado em CSV (sem tipos, lido por inteiro)"""
+
+    format_name = "csv"
+    extension = ".csv"
+
+    def open_writer(self, dataset_id):
+        return _CsvWriter(self.path(dataset_id))
+
+    def iter_batches(self, dataset_id, start=None, end=None, symbols=None, chunksize=100000):
+        start_msc, end_msc = to_msc(start), to_msc(end)
+        dtypes = {name: DEAL_DTYPE[name].str if DEAL_DTYPE[name].kind != "U" else str
+                  for name in DEAL_FIELDS}
+
+        for chunk in pd.read_csv(self.path(dataset_id), dtype=dtypes,
+                                 keep_default_na=False, chunksize=chunksize):
+            batch = self._filter(DealBatch.from_frame(chunk), start_msc, end_msc, symbols)
+            if len(batch):
+                yield batch
+
+
+class ParquetStorage(ExtractionStorage):
+    """
+    Armazenamento colunar, tipado e comprimido em Parquet.
+
+    Os negócios são acumulados em row groups grandes (row_group_size),
+    preenchidos na ordem da extração e ordenados por (símbolo, tempo) dentro
+    do row group: as estatísticas de time_msc descartam row groups fora do
+    intervalo pedido e a ordenação por símbolo melhora a compressão. A
+    leitura devolve os negócios em ordem cronológica, como o CSV.
+    """
+
+    format_name = "parquet"
+    extension = ".parquet"
+
+    def __init__(self, base_dir, compression="zstd", row_group_size=131072):
+        if pa is None:
+            raise ImportError("pyarrow é necessário para o armazenamento Parquet")
+        super().__init__(base_dir)
+        self.compression = compression
+        self.row_group_size = row_group_size
+
+    def open_writer(self, dataset_id):
+        return _ParquetWriter(self.path(dataset_id), self.compression, self.row_group_size)
+
+    def iter_batches(self, dataset_id, start=None, end=None, symbols=None):
+        start_msc, end_msc = to_msc(start), to_msc(end)
+        parquet_file = pq.ParquetFile(self.path(dataset_id))
+
+        for index in self._select_row_groups(parquet_file.metadata, start_msc, end_msc, symbols):
+            table = parquet_file.read_row_group(index)
+            batch = self._filter(_table_to_batch(table), start_msc, end_msc, symbols)
+            if len(batch):
+                yield _chronological(batch)
+
+    def read(self, dataset_id, start=None, end=None, symbols=None):
+        # Sem filtros o arquivo é lido de uma vez, sem percorrer row groups
+        if start is None and end is None and not symbols:
+            return _chronological(_table_to_batch(pq.read_table(self.path(dataset_id))))
+        return super().read(dataset_id, start, end, symbols)
+
+    @staticmethod
+    def _select_row_groups(metadata, start_msc, end_msc, symbols):
+        """Seleciona row groups pelas estatísticas (min/max) de time_msc e symbol"""
+        columns = {metadata.schema.column(i).name: i for i in range(metadata.num_columns)}
+        symbols = set(symbols) if symbols else None
+
+        for index in range(metadata.num_row_groups):
+            row_group = metadata.row_group(index)
+
+            time_stats = row_group.column(columns["time_msc"]).statistics
+            if time_stats is not None and time_stats.has_min_max:
+                if start_msc is not None and time_stats.max < start_msc:
+                    continue
+                if end_msc is not None and time_stats.min > end_msc:
+                    continue
+
+            symbol_stats = row_group.column(columns["symbol"]).statistics
+            if symbols and symbol_stats is not None and symbol_stats.has_min_max:
+                if not any(symbol_stats.min <= s <= symbol_stats.max for s in symbols):
+                    continue
+
+            yield index
+
+
+def get_storage(base_dir, storage_format="parquet"):
+    """
+    Cria o backend de armazenamento para o formato desejado.
+    Se pyarrow não estiver disponível, recai para CSV.
+    """
+    if storage_format == "parquet":
+        if pa is not None:
+            return ParquetStorage(base_dir)
+        logger.warning("pyarrow não instalado; usando armazenamento CSV")
+        return CsvStorage(base_dir)
+
+    if storage_format == "csv":
+        return CsvStorage(base_dir)
+
+    raise ValueError(f"Formato de armazenamento desconhecido: {storage_format}")
+
+
+def _arrow_schema():
+    """Schema Arrow equivalente a DEAL_DTYPE"""
+    types = {"i": {4: pa.int32(), 8: pa.int64()}, "f": {8: pa.float64()}}
+    fields = []
+    for name in DEAL_FIELDS:
+        dtype = DEAL_DTYPE[name]
+        arrow_type = pa.string() if dtype.kind == "U" else types[dtype.kind][dtype.itemsize]
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields)
+
+
+def _batch_to_table(batch, schema):
+    return pa.Table.from_arrays([pa.array(batch[name]) for name in DEAL_FIELDS], schema=schema)
+
+
+def _chronological(batch):
+    """Ordena um lote por (time_msc, ticket), a ordem em que o MT5 entrega"""
+    order = np.lexsort((batch["ticket"], batch["time_msc"]))
+    return DealBatch(batch.records[order])
+
+
+def _table_to_batch(table):
+    records = np.zeros(table.num_rows, dtype=DEAL_DTYPE)
+    for name in DEAL_FIELDS:
+        if name in table.column_names:
+            records[name] = table.column(name).to_numpy(zero_copy_only=False)
+    return DealBatch(records)
+
+
+class _CsvWriter:
+    """
+    Grava operações em CSV de forma incremental, um lote por vez.
+
+    O arquivo é escrito com sufixo .part e só recebe o nome final em commit(),
+    para que consumidores nunca leiam uma extração incompleta. Uma extração
+    sem negócios também gera o arquivo (somente o cabeçalho).
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.part_path = self.path.with_name(self.path.name + ".part")
+        self.file = None
+        self.rows = 0
+
+    def write(self, batch):
+        """Anexa um lote de operações (DealBatch) ao arquivo parcial"""
+        if not len(batch):
+            return
+
+        first = self.file is None
+        if first:
+            self._open()
+
+        batch.to_frame().to_csv(self.file, index=False, header=first)
+        self.rows += len(batch)
+
+    def _open(self):
+        self.file = open(self.part_path, 'w', newline='')
+
+    def _close(self):
+        if not self.rows:
+            # Nenhum lote gravado: arquivo só com o cabeçalho
+            DealBatch().to_frame().to_csv(self.file, index=False)
+        self.file.close()
+
+    def commit(self):
+        """Fecha o arquivo parcial e o publica com o nome final"""
+        if self.file is None:
+            self._open()
+
+        self._close()
+        os.replace(self.part_path, self.path)
+        self.file = None
+
+    def abort(self):
+        """Fecha e apaga o arquivo parcial sem publicá-lo"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.part_path.unlink(missing_ok=True)
+
+
+class _ParquetWriter(_CsvWriter):
+    """
+    Gravador Parquet incremental: acumula lotes até row_group_size negócios
+    e grava cada row group ordenado por (símbolo, tempo)
+    """
+
+    def __init__(self, path, compression, row_group_size):
+        super().__init__(path)
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.schema = _arrow_schema()
+        self.buffer = []
+        self.buffered = 0
+
+    def write(self, batch):
+        if not len(batch):
+            return
+
+        if self.file is None:
+            self._open()
+
+        self.buffer.append(batch.records)
+        self.buffered += len(batch)
+        self.rows += len(batch)
+
+        while self.buffered >= self.row_group_size:
+            records = np.concatenate(self.buffer)
+            self._write_row_group(records[:self.row_group_size])
+            rest = records[self.row_group_size:]
+            self.buffer = [rest] if len(rest) else []
+            self.buffered = len(rest)
+
+    def _write_row_group(self, records):
+        records = records[np.lexsort((records["ticket"], records["time_msc"], records["symbol"]))]
+        self.file.write_table(_batch_to_table(DealBatch(records), self.schema),
+                              row_group_size=len(records))
+
+    def _open(self):
+        self.file = pq.ParquetWriter(self.part_path, self.schema, compression=self.compression)
+
+    def _close(self):
+        # Restante do buffer vira o último row group; sem negócios o arquivo
+        # fica só com o schema
+        if self.buffered:
+            self._write_row_group(np.concatenate(self.buffer))
+        self.buffer = []
+        self.buffered = 0
+        self.file.close()
+
+    def abort(self):
+        self.buffer = []
+        self.buffered = 0
+        super().abort()
@@ -0,0 +1,244 @@
+# mt5_integration/terminal_pool.py
+
+import logging
+import multiprocessing
+import threading
+
+# Configurar logger
+logger = logging.getLogger("MT5TerminalPool")
+
+
+class TerminalWorker:
+    """
+    Processo dedicado a uma instalação do terminal MT5.
+
+    A biblioteca MetaTrader5 é global ao processo (uma conexão por processo),
+    então cada terminal ganha um processo próprio com seu MT5Connector e seu
+    MT5Extractor. A comunicação é feita por um Pipe, uma requisição por vez;
+    durante uma extração o processo envia o progresso e aguarda a resposta do
+    callback, o que preserva o cancelamento.
+    """
+
+    def __init__(self, terminal, data_dir="./data", storage_format="parquet"):
+        """
+        Args:
+            terminal (dict): path, login, password e server do terminal
+            data_dir (str): Diretório de dados compartilhado
+            storage_format (str): Formato de armazenamento das extrações
+        """
+        self.terminal = dict(terminal)
+        self.login = int(terminal["login"])
+        self.data_dir = str(data_dir)
+        self.storage_format = storage_format
+        self.process = None
+        self.conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    @property
+    def busy(self):
+        return self._lock.locked()
+
+    def start(self):
+        """Inicia o processo do terminal (se ainda não estiver ativo)"""
+        if self.alive:
+            return
+
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_terminal_main,
+            args=(child_conn, self.terminal, self.data_dir, self.storage_format),
+            name=f"mt5-terminal-{self.login}",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        logger.info(f"Processo do terminal {self.login} iniciado (pid {self.process.pid})")
+
+    def stop(self, timeout=10):
+        """Encerra o processo do terminal"""
+        if not self.alive:
+            return
+
+        # Se uma extração ainda ocupa o Pipe, o processo é finalizado à força
+        if self._lock.acquire(timeout=timeout):
+            try:
+                self.conn.send(("shutdown", {}))
+                self.process.join(timeout)
+            except (OSError, EOFError):
+                pass
+            finally:
+                self._lock.release()
+
+        if self.process.is_alive():
+            self.process.terminate()
+        logger.info(f"Processo do terminal {self.login} encerrado")
+
+    def request(self, command, callback=None, **kwargs):
+        """
+        Executa um comando no processo do terminal.
+
+        Args:
+            command (str): "status" ou "extract"
+            callback (callable, optional): Recebe o progresso da extração;
+                retornar False interrompe a extração
+
+        Returns:
+            Resultado do comando
+        """
+        with self._lock:
+            self.start()
+
+            try:
+                self.conn.send((command, kwargs))
+                while True:
+                    kind, payload = self.conn.recv()
+                    if kind == "progress":
+                        proceed = callback(*payload) if callback else True
+                        self.conn.send(proceed is not False)
+                    elif kind == "error":
+                        raise RuntimeError(payload)
+                    else:
+                        return payload
+            except (EOFError, OSError) as e:
+                # Processo morreu: o próximo comando inicia outro
+                logger.error(f"Processo do terminal {self.login} encerrou inesperadamente: {str(e)}")
+                raise ConnectionError(f"Terminal {self.login} indisponível")
+
+
+class TerminalPool:
+    """
+    Conjunto de terminais MT5, um processo por instalação, roteado por login.
+
+    Extrações de contas diferentes rodam em paralelo, cada uma no seu
+    terminal, sem trocas de login no terminal principal.
+    """
+
+    def __init__(self, terminals, data_dir="./data", storage_format="parquet"):
+        """
+        Args:
+            terminals (list): Configurações {path, login, password, server}
+            data_dir (str): Diretório de dados compartilhado
+            storage_format (str): Formato de armazenamento das extrações
+        """
+        self.workers = {}
+        for terminal in terminals:
+            worker = TerminalWorker(terminal, data_dir, storage_format)
+            if worker.login in self.workers:
+                raise ValueError(f"Login {worker.login} configurado em mais de um terminal")
+            self.workers[worker.login] = worker
+
+    def __len__(self):
+        return len(self.workers)
+
+    def has(self, login):
+        try:
+            return int(login) in self.workers
+        except (TypeError, ValueError):
+            return False
+
+    def route(self, login):
+        """Terminal responsável pelo login"""
+        worker = self.workers.get(int(login))
+        if worker is None:
+            raise KeyError(f"Nenhum terminal configurado para o login {login}")
+        return worker
+
+    def extract(self, login, callback=None, worker=None, **kwargs):
+        """
+        Executa uma extração no terminal da conta (ver _terminal_main).
+        Com worker informado, a conta é atendida por esse terminal, que troca
+        de login se necessário (password/server em kwargs).
+        """
+        worker = worker or self.route(login)
+        return worker.request("extract", callback=callback, login=int(login), **kwargs)
+
+    def connection_status(self, login):
+        """Status da conexão lido no terminal da conta"""
+        return self.route(login).request("status")
+
+    def status(self):
+        """Estado dos processos, sem consultar os terminais"""
+        return [
+            {
+                "login": worker.login,
+                "server": worker.terminal.get("server"),
+                "path": worker.terminal.get("path"),
+                "alive": worker.alive,
+                "busy": worker.busy
+            }
+            for worker in self.workers.values()
+        ]
+
+    def stop(self):
+        for worker in self.workers.values():
+            worker.stop()
+
+
+def _terminal_main(conn, terminal, data_dir, storage_format):
+    """Laço do processo de um terminal: atende comandos recebidos pelo Pipe"""
+    # Importados no processo filho: cada processo tem seu próprio MetaTrader5
+    from mt5_connector import MT5Connector, select_account
+    from extractor import MT5Extractor
+
+    connector = MT5Connector(terminal.get("path"), terminal.get("login"),
+                             terminal.get("password"), terminal.get("server"))
+    extractor = MT5Extractor(data_dir, storage_format)
+    connector.connect()
+
+    def progress(*args):
+        conn.send(("progress", args))
+        return conn.recv()
+
+    while True:
+        try:
+            command, kwargs = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+
+        if command == "shutdown":
+            break
+
+        try:
+            if command == "status":
+                result = connector.get_connection_status()
+            elif command == "extract":
+                # Contas sem terminal próprio são atendidas trocando o login
+                password = kwargs.pop("password", None)
+                login = kwargs.get("login")
+                if login and int(login) == int(terminal["login"]):
+                    password = password or terminal.get("password")
+                if login and int(login) != int(connector.login or 0):
+                    if not select_account(connector, int(login), password, kwargs.get("server")):
+                        raise ConnectionError(f"Falha ao entrar na conta {login}")
+                result = _run_extract(extractor, progress, **kwargs)
+            else:
+                raise ValueError(f"Comando desconhecido: {command}")
+            conn.send(("result", result))
+        except Exception as e:
+            logger.exception(f"Erro no terminal {terminal.get('login')}: {str(e)}")
+            conn.send(("error", str(e)))
+
+    connector.disconnect()
+
+
+def _run_extract(extractor, callback, mode="full", login=None, server=None,
+                 start_date=None, end_date=None, extract_id=None):
+    if mode == "incremental":
+        result = extractor.extract_incremental(
+            login=login, server=server, start_date=start_date, end_date=end_date,
+            callback=callback, extract_id=extract_id
+        )
+    else:
+        result = extractor.extract_history(
+            start_date=start_date, end_date=end_date, extract_id=extract_id,
+            callback=callback, keep_operations=False
+        )
+
+    # Os negócios ficam no storage compartilhado; só os metadados voltam
+    result["operations"] = None
+    return result
@@ -0,0 +1,114 @@
+# mt5_integration/transfer.py
+
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from deals import DEAL_DTYPE, DEAL_FIELDS
+
+
+class ChunkedTransfer:
+    """
+    Envio de um conjunto de dados em blocos de até chunk_size negócios com
+    controle de fluxo por créditos.
+
+    Cada crédito concedido pelo cliente autoriza o envio de um bloco; os lotes
+    do storage são lidos sob demanda, então apenas o bloco corrente fica em
+    memória, independente do tamanho total do conjunto.
+    """
+
+    def __init__(self, batches, chunk_size=50000, columns=None):
+        """
+        Args:
+            batches (iterable): Lotes (DealBatch) já filtrados pelo storage
+            chunk_size (int): Máximo de negócios por bloco
+            columns (list, optional): Colunas enviadas (todas se omitido)
+        """
+        columns = list(columns) if columns else list(DEAL_FIELDS)
+        unknown = [c for c in columns if c not in DEAL_FIELDS]
+        if unknown:
+            raise ValueError(f"Colunas desconhecidas: {', '.join(unknown)}")
+
+        self.transfer_id = uuid.uuid4().hex
+        self.columns = columns
+        self.chunk_size = max(int(chunk_size), 1)
+        self.credit = 0
+        self.seq = 0
+        self.rows = 0
+        self.done = False
+        self.envelope = None
+        self.request_id = None
+        self.last_activity = time.monotonic()
+        self.lock = threading.Lock()
+
+        self._batches = iter(batches)
+        self._buffer = None
+
+    def grant(self, credit, envelope, request_id=None):
+        """Soma créditos e atualiza o destino dos próximos blocos"""
+        self.credit += max(int(credit), 0)
+        self.envelope = envelope
+        self.request_id = request_id
+        self.last_activity = time.monotonic()
+
+    def next_chunk(self):
+        """
+        Lê o próximo bloco, consumindo um crédito.
+
+        Returns:
+            tuple: (cabeçalho, colunas) com colunas como dict nome -> array
+        """
+        records = self._take(self.chunk_size)
+        self.done = self._peek_exhausted()
+        self.credit -= 1
+        self.rows += len(records)
+        self.last_activity = time.monotonic()
+
+        header = {
+            "success": True,
+            "transfer_id": self.transfer_id,
+            "seq": self.seq,
+            "rows": len(records),
+            "total_rows": self.rows,
+            "columns": self.columns,
+            "last": self.done
+        }
+        if self.request_id is not None:
+            header["requestId"] = self.request_id
+        self.seq += 1
+
+        return header, {name: records[name] for name in self.columns}
+
+    def idle_for(self):
+        """Segundos desde a última atividade"""
+        return time.monotonic() - self.last_activity
+
+    def _take(self, count):
+        parts = []
+        needed = count
+        while needed > 0:
+            if self._buffer is None or not len(self._buffer):
+                self._buffer = self._next_records()
+                if self._buffer is None:
+                    break
+            parts.append(self._buffer[:needed])
+            self._buffer = self._buffer[needed:]
+            needed -= len(parts[-1])
+
+        if not parts:
+            return np.zeros(0, dtype=DEAL_DTYPE)
+        return np.concatenate(parts) if len(parts) > 1 else parts[0]
+
+    def _peek_exhausted(self):
+        if self._buffer is not None and len(self._buffer):
+            return False
+        self._buffer = self._next_records()
+        return self._buffer is None
+
+    def _next_records(self):
+        for batch in self._batches:
+            if len(batch):
+                return batch.records
+        return None
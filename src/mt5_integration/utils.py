@@ -3,10 +3,20 @@
 import os
 import json
 import logging
+import math
 import hashlib
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+# Trava entre processos: fcntl em POSIX, msvcrt no Windows
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    import msvcrt
+
 # Funções utilitárias compartilhadas
 
 def create_directory_structure(base_dir):
@@ -83,4 +93,39 @@ def backup_file(file_path, backup_dir="./data/backups"):
         
     except Exception as e:
         logging.error(f"Erro ao fazer backup de {file_path}: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+@contextmanager
+def file_lock(lock_path):
+    """Trava exclusiva entre processos sobre o arquivo lock_path"""
+    with open(lock_path, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            # LK_LOCK desiste após ~10s: tenta de novo até conseguir
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+def stat_value(value):
+    """
+    Converte estatística para float nativo, serializável em JSON.
+    Valores ausentes (None, NaN, pd.NA) ou infinitos viram None.
+    """
+    try:
+        value = float(value)
+    except TypeError:
+        return None
+    return value if math.isfinite(value) else None
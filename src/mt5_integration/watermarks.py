@@ -0,0 +1,89 @@
+# mt5_integration/watermarks.py
+
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from utils import file_lock
+
+# Configurar logger
+logger = logging.getLogger("MT5Watermarks")
+
+
+class WatermarkStore:
+    """
+    Registro persistente do último negócio extraído por conta.
+
+    Cada entrada é identificada por servidor e login e guarda o time_msc e o
+    ticket do negócio mais recente já incorporado ao conjunto de dados da conta.
+
+    Os processos do TerminalPool compartilham o arquivo: a leitura, alteração
+    e gravação de update() ocorre sob uma trava de arquivo ({path}.lock),
+    além da trava entre threads.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self):
+        """Trava exclusiva entre threads e entre processos"""
+        with self._lock, file_lock(self.lock_path):
+            yield
+
+    @staticmethod
+    def key(login, server):
+        return f"{server}:{login}"
+
+    def get(self, login, server):
+        """Retorna o watermark da conta ou None se ela nunca foi extraída"""
+        with self._lock:
+            return self._load().get(self.key(login, server))
+
+    def update(self, login, server, last_time_msc, last_ticket, last_date, **extra):
+        """Registra o novo watermark da conta"""
+        with self._locked():
+            watermarks = self._load()
+            watermarks[self.key(login, server)] = dict(
+                extra,
+                login=login,
+                server=server,
+                last_time_msc=int(last_time_msc),
+                last_ticket=int(last_ticket),
+                last_date=last_date,
+                updated_at=datetime.now().isoformat()
+            )
+            self._save(watermarks)
+
+        logger.info(f"Watermark atualizado para {server}:{login}: {last_date} (ticket {last_ticket})")
+
+    def all(self):
+        """Retorna todos os watermarks registrados"""
+        with self._lock:
+            return list(self._load().values())
+
+    def _load(self):
+        if not self.path.exists():
+            return {}
+
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"Erro ao carregar watermarks: {str(e)}")
+            return {}
+
+    def _save(self, watermarks):
+        # Substituição atômica para não corromper o arquivo em caso de falha
+        # (temporário por processo: terminais do pool gravam o mesmo arquivo)
+        tmp_file = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(watermarks, f, indent=2)
+        os.replace(tmp_file, self.path)
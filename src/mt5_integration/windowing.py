@@ -0,0 +1,73 @@
+# mt5_integration/windowing.py
+
+from datetime import timedelta
+
+
+class AdaptiveWindow:
+    """
+    Tamanho da janela de extração ajustado à densidade de negócios.
+
+    Após cada janela o tamanho converge para o que produziria target_batch
+    negócios, limitado a [minimum, maximum] e a um fator max_step por passo.
+    Enquanto o tamanho atual não foi confirmado por uma janela real (início
+    ou após crescer), vale sondar a densidade com history_deals_total antes
+    de buscar os negócios.
+    """
+
+    def __init__(self, initial=timedelta(days=7), minimum=timedelta(hours=1),
+                 maximum=timedelta(days=180), target_batch=5000, max_step=4.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_batch = target_batch
+        self.max_step = max_step
+        self.size = self._clamp(initial)
+        self.validated = False
+
+    def window_end(self, current_date, end_date):
+        """Fim da próxima janela a partir de current_date"""
+        return min(current_date + self.size, end_date)
+
+    def needs_probe(self):
+        """Indica se o tamanho atual ainda não foi confirmado"""
+        return not self.validated
+
+    def fit_probe(self, count, duration):
+        """
+        Ajusta a janela a partir de uma sondagem de contagem.
+
+        Returns:
+            bool: True se a janela foi reduzida (a contagem deixa de valer)
+        """
+        self.validated = True
+        if count is None or count <= self.target_batch * 2:
+            return False
+
+        ideal = self._ideal(count, duration)
+        if ideal >= self.size:
+            return False
+
+        self.size = self._clamp(ideal)
+        return True
+
+    def observe(self, count, duration):
+        """Atualiza o tamanho com base nos negócios retornados por uma janela"""
+        if count is None:
+            return
+
+        if count <= 0:
+            proposed = self.size * self.max_step
+        else:
+            proposed = self._ideal(count, duration)
+            proposed = max(min(proposed, self.size * self.max_step), self.size / self.max_step)
+
+        # Janela vazia não informa densidade: a próxima continua sem confirmação
+        new_size = self._clamp(proposed)
+        self.validated = count > 0 and new_size <= self.size
+        self.size = new_size
+
+    def _ideal(self, count, duration):
+        seconds = max(duration.total_seconds(), 1)
+        return timedelta(seconds=seconds * self.target_batch / count)
+
+    def _clamp(self, size):
+        return max(self.minimum, min(size, self.maximum))
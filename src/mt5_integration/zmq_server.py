@@ -2,13 +2,25 @@
 import zmq
 import json
 import logging
+import queue
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from pathlib import Path
+from types import MappingProxyType
 
 # Importar do mesmo diretório
 from mt5_connector import MT5Connector
 from extractor import MT5Extractor
+from adherence import AdherenceEngine
+from metrics import EAMetricsEngine
+from backtest_import import BacktestImporter
+import codec
+from transfer import ChunkedTransfer
+from scheduler import JobScheduler, PRIORITIES
+from terminal_pool import TerminalPool
+from batch import BatchExtractor
 
 
 
@@ -18,23 +30,78 @@ logger = logging.getLogger("ZMQServer")
 class MT5ZMQServer:
     """
     Servidor ZeroMQ para interface com backend Node.js.
-    Implementa padrão de comunicação Request-Reply.
+    
+    Front-end ROUTER compatível com clientes REQ e DEALER: ações baratas
+    (FAST_ACTIONS) são respondidas no próprio loop e as demais vão para um
+    pool de workers, cujas respostas voltam ao loop por um socket inproc.
+    
+    Eventos de extração (progresso, conclusão, erro) são publicados em um
+    socket PUB na porta pub_port, com tópico "extract:<extract_id>".
     """
     
-    def __init__(self, port=5555, data_dir="./data"):
+    # Ações que não tocam o terminal de forma demorada e não devem esperar fila
+    FAST_ACTIONS = ("status", "extract_status")
+    
+    # Ações de transferência em blocos: respondidas pelos próprios blocos
+    STREAM_ACTIONS = ("fetch_extraction", "fetch_credit")
+    
+    # Transferências sem crédito novo por mais que isso são descartadas (s)
+    TRANSFER_TTL = 300
+    
+    def __init__(self, port=5555, data_dir="./data", workers=4, pub_port=None,
+                 max_extractions=2, max_queued_extractions=16, status_ttl=15,
+                 connector=None, terminals=None):
         self.port = port
+        self.pub_port = pub_port or port + 1
         self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.REP)
+        self.socket = self.context.socket(zmq.ROUTER)
         self.running = False
         self.thread = None
         
+        # Pool de workers e canal de retorno das respostas para o loop principal
+        self.workers = workers
+        self.executor = None
+        self.reply_endpoint = f"inproc://mt5-replies-{id(self)}"
+        self.reply_socket = self.context.socket(zmq.PULL)
+        self._local = threading.local()
+        
+        # Publicação de eventos: threads enviam ao loop, que repassa ao PUB
+        self.pub_socket = self.context.socket(zmq.PUB)
+        self.event_endpoint = f"inproc://mt5-events-{id(self)}"
+        self.event_socket = self.context.socket(zmq.PULL)
+        
         # Componentes de integração MT5
-        self.connector = MT5Connector()
+        self.connector = connector or MT5Connector()
         self.extractor = MT5Extractor(data_dir)
+        self.backtest_importer = BacktestImporter(data_dir)
         
         # Controle de progresso
         self.active_extractions = {}
         
+        # Terminais adicionais (um processo por instalação), roteados por login
+        self.terminal_pool = TerminalPool(terminals, data_dir) if terminals else None
+        if self.terminal_pool:
+            # Uma vaga por terminal do pool além das do terminal principal
+            max_extractions += len(self.terminal_pool)
+        
+        # Fila de extrações com prioridade e limite de concorrência
+        self.scheduler = JobScheduler(max_concurrent=max_extractions,
+                                      max_queue=max_queued_extractions)
+        
+        # Parâmetros das extrações agendadas, para retomada após pausa
+        self._extraction_jobs = {}
+        
+        # Métricas por EA em cache por extração (memória e processed/ea_metrics)
+        self.ea_metrics_cache = {}
+        self._metrics_lock = threading.Lock()
+        
+        # Transferências em blocos em andamento (fetch_extraction)
+        self.transfers = {}
+        
+        # Snapshot imutável do status, renovado pelo heartbeat: (instante, status)
+        self.status_ttl = status_ttl
+        self._status_snapshot = None
+        
         logger.info(f"ZMQServer inicializado na porta {port}")
     
     def start(self):
@@ -46,7 +113,17 @@ class MT5ZMQServer:
         try:
             endpoint = f"tcp://*:{self.port}"
             self.socket.bind(endpoint)
-            logger.info(f"Servidor vinculado a {endpoint}")
+            self.reply_socket.bind(self.reply_endpoint)
+            self.pub_socket.bind(f"tcp://*:{self.pub_port}")
+            self.event_socket.bind(self.event_endpoint)
+            logger.info(f"Servidor vinculado a {endpoint} (eventos na porta {self.pub_port})")
+            
+            self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                               thread_name_prefix="zmq-worker")
+            self.scheduler.start()
+            
+            # Extrações gravadas antes do índice (ou sem indexar) entram em segundo plano
+            self.executor.submit(self.extractor.index_pending_extractions)
             
             self.running = True
             self.thread = threading.Thread(target=self._run_server)
@@ -73,31 +150,44 @@ class MT5ZMQServer:
         self.running = False
         
         try:
-            self.socket.close()
-            self.context.term()
+            # O loop principal fecha os próprios sockets ao sair
+            if self.thread:
+                self.thread.join(timeout=5)
+            if self.executor:
+                self.executor.shutdown(wait=False)
+            self.scheduler.stop()
+            if self.terminal_pool:
+                self.terminal_pool.stop()
+            self.context.destroy(linger=0)
             logger.info("Servidor ZeroMQ encerrado")
         except Exception as e:
             logger.exception(f"Erro ao encerrar servidor: {str(e)}")
     
     def _run_server(self):
-        """Loop principal do servidor"""
+        """Loop principal do servidor (único dono do socket ROUTER)"""
         logger.info("Iniciando loop do servidor ZeroMQ")
         
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        poller.register(self.reply_socket, zmq.POLLIN)
+        poller.register(self.event_socket, zmq.POLLIN)
+        
         while self.running:
             try:
                 # Aguarda mensagem com timeout para permitir finalização limpa
-                if self.socket.poll(1000) == 0:
-                    continue
-                    
-                # Recebe mensagem
-                message = self.socket.recv_json()
-                logger.info(f"Mensagem recebida: {message.get('action', 'unknown')}")
+                events = dict(poller.poll(1000))
+                
+                # Repassa respostas concluídas pelos workers
+                if self.reply_socket in events:
+                    self._drain(self.reply_socket, self.socket.send_multipart)
                 
-                # Processa mensagem
-                response = self._process_message(message)
+                # Publica eventos emitidos pelas threads de extração
+                if self.event_socket in events:
+                    self._drain(self.event_socket, self.pub_socket.send_multipart)
                 
-                # Envia resposta
-                self.socket.send_json(response)
+                # Atende novas requisições
+                if self.socket in events:
+                    self._drain(self.socket, self._dispatch)
                 
             except zmq.ZMQError as e:
                 if self.running:  # Só loga erro se não for por causa do encerramento
@@ -105,29 +195,243 @@ class MT5ZMQServer:
                 
             except Exception as e:
                 logger.exception(f"Erro no processamento: {str(e)}")
-                # Tenta enviar resposta de erro
-                try:
-                    self.socket.send_json({
-                        "success": False,
-                        "error": str(e)
-                    })
-                except:
-                    pass
         
+        self.socket.close(linger=0)
+        self.reply_socket.close(linger=0)
+        self.event_socket.close(linger=0)
+        self.pub_socket.close(linger=0)
         logger.info("Loop do servidor ZeroMQ encerrado")
     
+    @staticmethod
+    def _drain(socket, handle):
+        """Consome todas as mensagens disponíveis no socket sem bloquear"""
+        while True:
+            try:
+                frames = socket.recv_multipart(zmq.NOBLOCK)
+            except zmq.Again:
+                return
+            handle(frames)
+    
+    def _dispatch(self, frames):
+        """Responde ações rápidas de imediato e envia as demais ao pool"""
+        # Envelope ROUTER: identidade (+ delimitador vazio de clientes REQ) e corpo
+        envelope, body = frames[:-1], frames[-1]
+        
+        try:
+            message, request_codec = codec.decode(body)
+            if not isinstance(message, dict):
+                raise ValueError("a mensagem deve ser um objeto")
+        except Exception as e:
+            self.socket.send_multipart(envelope + [self._encode({
+                "success": False,
+                "error": f"Mensagem inválida: {str(e)}"
+            }, codec.detect_codec(body))])
+            return
+        
+        # Toda requisição decodificada recebe resposta: um cliente REQ sem
+        # resposta fica bloqueado
+        try:
+            # A resposta segue o codec pedido em "codec" ou o da própria requisição
+            reply_codec = codec.negotiate(message, request_codec)
+            
+            action = message.get("action", "unknown")
+            logger.info(f"Mensagem recebida: {action} ({request_codec})")
+            
+            if self._is_fast(action, message):
+                response = self._handle_request(message)
+                self.socket.send_multipart(envelope + [self._encode(response, reply_codec)])
+            elif action in self.STREAM_ACTIONS:
+                self.executor.submit(self._run_stream, envelope, message, reply_codec)
+            else:
+                self.executor.submit(self._run_request, envelope, message, reply_codec)
+        except Exception as e:
+            logger.exception(f"Erro ao despachar requisição: {str(e)}")
+            self.socket.send_multipart(envelope + [self._encode({
+                "success": False,
+                "error": str(e),
+                "requestId": message.get("requestId")
+            }, request_codec)])
+    
+    def _is_fast(self, action, message):
+        """Status só é respondido no loop se puder sair do snapshot"""
+        if action == "status":
+            return not message.get("fresh") and self._snapshot_age() <= self.status_ttl
+        return action in self.FAST_ACTIONS
+    
+    def _snapshot_age(self):
+        snapshot = self._status_snapshot
+        return time.monotonic() - snapshot[0] if snapshot else float("inf")
+    
+    def _refresh_status(self):
+        """Lê o status no terminal e publica um novo snapshot"""
+        status = MappingProxyType(self.connector.get_connection_status())
+        self._status_snapshot = (time.monotonic(), status)
+        return status
+    
+    def _run_request(self, envelope, message, reply_codec=codec.JSON):
+        """Executa uma requisição em um worker e devolve a resposta ao loop"""
+        response = self._handle_request(message)
+        self._thread_socket(self.reply_endpoint).send_multipart(
+            envelope + [self._encode(response, reply_codec)])
+    
+    def _run_stream(self, envelope, message, reply_codec=codec.JSON):
+        """
+        Abre uma transferência (fetch_extraction) ou concede créditos a uma
+        existente (fetch_credit) e envia os blocos autorizados.
+        
+        Cada bloco é uma resposta multipart [cabeçalho, colunas] com
+        "last": true no último. Clientes REQ usam crédito 1 por requisição;
+        clientes DEALER podem conceder vários créditos de uma vez.
+        """
+        reply = self._thread_socket(self.reply_endpoint)
+        request_id = message.get("requestId")
+        
+        try:
+            if message.get("action") == "fetch_extraction":
+                transfer = self._open_transfer(message)
+            else:
+                transfer = self.transfers.get(message.get("transfer_id"))
+                if transfer is None:
+                    raise ValueError(f"Transferência {message.get('transfer_id')} não encontrada")
+        except Exception as e:
+            response = {"success": False, "error": str(e)}
+            if request_id is not None:
+                response["requestId"] = request_id
+            reply.send_multipart(envelope + [self._encode(response, reply_codec)])
+            return
+        
+        with transfer.lock:
+            if message.get("cancel"):
+                self.transfers.pop(transfer.transfer_id, None)
+                response = {"success": True, "transfer_id": transfer.transfer_id,
+                            "cancelled": True}
+                if request_id is not None:
+                    response["requestId"] = request_id
+                reply.send_multipart(envelope + [self._encode(response, reply_codec)])
+                return
+            
+            transfer.grant(message.get("credit", 1), envelope, request_id)
+            
+            while transfer.credit > 0 and not transfer.done:
+                header, columns = transfer.next_chunk()
+                reply.send_multipart(transfer.envelope + [
+                    self._encode(header, reply_codec),
+                    self._encode(columns, reply_codec)
+                ])
+            
+            if transfer.done:
+                self.transfers.pop(transfer.transfer_id, None)
+                logger.info(f"Transferência {transfer.transfer_id} concluída: {transfer.rows} negócios")
+    
+    def _open_transfer(self, message):
+        """Cria a transferência de uma extração com filtros e projeção"""
+        extract_id = message.get("extract_id")
+        if not extract_id:
+            raise ValueError("ID de extração não fornecido")
+        if not self.extractor.storage.exists(extract_id):
+            raise ValueError(f"Extração {extract_id} não encontrada")
+        
+        batches = self.extractor.storage.iter_batches(
+            extract_id,
+            start=codec.to_datetime(message.get("start_date")),
+            end=codec.to_datetime(message.get("end_date")),
+            symbols=message.get("symbols")
+        )
+        
+        transfer = ChunkedTransfer(
+            batches,
+            chunk_size=message.get("chunk_size", 50000),
+            columns=message.get("columns")
+        )
+        self.transfers[transfer.transfer_id] = transfer
+        
+        logger.info(f"Transferência {transfer.transfer_id} da extração {extract_id} iniciada")
+        return transfer
+    
+    def _expire_transfers(self):
+        """Descarta transferências abandonadas pelo cliente"""
+        for transfer_id, transfer in list(self.transfers.items()):
+            if transfer.idle_for() > self.TRANSFER_TTL:
+                self.transfers.pop(transfer_id, None)
+                logger.warning(f"Transferência {transfer_id} expirada sem créditos")
+    
+    def _thread_socket(self, endpoint):
+        """Socket PUSH da thread atual para um canal inproc do loop principal"""
+        # Sockets ZMQ não são thread-safe: cada thread tem os seus
+        sockets = getattr(self._local, "sockets", None)
+        if sockets is None:
+            sockets = self._local.sockets = {}
+        
+        push = sockets.get(endpoint)
+        if push is None:
+            push = self.context.socket(zmq.PUSH)
+            push.connect(endpoint)
+            sockets[endpoint] = push
+        return push
+    
+    def _publish(self, extract_id, event, **data):
+        """Publica um evento da extração no tópico extract:<extract_id>"""
+        if not self.running:
+            return
+        
+        payload = {
+            "event": event,
+            "extract_id": extract_id,
+            "timestamp": datetime.now().isoformat(),
+            **data
+        }
+        try:
+            self._thread_socket(self.event_endpoint).send_multipart(
+                [f"extract:{extract_id}".encode("utf-8"), self._encode(payload)])
+        except zmq.ZMQError as e:
+            logger.warning(f"Falha ao publicar evento {event} de {extract_id}: {str(e)}")
+    
+    def _handle_request(self, message):
+        """Processa a mensagem, convertendo exceções em resposta de erro"""
+        try:
+            response = self._process_message(message)
+        except Exception as e:
+            logger.exception(f"Erro no processamento: {str(e)}")
+            response = {
+                "success": False,
+                "error": str(e)
+            }
+        
+        # Ecoa o requestId para o cliente associar a resposta
+        if "requestId" in message:
+            response["requestId"] = message["requestId"]
+        return response
+    
+    @staticmethod
+    def _encode(response, reply_codec=codec.JSON):
+        """Serializa a resposta no codec negociado (JSON por padrão)"""
+        try:
+            return codec.encode(response, reply_codec)
+        except Exception as e:
+            logger.error(f"Resposta não serializável: {str(e)}")
+            return codec.encode({
+                "success": False,
+                "error": f"Resposta não serializável: {str(e)}",
+                "requestId": response.get("requestId")
+            }, reply_codec)
+    
     def _run_heartbeat(self):
         """Thread de monitoramento do estado do MT5"""
         logger.info("Iniciando monitoramento de heartbeat")
         
         while self.running:
             try:
-                # Verifica conexão MT5 a cada 5 segundos
-                is_connected = self.connector.check_connection()
+                # Verifica conexão MT5 a cada 5 segundos, renovando o snapshot
+                is_connected = self._refresh_status()["connected"]
                 
                 # Se perdeu conexão, tenta reconectar
-                if not is_connected and not self.connector.reconnect(max_attempts=1):
-                    logger.warning("MT5 continua desconectado após tentativa")
+                if not is_connected:
+                    if self.connector.reconnect(max_attempts=1):
+                        self._refresh_status()
+                    else:
+                        logger.warning("MT5 continua desconectado após tentativa")
+                
+                self._expire_transfers()
                 
             except Exception as e:
                 logger.error(f"Erro no heartbeat: {str(e)}")
@@ -145,7 +449,15 @@ class MT5ZMQServer:
             "status": self._handle_status,
             "extract": self._handle_extract,
             "extract_status": self._handle_extract_status,
-            "cancel_extract": self._handle_cancel_extract
+            "cancel_extract": self._handle_cancel_extract,
+            "pause_extract": self._handle_pause_extract,
+            "resume_extract": self._handle_resume_extract,
+            "adherence": self._handle_adherence,
+            "import_backtest": self._handle_import_backtest,
+            "list_terminals": self._handle_list_terminals,
+            "extract_batch": self._handle_extract_batch,
+            "query_deals": self._handle_query_deals,
+            "ea_metrics": self._handle_ea_metrics
         }
         
         handler = handlers.get(action)
@@ -172,7 +484,7 @@ class MT5ZMQServer:
         if result:
             return {
                 "success": True,
-                "status": self.connector.get_connection_status()
+                "status": self._refresh_status()
             }
         else:
             return {
@@ -183,16 +495,29 @@ class MT5ZMQServer:
     def _handle_disconnect(self, message):
         """Manipula solicitação de desconexão"""
         self.connector.disconnect()
+        self._refresh_status()
         return {
             "success": True,
             "message": "MT5 desconectado"
         }
     
     def _handle_status(self, message):
-        """Retorna status atual da conexão MT5"""
+        """
+        Retorna status da conexão MT5 a partir do snapshot do heartbeat;
+        fresh=true (ou snapshot mais velho que status_ttl) força leitura no terminal
+        """
+        age = self._snapshot_age()
+        if message.get("fresh") or age > self.status_ttl:
+            status = self._refresh_status()
+            age = 0.0
+        else:
+            status = self._status_snapshot[1]
+        
         return {
             "success": True,
-            "status": self.connector.get_connection_status()
+            "status": status,
+            "status_age_s": round(age, 3),
+            "codecs": codec.available_codecs()
         }
     
     def _handle_extract(self, message):
@@ -202,19 +527,40 @@ class MT5ZMQServer:
             start_date_str = message.get("start_date")
             end_date_str = message.get("end_date")
             extract_id = message.get("extract_id") or f"extract_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            export_csv = bool(message.get("export_csv", False))
+            
+            # Modo incremental: parte do watermark da conta
+            mode = message.get("mode", "full")
+            if mode not in ("full", "incremental"):
+                return {
+                    "success": False,
+                    "error": f"Modo de extração inválido: {mode}"
+                }
             
-            # Valida e converte datas
+            # Valida e converte datas: string ISO (JSON) ou datetime (timestamp
+            # MessagePack); a data inicial é opcional no modo incremental
             try:
-                start_date = datetime.fromisoformat(start_date_str)
-                end_date = datetime.fromisoformat(end_date_str) if end_date_str else datetime.now()
+                start_date = codec.to_datetime(start_date_str)
+                if start_date is None and mode != "incremental":
+                    raise ValueError("data inicial não informada")
+                end_date = codec.to_datetime(end_date_str) or datetime.now()
             except (ValueError, TypeError) as e:
                 return {
                     "success": False,
                     "error": f"Formato de data inválido: {str(e)}"
                 }
             
-            # Verifica se já existe extração ativa com este ID
-            if extract_id in self.active_extractions:
+            priority = message.get("priority", "interactive")
+            if priority not in PRIORITIES:
+                return {
+                    "success": False,
+                    "error": f"Prioridade inválida: {priority}"
+                }
+            
+            # Verifica se já existe extração ativa com este ID (uma extração
+            # cancelada pode ser reenviada e continua do checkpoint)
+            current = self.active_extractions.get(extract_id)
+            if current and current["status"] not in ("completed", "error", "cancelled"):
                 return {
                     "success": False,
                     "error": f"Extração com ID {extract_id} já está em andamento"
@@ -227,22 +573,38 @@ class MT5ZMQServer:
                 "progress": 0,
                 "total": 0,
                 "processed": 0,
-                "status": "starting",
-                "message": "Iniciando extração"
+                "status": "queued",
+                "priority": priority,
+                "message": "Extração na fila"
             }
             
-            # Inicia extração em thread separada
-            thread = threading.Thread(
-                target=self._run_extraction,
-                args=(extract_id, start_date, end_date)
-            )
-            thread.daemon = True
-            thread.start()
+            # Enfileira no agendador (limite de extrações simultâneas); os
+            # parâmetros ficam guardados para retomar após uma pausa
+            job = {
+                "args": (extract_id, start_date, end_date, export_csv),
+                "kwargs": {
+                    "mode": mode,
+                    "login": message.get("login"),
+                    "server": message.get("server")
+                },
+                "priority": priority
+            }
+            try:
+                self.scheduler.submit(extract_id, self._run_extraction, *job["args"],
+                                      priority=priority, **job["kwargs"])
+                self._extraction_jobs[extract_id] = job
+            except queue.Full as e:
+                del self.active_extractions[extract_id]
+                return {
+                    "success": False,
+                    "error": str(e)
+                }
             
             return {
                 "success": True,
                 "extract_id": extract_id,
-                "message": "Extração iniciada"
+                "message": "Extração iniciada",
+                "queue": self.scheduler.stats()
             }
             
         except Exception as e:
@@ -252,6 +614,121 @@ class MT5ZMQServer:
                 "error": f"Erro ao iniciar extração: {str(e)}"
             }
     
+    def _handle_list_terminals(self, message):
+        """Lista os terminais do pool e o estado de seus processos"""
+        return {
+            "success": True,
+            "terminals": self.terminal_pool.status() if self.terminal_pool else []
+        }
+    
+    def _handle_extract_batch(self, message):
+        """Enfileira a extração incremental de várias contas nos terminais do pool"""
+        if not self.terminal_pool:
+            return {
+                "success": False,
+                "error": "Nenhum terminal configurado para extração em lote"
+            }
+        
+        try:
+            accounts = []
+            for account in message.get("accounts") or []:
+                account = dict(account)
+                for key in ("start_date", "end_date"):
+                    if account.get(key):
+                        account[key] = codec.to_datetime(account[key])
+                accounts.append(account)
+        except (ValueError, TypeError) as e:
+            return {
+                "success": False,
+                "error": f"Formato de data inválido: {str(e)}"
+            }
+        
+        if not accounts:
+            return {
+                "success": False,
+                "error": "Nenhuma conta informada"
+            }
+        
+        batch_id = message.get("batch_id") or f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        if batch_id in self.active_extractions:
+            return {
+                "success": False,
+                "error": f"Lote {batch_id} já está em andamento"
+            }
+        
+        self.active_extractions[batch_id] = {
+            "id": batch_id,
+            "start_time": datetime.now().isoformat(),
+            "status": "queued",
+            "accounts": len(accounts),
+            "message": "Lote na fila"
+        }
+        
+        try:
+            self.scheduler.submit(batch_id, self._run_batch, batch_id, accounts,
+                                  priority=message.get("priority", "nightly"))
+        except (queue.Full, ValueError) as e:
+            del self.active_extractions[batch_id]
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        
+        return {
+            "success": True,
+            "batch_id": batch_id,
+            "accounts": len(accounts)
+        }
+    
+    def _run_batch(self, batch_id, accounts):
+        """Executa um lote de contas (job do agendador)"""
+        entry = self.active_extractions.get(batch_id)
+        if entry is None:
+            return
+        # Pedido de parada anterior ao início da thread: não há o que extrair
+        if entry["status"] in ("cancelling", "pausing"):
+            entry.update({"status": "cancelled", "message": "Lote cancelado"})
+            self._publish(batch_id, "cancelled", processed=0)
+            self._expire_entry(batch_id)
+            return
+        entry["status"] = "extracting"
+        self._publish(batch_id, "started", accounts=len(accounts))
+        
+        def progress_callback(login, progress, total, processed, message):
+            self._publish(batch_id, "progress", login=login, progress=progress,
+                          total=total, processed=processed, message=message)
+            # Pausa não é retomável em lote: encerra como cancelamento
+            entry = self.active_extractions.get(batch_id)
+            return not (entry and entry["status"] in ("cancelling", "pausing"))
+        
+        try:
+            summary = BatchExtractor(self.terminal_pool, self.extractor.data_dir).run(
+                accounts, batch_id=batch_id, callback=progress_callback)
+            
+            entry = self.active_extractions.get(batch_id)
+            if entry and entry["status"] in ("cancelling", "pausing"):
+                status = "cancelled"
+            else:
+                status = "completed" if not summary["failed"] else "completed_with_errors"
+            
+            if batch_id in self.active_extractions:
+                self.active_extractions[batch_id].update({
+                    "status": status,
+                    "progress": 100,
+                    "message": f"{summary['succeeded']}/{summary['accounts']} contas extraídas",
+                    "result": {k: v for k, v in summary.items() if k != "results"}
+                })
+            self._publish(batch_id, "completed", **{k: v for k, v in summary.items() if k != "results"})
+            
+        except Exception as e:
+            logger.exception(f"Erro no lote {batch_id}: {str(e)}")
+            if batch_id in self.active_extractions:
+                self.active_extractions[batch_id]["status"] = "error"
+                self.active_extractions[batch_id]["message"] = f"Erro: {str(e)}"
+            self._publish(batch_id, "error", error=str(e))
+        
+        self._expire_entry(batch_id)
+    
     def _handle_extract_status(self, message):
         """Retorna status atual de uma extração"""
         extract_id = message.get("extract_id")
@@ -262,11 +739,13 @@ class MT5ZMQServer:
                 "error": "ID de extração não fornecido"
             }
             
-        # Verifica se extração existe
-        if extract_id in self.active_extractions:
+        # Verifica se extração existe; a cópia evita serializar o dicionário
+        # enquanto a thread da extração o altera
+        entry = self.active_extractions.get(extract_id)
+        if entry is not None:
             return {
                 "success": True,
-                "status": self.active_extractions[extract_id]
+                "status": dict(entry)
             }
         else:
             # Tenta verificar se foi concluída
@@ -288,17 +767,17 @@ class MT5ZMQServer:
             except:
                 pass
                 
-            # Verifica checkpoint
-            checkpoint_data = self.extractor._load_checkpoint(extract_id)
-            if checkpoint_data:
+            # Verifica checkpoint (somente o manifesto, sem ler os segmentos)
+            manifest = self.extractor._load_checkpoint_manifest(extract_id)
+            if manifest:
                 return {
                     "success": True,
                     "status": {
                         "id": extract_id,
-                        "progress": int(len(checkpoint_data["operations"]) / checkpoint_data["total_ops"] * 100),
+                        "progress": int(manifest["processed_ops"] / manifest["total_ops"] * 100),
                         "status": "paused",
-                        "processed": len(checkpoint_data["operations"]),
-                        "total": checkpoint_data["total_ops"],
+                        "processed": manifest["processed_ops"],
+                        "total": manifest["total_ops"],
                         "message": "Extração interrompida, pode ser retomada"
                     }
                 }
@@ -309,34 +788,304 @@ class MT5ZMQServer:
             }
     
     def _handle_cancel_extract(self, message):
-        """Cancela uma extração em andamento"""
+        """
+        Cancela uma extração. Na fila, ela é retirada; em andamento, para ao
+        fim da janela atual, deixando checkpoint para retomada com a mesma ID.
+        """
+        return self._stop_extraction(message.get("extract_id"), "cancelled")
+    
+    def _handle_pause_extract(self, message):
+        """Pausa uma extração: para ao fim da janela atual e libera o terminal"""
+        return self._stop_extraction(message.get("extract_id"), "paused")
+    
+    def _handle_resume_extract(self, message):
+        """Retoma uma extração pausada a partir do checkpoint"""
         extract_id = message.get("extract_id")
+        entry = self.active_extractions.get(extract_id)
+        job = self._extraction_jobs.get(extract_id)
+        
+        if not entry or entry["status"] not in ("paused", "pausing") or not job:
+            return {
+                "success": False,
+                "error": f"Extração {extract_id} não está pausada"
+            }
+        
+        # Ainda parando: basta desfazer o pedido de pausa
+        if entry["status"] == "pausing":
+            entry["status"] = "extracting"
+            return {
+                "success": True,
+                "message": f"Extração {extract_id} retomada"
+            }
+        
+        try:
+            self.scheduler.submit(extract_id, self._run_extraction, *job["args"],
+                                  priority=job["priority"], **job["kwargs"])
+        except (queue.Full, ValueError) as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
         
+        entry.update({"status": "queued", "message": "Extração na fila"})
+        self._publish(extract_id, "resumed")
+        return {
+            "success": True,
+            "message": f"Extração {extract_id} retomada"
+        }
+    
+    def _stop_extraction(self, extract_id, reason):
+        """Interrompe (cancelled) ou pausa (paused) uma extração"""
         if not extract_id:
             return {
                 "success": False,
                 "error": "ID de extração não fornecido"
             }
+        
+        entry = self.active_extractions.get(extract_id)
+        if not entry or entry["status"] in ("completed", "error", "cancelled"):
+            return {
+                "success": False,
+                "error": f"Extração {extract_id} não está ativa"
+            }
+        
+        verb = "cancelada" if reason == "cancelled" else "pausada"
+        
+        # Na fila ou já pausada: não há thread a avisar
+        if self.scheduler.cancel(extract_id) or entry["status"] == "paused":
+            entry.update({"status": reason, "message": f"Extração {verb}"})
+            if reason == "cancelled":
+                self._extraction_jobs.pop(extract_id, None)
+                self._expire_entry(extract_id)
+            self._publish(extract_id, reason)
+            return {
+                "success": True,
+                "message": f"Extração {extract_id} {verb}"
+            }
+        
+        # Em andamento: o callback de progresso devolve False na próxima janela
+        entry["status"] = "cancelling" if reason == "cancelled" else "pausing"
+        return {
+            "success": True,
+            "message": f"Extração {extract_id} será {verb} ao fim da janela atual"
+        }
+    
+    def _expire_entry(self, extract_id, delay=60):
+        """
+        Mantém a entrada por um tempo para consulta, sem ocupar threads.
+        Só remove a própria entrada: se a extração for reenviada antes do
+        prazo (retomada do checkpoint), a nova entrada permanece.
+        """
+        entry = self.active_extractions.get(extract_id)
+        
+        def expire():
+            if self.active_extractions.get(extract_id) is entry:
+                self.active_extractions.pop(extract_id, None)
+        
+        timer = threading.Timer(delay, expire)
+        timer.daemon = True
+        timer.start()
+    
+    def _handle_import_backtest(self, message):
+        """Importa relatório do Strategy Tester para data/raw/backtests"""
+        file_path = message.get("file_path")
+        
+        if not file_path:
+            return {
+                "success": False,
+                "error": "Caminho do relatório não fornecido"
+            }
             
-        # Verifica se extração está ativa
-        if extract_id in self.active_extractions:
-            self.active_extractions[extract_id]["status"] = "cancelled"
+        if not Path(file_path).exists():
+            return {
+                "success": False,
+                "error": f"Arquivo não encontrado: {file_path}"
+            }
+        
+        result = self.backtest_importer.import_file(
+            file_path,
+            backtest_id=message.get("backtest_id"),
+            ea_id=message.get("ea_id"),
+            file_format=message.get("format")
+        )
+        
+        if result["success"]:
+            return {
+                "success": True,
+                "metadata": result["metadata"]
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"Erro ao importar backtest: {result['error']}"
+            }
+    
+    def _handle_query_deals(self, message):
+        """
+        Consulta paginada do índice de negócios: filtros por conta, símbolo,
+        EA, magic, posição, extração e intervalo de tempo
+        """
+        try:
+            result = self.extractor.query_deals(
+                symbols=message.get("symbols") or message.get("symbol"),
+                start=codec.to_datetime(message.get("start_date")),
+                end=codec.to_datetime(message.get("end_date")),
+                limit=message.get("limit", 100),
+                cursor=message.get("cursor"),
+                count=bool(message.get("count")),
+                login=message.get("login"),
+                server=message.get("server"),
+                ea_id=message.get("ea_id"),
+                magic=message.get("magic"),
+                position_id=message.get("position_id"),
+                extract_id=message.get("extract_id")
+            )
+            return dict(result, success=True)
             
-            # Aguarda um tempo para a thread detectar o cancelamento
-            time.sleep(1)
+        except ValueError as e:
+            return {
+                "success": False,
+                "error": f"Parâmetros de consulta inválidos: {str(e)}"
+            }
+    
+    def _handle_ea_metrics(self, message):
+        """
+        Métricas de desempenho por EA de uma extração (padrão: a mais
+        recente); refresh=true ignora o cache
+        """
+        extract_id = message.get("extract_id") or self._latest_extraction()
+        if not extract_id:
+            return {
+                "success": False,
+                "error": "Nenhuma extração concluída"
+            }
+        
+        try:
+            metrics = self._ea_metrics(extract_id, refresh=bool(message.get("refresh")))
+        except FileNotFoundError as e:
+            return {
+                "success": False,
+                "error": f"Dados não encontrados: {str(e)}"
+            }
+        
+        eas = metrics["eas"]
+        ea_id = message.get("ea_id")
+        if ea_id:
+            if str(ea_id) not in eas:
+                return {
+                    "success": False,
+                    "error": f"EA {ea_id} sem operações fechadas na extração {extract_id}"
+                }
+            eas = {str(ea_id): eas[str(ea_id)]}
+        
+        return {
+            "success": True,
+            "extract_id": extract_id,
+            "computed_at": metrics["computed_at"],
+            "eas": eas
+        }
+    
+    def _ea_metrics(self, extract_id, refresh=False):
+        """
+        Calcula (ou lê do cache) as métricas por EA de uma extração. O cache
+        vale enquanto o arquivo de operações da extração não mudar.
+        """
+        source = self.extractor.storage.path(extract_id)
+        if not source.exists():
+            raise FileNotFoundError(source.name)
+        source_mtime = source.stat().st_mtime_ns
+        
+        cache_dir = self.extractor.data_dir / "processed" / "ea_metrics"
+        cache_file = cache_dir / f"{extract_id}.json"
+        
+        with self._metrics_lock:
+            cached = self.ea_metrics_cache.get(extract_id)
+            if cached is None and cache_file.exists():
+                with open(cache_file, 'r') as f:
+                    cached = json.load(f)
+            if cached and cached["source_mtime"] == source_mtime and not refresh:
+                self.ea_metrics_cache[extract_id] = cached
+                return cached
+            
+            positions = self.extractor.load_positions(extract_id)
+            classifier = self.extractor.classifier
+            codes = classifier.classify(positions)
+            metrics = {
+                "extract_id": extract_id,
+                "source_mtime": source_mtime,
+                "computed_at": datetime.now().isoformat(),
+                "eas": EAMetricsEngine().compute(positions, codes, classifier.labels)
+            }
+            
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'w') as f:
+                json.dump(metrics, f)
+            self.ea_metrics_cache[extract_id] = metrics
+            return metrics
+    
+    def _latest_extraction(self):
+        """ID da extração concluída mais recente (pelos metadados)"""
+        metadata_files = list(self.extractor.raw_dir.glob("*_metadata.json"))
+        if not metadata_files:
+            return None
+        latest = max(metadata_files, key=lambda p: p.stat().st_mtime)
+        return latest.name[:-len("_metadata.json")]
+    
+    def _handle_adherence(self, message):
+        """Calcula aderência entre negócios reais de uma extração e um backtest"""
+        extract_id = message.get("extract_id")
+        backtest_id = message.get("backtest_id")
+        ea_id = message.get("ea_id")
+        
+        if not extract_id or not backtest_id:
+            return {
+                "success": False,
+                "error": "IDs de extração e backtest são obrigatórios"
+            }
+        
+        try:
+            real = self.extractor.load_extraction(extract_id)
+            backtest = self.extractor.load_backtest(backtest_id)
+            
+            # Restringe os negócios reais ao EA solicitado
+            if ea_id:
+                groups = self.extractor.categorize_by_ea(real)
+                real = real[groups.get(str(ea_id), [])]
+            
+            engine = AdherenceEngine(
+                time_tolerance=timedelta(seconds=float(message.get("time_tolerance", 60))),
+                approval_rate=float(message.get("approval_rate", 90.0))
+            )
+            result = engine.compare(real, backtest, include_matches=bool(message.get("include_matches")))
+            result.update({
+                "ea_id": ea_id,
+                "extract_id": extract_id,
+                "backtest_id": backtest_id
+            })
+            
+            # Persiste o resultado junto aos demais processados
+            result_dir = self.extractor.data_dir / "processed" / "adherence"
+            result_dir.mkdir(parents=True, exist_ok=True)
+            result_id = f"adherence_{ea_id or 'all'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            with open(result_dir / f"{result_id}.json", 'w') as f:
+                json.dump(result, f, indent=2)
             
-            # Remove da lista de ativas
-            if extract_id in self.active_extractions:
-                del self.active_extractions[extract_id]
-                
             return {
                 "success": True,
-                "message": f"Extração {extract_id} cancelada"
+                "result_id": result_id,
+                "result": result
             }
-        else:
+            
+        except FileNotFoundError as e:
             return {
                 "success": False,
-                "error": f"Extração {extract_id} não está ativa"
+                "error": f"Dados não encontrados: {str(e)}"
+            }
+        except Exception as e:
+            logger.exception(f"Erro ao calcular aderência: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Erro ao calcular aderência: {str(e)}"
             }
     
     def _update_progress(self, extract_id, progress, total, processed, status_message):
@@ -349,35 +1098,101 @@ class MT5ZMQServer:
                 "message": status_message,
                 "last_update": datetime.now().isoformat()
             })
+        
+        self._publish(extract_id, "progress", progress=progress, total=total,
+                      processed=processed, message=status_message)
     
-    def _run_extraction(self, extract_id, start_date, end_date):
+    def _run_extraction(self, extract_id, start_date, end_date, export_csv=False,
+                        mode="full", login=None, server=None):
         """Executa extração em thread separada"""
         try:
             logger.info(f"Iniciando thread de extração {extract_id}")
             
+            entry = self.active_extractions.get(extract_id)
+            if entry is None:
+                logger.warning(f"Extração {extract_id} sem registro ativo; ignorada")
+                return
+            
+            # Cancelamento ou pausa pedidos entre o agendamento e o início da
+            # thread: encerra sem extrair em vez de sobrescrever o pedido
+            if entry["status"] in ("cancelling", "pausing"):
+                reason = "paused" if entry["status"] == "pausing" else "cancelled"
+                entry.update({
+                    "status": reason,
+                    "message": "Extração pausada" if reason == "paused" else "Extração cancelada"
+                })
+                self._publish(extract_id, reason, processed=0)
+                if reason == "cancelled":
+                    self._extraction_jobs.pop(extract_id, None)
+                    self._expire_entry(extract_id)
+                return
+            
             # Atualiza status
-            self.active_extractions[extract_id]["status"] = "extracting"
+            entry["status"] = "extracting"
+            self._publish(extract_id, "started", mode=mode)
             
             # Função de callback para atualizar progresso
             def progress_callback(progress, total, processed, message):
                 self._update_progress(extract_id, progress, total, processed, message)
                 
-                # Verifica se foi solicitado cancelamento
-                cancelled = (extract_id in self.active_extractions and 
-                           self.active_extractions[extract_id]["status"] == "cancelled")
-                           
-                return not cancelled  # Retorna False para interromper extração
-            
-            # Executa extração
-            result = self.extractor.extract_history(
-                start_date=start_date,
-                end_date=end_date,
-                extract_id=extract_id,
-                callback=progress_callback
-            )
+                # Cancelamento ou pausa solicitados: False interrompe a
+                # extração ao fim da janela, deixando checkpoint
+                entry = self.active_extractions.get(extract_id)
+                return not (entry and entry["status"] in ("cancelling", "pausing"))
+            
+            # Executa extração (no terminal dedicado da conta, se houver)
+            if self.terminal_pool and self.terminal_pool.has(login):
+                result = self.terminal_pool.extract(
+                    login,
+                    callback=progress_callback,
+                    mode=mode,
+                    server=server,
+                    start_date=start_date,
+                    end_date=end_date,
+                    extract_id=extract_id
+                )
+            elif mode == "incremental":
+                result = self.extractor.extract_incremental(
+                    login=login,
+                    server=server,
+                    start_date=start_date,
+                    end_date=end_date,
+                    callback=progress_callback,
+                    extract_id=extract_id
+                )
+            else:
+                result = self.extractor.extract_history(
+                    start_date=start_date,
+                    end_date=end_date,
+                    extract_id=extract_id,
+                    callback=progress_callback,
+                    keep_operations=False
+                )
             
-            # Verifica se extração ainda está ativa (não foi cancelada)
+            # Cópia em CSV para consumidores legados, se solicitada
+            if result["success"] and export_csv:
+                self.extractor.export_csv(extract_id)
+            
+            # Verifica se extração ainda está ativa
             if extract_id in self.active_extractions:
+                entry = self.active_extractions[extract_id]
+                
+                if result.get("cancelled"):
+                    # Pausada fica registrada para retomada; cancelada expira
+                    reason = "paused" if entry["status"] == "pausing" else "cancelled"
+                    entry.update({
+                        "status": reason,
+                        "message": "Extração pausada" if reason == "paused" else "Extração cancelada",
+                        "resume_date": result["metadata"]["resume_date"]
+                    })
+                    self._publish(extract_id, reason, processed=result["metadata"]["total_operations"],
+                                  resume_date=result["metadata"]["resume_date"])
+                    if reason == "paused":
+                        return
+                    self._extraction_jobs.pop(extract_id, None)
+                    self._expire_entry(extract_id)
+                    return
+                
                 if result["success"]:
                     self.active_extractions[extract_id]["status"] = "completed"
                     self.active_extractions[extract_id]["progress"] = 100
@@ -385,16 +1200,17 @@ class MT5ZMQServer:
                     self.active_extractions[extract_id]["result"] = {
                         "total_operations": result["metadata"]["total_operations"]
                     }
+                    self._publish(extract_id, "completed", progress=100,
+                                  total_operations=result["metadata"]["total_operations"])
                 else:
                     self.active_extractions[extract_id]["status"] = "error"
                     self.active_extractions[extract_id]["message"] = f"Erro: {result.get('error', 'Desconhecido')}"
+                    self._publish(extract_id, "error", error=result.get("error", "Desconhecido"))
                 
-                # Mantém na lista por um tempo para cliente consultar
-                time.sleep(60)
-                
-                # Remove da lista de extrações ativas
-                if extract_id in self.active_extractions:
-                    del self.active_extractions[extract_id]
+                # Mantém na lista por um tempo para cliente consultar, sem
+                # ocupar a vaga do agendador
+                self._extraction_jobs.pop(extract_id, None)
+                self._expire_entry(extract_id)
             
         except Exception as e:
             logger.exception(f"Erro na thread de extração: {str(e)}")
@@ -403,6 +1219,7 @@ class MT5ZMQServer:
             if extract_id in self.active_extractions:
                 self.active_extractions[extract_id]["status"] = "error"
                 self.active_extractions[extract_id]["message"] = f"Erro: {str(e)}"
+            self._publish(extract_id, "error", error=str(e))
                 
 # Adicionando ao MT5ZMQServer existente, na função _process_message
 
@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import sys
+from pathlib import Path
+
+# Os módulos de mt5_integration importam uns aos outros pelo nome
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "mt5_integration"))
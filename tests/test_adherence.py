@@ -0,0 +1,66 @@
+# tests/test_adherence.py
+
+from datetime import timedelta
+
+import numpy as np
+
+from adherence import AdherenceEngine, DEAL_TYPE_BUY, DEAL_TYPE_SELL
+from deals import DEAL_DTYPE, DealBatch
+
+BASE_MSC = 1704067200000  # 2024-01-01 00:00:00 UTC
+
+
+def make_batch(times, first_ticket=1, symbol="EURUSD", deal_type=DEAL_TYPE_BUY):
+    records = np.zeros(len(times), dtype=DEAL_DTYPE)
+    records["ticket"] = np.arange(first_ticket, first_ticket + len(times))
+    records["time_msc"] = times
+    records["time"] = records["time_msc"] // 1000
+    records["type"] = deal_type
+    records["symbol"] = symbol
+    records["volume"] = 0.1
+    records["price"] = 1.1
+    return DealBatch(records)
+
+
+def test_same_millisecond_baskets_match_completely():
+    times = [BASE_MSC] * 10
+    result = AdherenceEngine().compare(make_batch(times, 1), make_batch(times, 101))
+
+    assert result["matched"] == 10
+    assert result["match_rate"] == 100.0
+    assert result["unmatched_real"] == []
+    assert result["unmatched_backtest"] == []
+
+
+def test_constant_latency_matches_in_order():
+    backtest_times = BASE_MSC + np.arange(20) * 100
+    real_times = backtest_times + 500
+    result = AdherenceEngine(time_tolerance=timedelta(seconds=1)).compare(
+        make_batch(real_times, 1), make_batch(backtest_times, 101), include_matches=True)
+
+    assert result["match_rate"] == 100.0
+    assert result["time_delta_max_ms"] == 500
+    assert [(m["real_ticket"], m["backtest_ticket"]) for m in result["matches"]] == \
+        [(i, 100 + i) for i in range(1, 21)]
+
+
+def test_tolerance_symbol_and_direction_limit_matches():
+    real = DealBatch.concat([
+        make_batch([BASE_MSC], 1),
+        make_batch([BASE_MSC], 2, deal_type=DEAL_TYPE_SELL),
+        make_batch([BASE_MSC], 3, symbol="GBPUSD"),
+        make_batch([BASE_MSC + 120000], 4),
+    ])
+    backtest = make_batch([BASE_MSC, BASE_MSC + 60000 * 4], 101)
+    result = AdherenceEngine().compare(real, backtest)
+
+    assert result["matched"] == 1
+    assert result["unmatched_backtest"] == [102]
+    assert sorted(result["unmatched_real"]) == [2, 3, 4]
+
+
+def test_empty_inputs():
+    result = AdherenceEngine().compare(make_batch([]), make_batch([]))
+
+    assert result["matched"] == 0
+    assert result["match_rate"] == 0.0
@@ -0,0 +1,71 @@
+# tests/test_deal_store.py
+
+from datetime import datetime, timezone
+
+import numpy as np
+
+from deal_store import AccountDealStore
+from deals import DEAL_DTYPE, DealBatch
+
+BASE_MSC = 1704067200000  # 2024-01-01 00:00:00 UTC
+
+
+def make_batch(tickets, symbols=("EURUSD",)):
+    """Negócios com time_msc derivado do ticket (1 s por ticket)"""
+    tickets = np.asarray(tickets, dtype=np.int64)
+    records = np.zeros(len(tickets), dtype=DEAL_DTYPE)
+    records["ticket"] = tickets
+    records["time_msc"] = BASE_MSC + tickets * 1000
+    records["time"] = records["time_msc"] // 1000
+    records["position_id"] = tickets // 2
+    records["symbol"] = np.array(symbols)[tickets % len(symbols)]
+    return DealBatch(records)
+
+
+def test_repeated_merge_collapses_overlapping_tickets(tmp_path):
+    store = AccountDealStore(tmp_path)
+
+    first = store.merge([make_batch(range(0, 100))])
+    assert (first["added"], first["duplicates"]) == (100, 0)
+    assert first["newest"] == (BASE_MSC + 99 * 1000, 99)
+
+    # Sobreposição com o conjunto e entre os lotes do mesmo merge
+    second = store.merge([make_batch(range(50, 150)), make_batch(range(140, 160))])
+    assert (second["added"], second["duplicates"]) == (60, 60)
+
+    again = store.merge([make_batch(range(0, 160))])
+    assert (again["added"], again["duplicates"]) == (0, 160)
+
+    # Outra instância (outro processo) enxerga o mesmo conjunto
+    reopened = AccountDealStore(tmp_path)
+    assert len(reopened) == 160
+    assert np.array_equal(reopened.tickets, np.arange(160))
+    assert np.array_equal(reopened.read()["ticket"], np.arange(160))
+
+
+def test_compaction_rewrites_into_single_segment(tmp_path):
+    store = AccountDealStore(tmp_path, max_segments=4)
+    store.merge([make_batch(range(0, 10))])
+    for start in range(10, 50, 10):
+        store.merge([make_batch(range(start, start + 10))])
+
+    # Incrementais (40) passam de compaction_ratio do base (10): tudo em um segmento
+    assert len(store.segments) == 1
+    assert sorted(p.name for p in tmp_path.glob("seg_*")) == store._manifest["segments"]
+    assert np.array_equal(store.read()["ticket"], np.arange(50))
+    assert store.get(42)["ticket"] == 42
+    assert np.array_equal(store.by_position(7)["ticket"], [14, 15])
+
+
+def test_read_filters_by_time_and_symbol(tmp_path):
+    store = AccountDealStore(tmp_path)
+    store.merge([make_batch(range(0, 40), symbols=("EURUSD", "GBPUSD"))])
+    store.merge([make_batch(range(40, 80), symbols=("EURUSD", "GBPUSD"))])
+
+    start = datetime.fromtimestamp((BASE_MSC + 30 * 1000) / 1000, tz=timezone.utc)
+    end = datetime.fromtimestamp((BASE_MSC + 49 * 1000) / 1000, tz=timezone.utc)
+    batch = store.read(start, end, symbols=["GBPUSD"])
+
+    assert np.array_equal(batch["ticket"], np.arange(31, 50, 2))
+    assert set(batch["symbol"]) == {"GBPUSD"}
+    assert np.all(np.diff(batch["time_msc"]) > 0)
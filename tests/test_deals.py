@@ -0,0 +1,58 @@
+# tests/test_deals.py
+
+from collections import namedtuple
+
+import numpy as np
+
+from deals import DEAL_DTYPE, DEAL_FIELDS, DealBatch
+
+# Campos de TradeDeal na ordem retornada por mt5.history_deals_get
+TradeDeal = namedtuple("TradeDeal", [
+    "ticket", "order", "time", "time_msc", "type", "entry", "magic",
+    "position_id", "reason", "volume", "price", "commission", "swap",
+    "profit", "fee", "symbol", "comment", "external_id"
+])
+
+
+def make_deal(ticket, **fields):
+    values = dict.fromkeys(TradeDeal._fields, 0)
+    values.update(symbol="EURUSD", comment="", external_id="")
+    values.update(ticket=ticket, **fields)
+    return TradeDeal(**values)
+
+
+def test_dtype_follows_trade_deal_order():
+    assert DEAL_FIELDS == TradeDeal._fields
+
+
+def test_from_deals_takes_fast_path():
+    accessed = set()
+
+    class TrackedDeal(TradeDeal):
+        """Registra leituras de campo por nome (o caminho lento usa getattr)"""
+        __slots__ = ()
+
+        def __getattribute__(self, name):
+            if name in TradeDeal._fields:
+                accessed.add(name)
+            return super().__getattribute__(name)
+
+    deals = [TrackedDeal(*make_deal(1, position_id=10, reason=3, volume=0.5, comment="EA_X_1")),
+             TrackedDeal(*make_deal(2, position_id=11, reason=4, volume=1.0))]
+    batch = DealBatch.from_deals(deals)
+
+    assert not accessed
+    assert batch.records.dtype == DEAL_DTYPE
+    assert batch["ticket"].tolist() == [1, 2]
+    assert batch["position_id"].tolist() == [10, 11]
+    assert batch["reason"].tolist() == [3, 4]
+    assert batch["comment"].tolist() == ["EA_X_1", ""]
+
+
+def test_from_deals_fills_other_layouts_by_name():
+    Partial = namedtuple("Partial", ["ticket", "reason", "position_id", "symbol"])
+    batch = DealBatch.from_deals([Partial(7, 2, 70, "GBPUSD")])
+
+    assert batch["position_id"].tolist() == [70]
+    assert batch["reason"].tolist() == [2]
+    assert np.all(batch["volume"] == 0)
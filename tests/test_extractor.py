@@ -0,0 +1,98 @@
+# tests/test_extractor.py
+
+import sys
+import types
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+# Terminal simulado: o pacote MetaTrader5 só existe no Windows e exige um
+# terminal aberto; a extração só usa as funções abaixo
+TradeDeal = namedtuple("TradeDeal", [
+    "ticket", "order", "time", "time_msc", "type", "entry", "magic",
+    "position_id", "reason", "volume", "price", "commission", "swap",
+    "profit", "fee", "symbol", "comment", "external_id"
+])
+AccountInfo = namedtuple("AccountInfo", ["login", "server"])
+TerminalInfo = namedtuple("TerminalInfo", ["build", "connected"])
+
+START = datetime(2024, 1, 1)
+HOUR = 3600
+
+
+def _seconds(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def fake_terminal(n_deals):
+    """Módulo com n_deals negócios, um por hora, inclusive à meia-noite
+    (segundo de fronteira entre janelas diárias)"""
+    t0 = _seconds(START)
+    deals = [TradeDeal(i, i, t0 + i * HOUR, (t0 + i * HOUR) * 1000, i % 2, i % 2, 1000,
+                       i // 2 + 1, 0, 0.1, 1.1, 0.0, 0.0, 0.0, 0.0, "EURUSD", "", "")
+             for i in range(1, n_deals + 1)]
+
+    def in_range(start, end):
+        a, b = _seconds(start), _seconds(end)
+        return [deal for deal in deals if a <= deal.time <= b]
+
+    module = types.ModuleType("MetaTrader5")
+    module.initialize = lambda **kwargs: True
+    module.shutdown = lambda: None
+    module.last_error = lambda: (1, "Success")
+    module.terminal_info = lambda: TerminalInfo(4000, True)
+    module.account_info = lambda: AccountInfo(12345, "Demo-Server")
+    module.history_deals_get = lambda start, end: tuple(in_range(start, end))
+    module.history_deals_total = lambda start, end: len(in_range(start, end))
+    return module
+
+
+sys.modules.setdefault("MetaTrader5", fake_terminal(0))
+
+import extractor as extractor_module  # noqa: E402
+import mt5_connector  # noqa: E402
+from extractor import MT5Extractor  # noqa: E402
+from mt5_connector import MT5Connector  # noqa: E402
+
+
+@pytest.fixture
+def terminal(monkeypatch):
+    module = fake_terminal(300)
+    monkeypatch.setattr(extractor_module, "mt5", module)
+    monkeypatch.setattr(mt5_connector, "mt5", module)
+    monkeypatch.setattr(MT5Connector, "_instance", None)
+    return module
+
+
+def test_resumed_extraction_has_every_ticket_once(tmp_path, terminal):
+    extractor = MT5Extractor(tmp_path, window_options={
+        "initial": timedelta(days=1), "maximum": timedelta(days=1)})
+    end = START + timedelta(days=14)
+    windows = []
+
+    def stop_after_five_windows(progress, total, processed, message):
+        windows.append(processed)
+        return len(windows) <= 5
+
+    # checkpoint_size maior que uma janela: parte do interrompido só chega
+    # ao checkpoint no salvamento de interrupção
+    first = extractor.extract_history(START, end, checkpoint_size=40, extract_id="resume",
+                                      callback=stop_after_five_windows, merge_account=False)
+    assert first["cancelled"]
+    interrupted = first["operations"]["ticket"]
+    assert len(interrupted) == first["metadata"]["total_operations"]
+    assert 0 < len(interrupted) < 300
+    assert not extractor.storage.exists("resume")
+
+    second = extractor.extract_history(START, end, checkpoint_size=40, extract_id="resume",
+                                       merge_account=False)
+    assert second["success"]
+    assert second["metadata"]["total_operations"] == 300
+    assert np.array_equal(np.sort(second["operations"]["ticket"]), np.arange(1, 301))
+    assert np.array_equal(np.sort(extractor.storage.read("resume")["ticket"]),
+                          np.arange(1, 301))
+    assert not extractor._checkpoint_path("resume").exists()
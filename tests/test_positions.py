@@ -0,0 +1,135 @@
+# tests/test_positions.py
+
+import numpy as np
+import pytest
+
+from deals import DEAL_DTYPE, DealBatch
+from positions import (PositionTable, DEAL_TYPE_BUY, DEAL_TYPE_SELL,
+                       DEAL_ENTRY_IN, DEAL_ENTRY_OUT, DEAL_ENTRY_INOUT)
+
+BASE_MSC = 1704067200000  # 2024-01-01 00:00:00 UTC
+
+
+def make_batch(*deals):
+    """Negócios (position_id, type, entry, volume, price, profit, commission)"""
+    records = np.zeros(len(deals), dtype=DEAL_DTYPE)
+    for i, (pid, deal_type, entry, volume, price, profit, commission) in enumerate(deals):
+        records[i]["ticket"] = 100 + i
+        records[i]["time_msc"] = BASE_MSC + i * 1000
+        records[i]["position_id"] = pid
+        records[i]["type"] = deal_type
+        records[i]["entry"] = entry
+        records[i]["volume"] = volume
+        records[i]["price"] = price
+        records[i]["profit"] = profit
+        records[i]["commission"] = commission
+        records[i]["symbol"] = "EURUSD"
+    records["time"] = records["time_msc"] // 1000
+    return DealBatch(records)
+
+
+def test_simple_round_trip():
+    table = PositionTable.from_deals(make_batch(
+        (1, DEAL_TYPE_BUY, DEAL_ENTRY_IN, 1.0, 1.1000, 0.0, -3.0),
+        (1, DEAL_TYPE_SELL, DEAL_ENTRY_OUT, 1.0, 1.1050, 50.0, -3.0),
+    ))
+
+    assert len(table) == 1
+    leg = table.records[0]
+    assert leg["type"] == DEAL_TYPE_BUY
+    assert leg["volume"] == leg["volume_closed"] == 1.0
+    assert leg["open_price"] == pytest.approx(1.1000)
+    assert leg["close_price"] == pytest.approx(1.1050)
+    assert leg["profit"] == 50.0
+    assert leg["commission"] == -6.0
+    assert (leg["open_ticket"], leg["close_ticket"]) == (100, 101)
+    assert leg["deals"] == 2
+    assert leg["closed"] and not leg["truncated"]
+
+
+def test_partial_entries_and_exits_average_prices():
+    table = PositionTable.from_deals(make_batch(
+        (1, DEAL_TYPE_SELL, DEAL_ENTRY_IN, 0.3, 1.2000, 0.0, 0.0),
+        (1, DEAL_TYPE_SELL, DEAL_ENTRY_IN, 0.1, 1.2040, 0.0, 0.0),
+        (1, DEAL_TYPE_BUY, DEAL_ENTRY_OUT, 0.2, 1.1900, 20.0, 0.0),
+        (1, DEAL_TYPE_BUY, DEAL_ENTRY_OUT, 0.2, 1.1950, 15.0, 0.0),
+    ))
+
+    assert len(table) == 1
+    leg = table.records[0]
+    assert leg["type"] == DEAL_TYPE_SELL
+    assert leg["volume"] == pytest.approx(0.4)
+    assert leg["volume_closed"] == pytest.approx(0.4)
+    assert leg["open_price"] == pytest.approx((0.3 * 1.2000 + 0.1 * 1.2040) / 0.4)
+    assert leg["close_price"] == pytest.approx((0.2 * 1.1900 + 0.2 * 1.1950) / 0.4)
+    assert leg["profit"] == 35.0
+    assert leg["close_ticket"] == 103
+    assert leg["deals"] == 4
+    assert leg["closed"] and not leg["truncated"]
+
+
+def test_reversal_splits_into_two_legs():
+    # INOUT de 1.5 fecha a compra de 1.0 e abre uma venda de 0.5
+    table = PositionTable.from_deals(make_batch(
+        (1, DEAL_TYPE_BUY, DEAL_ENTRY_IN, 1.0, 1.1000, 0.0, -2.0),
+        (1, DEAL_TYPE_SELL, DEAL_ENTRY_INOUT, 1.5, 1.1100, 100.0, -3.0),
+        (1, DEAL_TYPE_BUY, DEAL_ENTRY_OUT, 0.5, 1.1000, 50.0, -1.0),
+    ))
+
+    assert len(table) == 2
+    first, second = table.records
+    assert (first["leg"], second["leg"]) == (0, 1)
+    assert (first["type"], second["type"]) == (DEAL_TYPE_BUY, DEAL_TYPE_SELL)
+    assert first["volume"] == first["volume_closed"] == 1.0
+    assert second["volume"] == second["volume_closed"] == 0.5
+    assert first["close_price"] == pytest.approx(1.1100)
+    assert second["open_price"] == pytest.approx(1.1100)
+    assert first["close_ticket"] == second["open_ticket"] == 101
+
+    # Resultado do negócio de reversão fica com a perna fechada; a comissão
+    # é dividida pelo volume de cada perna (1.0 / 0.5)
+    assert first["profit"] == 100.0
+    assert second["profit"] == 50.0
+    assert first["commission"] == pytest.approx(-2.0 - 2.0)
+    assert second["commission"] == pytest.approx(-1.0 - 1.0)
+    assert first["closed"] and second["closed"]
+
+
+def test_exit_before_any_entry_is_truncated():
+    table = PositionTable.from_deals(make_batch(
+        (1, DEAL_TYPE_SELL, DEAL_ENTRY_OUT, 0.4, 1.3000, 12.0, 0.0),
+        (1, DEAL_TYPE_SELL, DEAL_ENTRY_OUT, 0.6, 1.3010, 24.0, 0.0),
+    ))
+
+    assert len(table) == 1
+    leg = table.records[0]
+    assert leg["type"] == DEAL_TYPE_BUY
+    assert leg["truncated"]
+    assert leg["volume"] == leg["volume_closed"] == 1.0
+    assert np.isnan(leg["open_price"])
+    assert leg["close_price"] == pytest.approx((0.4 * 1.3000 + 0.6 * 1.3010) / 1.0)
+    assert leg["profit"] == 36.0
+    assert leg["closed"]
+
+
+def test_open_position_is_not_closed():
+    table = PositionTable.from_deals(make_batch(
+        (1, DEAL_TYPE_BUY, DEAL_ENTRY_IN, 1.0, 1.1000, 0.0, 0.0),
+        (1, DEAL_TYPE_SELL, DEAL_ENTRY_OUT, 0.4, 1.1020, 8.0, 0.0),
+        (2, DEAL_TYPE_SELL, DEAL_ENTRY_IN, 0.2, 1.1010, 0.0, 0.0),
+    ))
+
+    assert len(table) == 2
+    partial, untouched = table.records
+    assert partial["volume"] == 1.0
+    assert partial["volume_closed"] == pytest.approx(0.4)
+    assert partial["profit"] == 8.0
+    assert partial["close_ticket"] == 101
+    assert not partial["closed"] and not partial["truncated"]
+
+    assert untouched["position_id"] == 2
+    assert untouched["volume"] == pytest.approx(0.2)
+    assert untouched["volume_closed"] == 0.0
+    assert untouched["close_ticket"] == 0
+    assert np.isnan(untouched["close_price"])
+    assert not untouched["closed"] and not untouched["truncated"]
@@ -0,0 +1,40 @@
+# tests/test_storage.py
+
+import numpy as np
+import pytest
+
+from deals import DEAL_DTYPE, DealBatch
+from storage import get_storage
+
+
+def make_batch(n):
+    records = np.zeros(n, dtype=DEAL_DTYPE)
+    records["ticket"] = np.arange(1, n + 1)
+    records["time_msc"] = 1704067200000 + records["ticket"] * 1000
+    records["symbol"] = "EURUSD"
+    return DealBatch(records)
+
+
+@pytest.mark.parametrize("storage_format", ["csv", "parquet"])
+def test_abort_removes_partial_file(tmp_path, storage_format):
+    storage = get_storage(tmp_path, storage_format)
+    writer = storage.open_writer("aborted")
+    writer.write(make_batch(10))
+    assert writer.part_path.exists()
+
+    writer.abort()
+
+    assert not writer.part_path.exists()
+    assert not storage.exists("aborted")
+
+
+@pytest.mark.parametrize("storage_format", ["csv", "parquet"])
+def test_commit_publishes_all_batches(tmp_path, storage_format):
+    storage = get_storage(tmp_path, storage_format)
+    writer = storage.open_writer("committed")
+    writer.write(make_batch(10))
+    writer.write(make_batch(0))
+    writer.commit()
+
+    assert not writer.part_path.exists()
+    assert np.array_equal(np.sort(storage.read("committed")["ticket"]), np.arange(1, 11))